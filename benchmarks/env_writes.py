@@ -0,0 +1,83 @@
+# benchmarks/env_writes.py
+"""Settings write benchmark: .env rewrites and time per user action.
+
+Replays the model-settings action (model, max tokens, temperature, top P) and
+the switch-prompt action against a temporary .env, comparing the old
+`dotenv.set_key` per key with Config.save_env, which applies the batch in one
+locked, fsynced atomic rewrite.
+
+    python benchmarks/env_writes.py --actions 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import set_key  # noqa: E402
+import src.config as config_module  # noqa: E402
+
+ENV_TEMPLATE = "".join(f"SETTING_{i}='value {i}'\n" for i in range(20)) + "GROQ_API_KEY='gsk_test'\nTAVILY_API_KEY='tvly_test'\n"
+
+ACTIONS = [
+    ("model settings", lambda i: {
+        "GROQ_MODEL": "llama3-70b-8192", "MAX_TOKENS": str(1000 + i), "TEMPERATURE": "0.5", "TOP_P": "0.9"
+    }),
+    ("switch prompt", lambda i: {"SYSTEM_PROMPT": f"You are prompt {i}.", "SYSTEM_PROMPT_TITLE": f"Prompt {i}"}),
+]
+
+
+def legacy_action(config, updates):
+    for key, value in updates.items():
+        set_key('.env', key, value)
+
+
+def batched_action(config, updates):
+    config.save_env(updates)
+
+
+def run(name, action, config, actions):
+    results = []
+    for label, make_updates in ACTIONS:
+        Path('.env').write_text(ENV_TEMPLATE)
+        rewrites = 0
+
+        def count(original):
+            def wrapper(*args, **kwargs):
+                nonlocal rewrites
+                rewrites += 1
+                return original(*args, **kwargs)
+            return wrapper
+
+        with patch(f"{__name__}.set_key", count(set_key)), \
+                patch.object(config_module, "atomic_write", count(config_module.atomic_write)):
+            start = time.perf_counter()
+            for i in range(actions):
+                action(config, make_updates(i))
+            elapsed = time.perf_counter() - start
+        results.append(f"{label}: {rewrites / actions:.0f} rewrites, {elapsed / actions * 1000:6.2f} ms per action")
+    print(f"{name:22s} " + "   ".join(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        Path('.env').write_text(ENV_TEMPLATE)
+        config = config_module.Config()
+        run("legacy (set_key/key)", legacy_action, config, args.actions)
+        run("batched save_env", batched_action, config, args.actions)
+        os.chdir(PROJECT_ROOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/llm_load.py
+"""LLM backend load test, fully offline against the local fake server.
+
+Sends --requests chat completions through OpenAICompatibleBackend to a
+FakeLLMServer with --latency seconds of simulated model time: sequentially with
+complete(), then --concurrency at a time with acomplete(), and reports
+throughput and latency percentiles for each, plus streaming TTFT.
+
+    python benchmarks/llm_load.py --requests 200 --concurrency 16 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.models.models import StreamMetrics  # noqa: E402
+from src.services.fake_llm_server import FakeLLMServer  # noqa: E402
+from src.services.llm_backend import OpenAICompatibleBackend  # noqa: E402
+
+REQUEST = dict(messages=[{"role": "user", "content": "find files larger than 100MB in my home directory"}],
+               model="fake-model", temperature=0.1, max_tokens=256)
+
+
+def report(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:26s} {len(latencies) / elapsed:8.1f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms")
+
+
+def run_sequential(backend, count):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t = time.perf_counter()
+        backend.complete(**REQUEST)
+        latencies.append(time.perf_counter() - t)
+    return latencies, time.perf_counter() - start
+
+
+async def run_concurrent(backend, count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            t = time.perf_counter()
+            await backend.acomplete(**REQUEST)
+            latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    elapsed = time.perf_counter() - start
+    await backend.aclose()  # on this loop, which owns the async connections
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds before the first byte")
+    parser.add_argument("--tokens-per-second", type=float, default=500)
+    args = parser.parse_args()
+
+    with FakeLLMServer(latency=args.latency, tokens_per_second=args.tokens_per_second) as server:
+        backend = OpenAICompatibleBackend(server.url, name="fake")
+        sequential = max(1, args.requests // args.concurrency)
+        report(f"sequential complete() x{sequential}", *run_sequential(backend, sequential))
+
+        ttfts = []
+        for _ in range(10):
+            metrics = StreamMetrics(model_name=REQUEST["model"])
+            for _ in backend.stream(metrics, **REQUEST):
+                pass
+            ttfts.append(metrics.ttft)
+        print(f"{'streaming':26s} TTFT p50 {statistics.median(ttfts) * 1000:7.1f} ms   "
+              f"{metrics.tokens_per_second:.0f} tokens/s")
+        report(f"async x{args.concurrency} concurrent", *asyncio.run(run_concurrent(backend, args.requests, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/model_routing.py
+"""Model routing benchmark, fully offline against the local fake server.
+
+Serves command-sized requests from a FakeLLMServer whose simulated latency
+depends on the requested model, then sends --requests of them through a
+LatencyTrackingBackend, once with the model pinned to GROQ_MODEL and once
+through the ModelRouter, and reports latency percentiles and which models the
+router picked. --slow-model is made slower than the command budget halfway
+through, to show the router moving off it.
+
+    python benchmarks/model_routing.py --requests 100
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import Config  # noqa: E402
+from src.services.fake_llm_server import FakeLLMServer, echo_reply  # noqa: E402
+from src.services.llm_backend import OpenAICompatibleBackend  # noqa: E402
+from src.services.model_router import LatencyTracker, LatencyTrackingBackend, ModelRouter  # noqa: E402
+
+# Simulated seconds per model, roughly in proportion to model size
+MODEL_LATENCY = {"llama3-8b-8192": 0.02, "gemma-7b-it": 0.03, "llama3-70b-8192": 0.08, "mixtral-8x7b-32768": 0.06}
+REQUEST = dict(messages=[{"role": "system", "content": "Reply with a single shell command."},
+                         {"role": "user", "content": "find files larger than 100MB in my home directory"}],
+               model="mixtral-8x7b-32768", temperature=0.1, max_tokens=32768)
+
+
+def run(backend, router, count, slow_model, enabled):
+    router.enabled = enabled
+    latencies, models = [], Counter()
+    for i in range(count):
+        if i == count // 2:
+            MODEL_LATENCY[slow_model] += 2 * router.config.router_latency_budgets["command"]
+        request = router.route("command", dict(REQUEST, model=router.config.groq_model))
+        t = time.perf_counter()
+        backend.complete(**request)
+        latencies.append(time.perf_counter() - t)
+        models[request["model"]] += 1
+    return latencies, models
+
+
+def report(name, latencies, models):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    picked = ", ".join(f"{model} x{count}" for model, count in models.most_common())
+    print(f"{name:8s} p50 {statistics.median(latencies) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms   {picked}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--slow-model", default="llama3-8b-8192")
+    args = parser.parse_args()
+
+    def reply(request):
+        time.sleep(MODEL_LATENCY.get(request.get("model"), 0.05))
+        return echo_reply(request)
+
+    config = Config()
+    baseline = dict(MODEL_LATENCY)
+    with FakeLLMServer(reply=reply) as server:
+        for name, enabled in (("pinned", False), ("routed", True)):
+            MODEL_LATENCY.update(baseline)
+            tracker = LatencyTracker()
+            backend = LatencyTrackingBackend(OpenAICompatibleBackend(server.url, name="fake"), tracker)
+            router = ModelRouter(config, tracker)
+            report(name, *run(backend, router, args.requests, args.slow_model, enabled))
+            backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/prompt_build.py
+"""Prompt construction benchmark: per-query cost of building the CLI Assistant system prompt.
+
+Compares the old approach (rebuild the platform table and the whole f-string on
+every query) with SystemPromptTemplate, both when a new command was added to the
+history since the last query and when the history tail is unchanged.
+
+    python benchmarks/prompt_build.py --iterations 100000
+"""
+
+import argparse
+import itertools
+import sys
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.assistant.cli_assistant import SystemPromptTemplate  # noqa: E402
+from src.services.command_history import CommandHistory  # noqa: E402
+
+
+def legacy_system_prompt(shell_name, operating_system, history):
+    """The per-query builder SystemPromptTemplate replaced, kept here as the baseline."""
+    platform_info = {
+        "macos": {"open_command": "open", "browser": "Safari"},
+        "linux": {"open_command": "xdg-open", "browser": "firefox"},
+        "windows": {"open_command": "start", "browser": "Microsoft Edge"}
+    }
+    platform_data = platform_info.get(operating_system, {})
+    history_info = '\n'.join([
+        f"Previous Command: {h['command']}, Success: {h['success']}, Error: {h['error'] or 'None'}"
+        for h in history[-3:]
+    ])
+    return f"""You are an AI assistant that can understand natural language prompts and generate the appropriate shell commands to execute based on the user's request. Your task is to analyze the user's input and determine the best command to execute, then provide the command in a valid JSON format with a "command" key.
+
+Environment Information:
+- Shell: {shell_name}
+- Operating System: {operating_system}
+- Open Command: {platform_data.get("open_command", "unknown")}
+- Default Browser: {platform_data.get("browser", "unknown")}
+
+{history_info}
+
+Please be concise and only provide the necessary command, without any additional explanation or context. Your goal is to provide the most appropriate command for the user's request.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    history = CommandHistory(10)
+    for i in range(10):
+        history.add(f"prompt {i}", f"ls -la /tmp/dir{i}", i % 3 != 0, error=None if i % 3 else "No such file")
+    legacy_history = [{'command': h.command, 'success': h.success, 'error': h.error} for h in history]
+    template = SystemPromptTemplate("zsh", "linux")
+    # Alternate between two tails so every render sees a changed history
+    next_tail = itertools.cycle([history.recent(3), history.recent(2)]).__next__
+
+    results = {
+        "legacy (rebuild everything)": timeit.timeit(
+            lambda: legacy_system_prompt("zsh", "linux", legacy_history), number=args.iterations),
+        "template, new history tail": timeit.timeit(
+            lambda: template.render(next_tail()), number=args.iterations),
+        "template, unchanged tail": timeit.timeit(
+            lambda: template.render(history.recent(3)), number=args.iterations),
+    }
+    for name, seconds in results.items():
+        print(f"{name:30s} {seconds / args.iterations * 1e6:8.2f} us/query")
+    print(f"stable prefix: {len(template.prefix)} chars shared by every request")
+
+
+if __name__ == "__main__":
+    main()
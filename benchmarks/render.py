@@ -0,0 +1,158 @@
+# benchmarks/render.py
+"""Render benchmark: time to render a large (~100 KB) Markdown response.
+
+Compares the old render_markdown (new Theme and Console per call, one Markdown
+over the whole text) with the shared themed console rendering block by block,
+reporting total time and time until the first block is on screen.
+
+With --stream, instead replays a response in small deltas and compares
+re-rendering the whole Markdown on every delta (the old Live loop) with
+StreamingMarkdown, which re-renders only the trailing open block, and
+StreamingMarkdown drawing only every 10th delta, as Live's refresh rate does
+when deltas arrive quickly.
+
+    python benchmarks/render.py --size-kb 100 --runs 5
+    python benchmarks/render.py --stream --size-kb 10 --delta 20
+"""
+
+import argparse
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from rich.console import Console  # noqa: E402
+from rich.live import Live  # noqa: E402
+from rich.markdown import Markdown  # noqa: E402
+from src.config import BRAND_PRIMARY, BRAND_SECONDARY  # noqa: E402
+from src.ui import display  # noqa: E402
+
+SECTION = """## Step {i}: configure the service
+
+Run the following to install the dependencies and check the **version** of each
+tool. Keep `PATH` up to date and see [the docs](https://example.com/docs/{i}).
+
+```bash
+brew install jq ripgrep fd
+export PATH="$HOME/.local/bin:$PATH"
+jq --version && rg --version
+```
+
+1. Open the settings file
+2. Change `timeout` to {i}
+3. Restart the daemon
+
+> Note: restarting drops open connections.
+
+"""
+
+
+class BrandConfig:
+    brand_primary = BRAND_PRIMARY
+    brand_secondary = BRAND_SECONDARY
+
+
+def make_document(size_kb):
+    sections, i = [], 0
+    while sum(map(len, sections)) < size_kb * 1024:
+        sections.append(SECTION.format(i=i))
+        i += 1
+    return "".join(sections)
+
+
+class FirstWrite(io.StringIO):
+    """StringIO that records when the first output arrived."""
+
+    def __init__(self):
+        super().__init__()
+        self.first_write = None
+
+    def write(self, text):
+        if self.first_write is None and text:
+            self.first_write = time.perf_counter()
+        return super().write(text)
+
+
+def legacy_render(text, config, sink):
+    console = Console(theme=display.create_custom_theme(config), file=sink, width=100)
+    console.print(Markdown(text))
+
+
+def measure(render, text, config):
+    sink = FirstWrite()
+    start = time.perf_counter()
+    render(text, config, sink)
+    end = time.perf_counter()
+    return (end - start) * 1000, ((sink.first_write or end) - start) * 1000
+
+
+def legacy_stream(text, deltas, config, sink):
+    console = Console(theme=display.create_custom_theme(config), file=sink, width=100, force_terminal=True)
+    response = ""
+    with Live(Markdown(""), console=console, auto_refresh=False, vertical_overflow="visible") as live:
+        for delta in deltas:
+            response += delta
+            live.update(Markdown(response), refresh=True)
+
+
+def streaming_view(text, deltas, config, sink, every=1):
+    console = Console(theme=display.create_custom_theme(config), file=sink, width=100, force_terminal=True)
+    with display.StreamingMarkdown(console, auto_refresh=False) as view:
+        for i, delta in enumerate(deltas):
+            view.update(delta, refresh=i % every == 0)
+
+
+def streaming_view_throttled(text, deltas, config, sink):
+    # Deltas usually arrive faster than Live's 12 refreshes a second; only every 10th is drawn
+    streaming_view(text, deltas, config, sink, every=10)
+
+
+def stream_benchmark(args, config):
+    text = make_document(args.size_kb)
+    deltas = [text[i:i + args.delta] for i in range(0, len(text), args.delta)]
+    print(f"response: {len(text) / 1024:.0f} KB in {len(deltas)} deltas of {args.delta} chars")
+    for name, render in [("legacy (re-parse all)", legacy_stream), ("StreamingMarkdown", streaming_view),
+                         ("StreamingMarkdown, 1 in 10", streaming_view_throttled)]:
+        runs = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            render(text, deltas, config, io.StringIO())
+            runs.append((time.perf_counter() - start) * 1000)
+        total = statistics.median(runs)
+        print(f"{name:28s} total {total:8.1f} ms   per delta {total / len(deltas):6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kb", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--stream", action="store_true", help="benchmark streamed rendering instead")
+    parser.add_argument("--delta", type=int, default=20, help="characters per streamed delta")
+    args = parser.parse_args()
+
+    if args.stream:
+        stream_benchmark(args, BrandConfig())
+        return
+
+    text = make_document(args.size_kb)
+    config = BrandConfig()
+    shared = display.get_console(config)
+
+    def shared_render(text, config, sink):
+        shared.file = sink
+        display.render_markdown(text, config=config)
+
+    print(f"document: {len(text) / 1024:.0f} KB, {len(display.split_markdown_blocks(text))} blocks")
+    for name, render in [("legacy (per-call console)", legacy_render), ("shared console, blocks", shared_render)]:
+        runs = [measure(render, text, config) for _ in range(args.runs)]
+        total = statistics.median(r[0] for r in runs)
+        first = statistics.median(r[1] for r in runs)
+        print(f"{name:28s} total {total:8.1f} ms   first output {first:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/startup.py
+"""Startup benchmark: time from interpreter start to the main menu being ready.
+
+Runs `import src.main` plus config construction in fresh interpreters with
+`-X importtime`, reports the median and the slowest imports, and exits non-zero
+when the median exceeds the target.
+
+    python benchmarks/startup.py --target-ms 400 --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ["groq", "tavily", "rich", "pydantic", "httpx", "src.assistant.chat",
+                 "src.assistant.search", "src.assistant.cli_assistant"]
+
+STARTUP_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import src.main
+from src.config import Config
+Config()
+elapsed = (time.perf_counter() - start) * 1000
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(f"IN_PROCESS_MS {{elapsed:.1f}}")
+print(f"HEAVY_LOADED {{','.join(loaded)}}")
+"""
+
+
+def run_once():
+    code = STARTUP_SNIPPET.format(heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    values = dict(line.split(" ", 1) for line in result.stdout.splitlines() if line.startswith(("IN_PROCESS_MS", "HEAVY_LOADED")))
+    return wall_ms, float(values["IN_PROCESS_MS"]), values["HEAVY_LOADED"].strip(), result.stderr
+
+
+def slowest_imports(importtime_output, limit=10):
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        rows.append((int(cumulative_us), int(self_us), name))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=400.0, help="maximum median wall time to the menu")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    wall = statistics.median(r[0] for r in runs)
+    in_process = statistics.median(r[1] for r in runs)
+    heavy = runs[-1][2]
+
+    print(f"time-to-menu (wall, median of {args.runs}): {wall:.1f} ms  [target {args.target_ms:.0f} ms]")
+    print(f"imports + config (in process):  {in_process:.1f} ms")
+    print(f"heavy modules loaded at startup: {heavy or 'none'}")
+    print("slowest imports (cumulative / self, ms):")
+    for cumulative_us, self_us, name in slowest_imports(runs[-1][3]):
+        print(f"  {cumulative_us / 1000:8.1f} {self_us / 1000:8.1f}  {name}")
+
+    if wall > args.target_ms or heavy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,19 @@
 
 print("Debug: Entering src/assistant/__init__.py")
 
-from .chat import chat_mode
-from .cli_assistant import cli_assistant_mode
+__all__ = ['chat_mode', 'cli_assistant_mode', 'history_mode']
 
-__all__ = ['chat_mode', 'cli_assistant_mode']
+def __getattr__(name):
+    # Mode modules pull in the Groq/Tavily SDKs and Rich, so only import them on first use
+    if name == 'chat_mode':
+        from .chat import chat_mode
+        return chat_mode
+    if name == 'cli_assistant_mode':
+        from .cli_assistant import cli_assistant_mode
+        return cli_assistant_mode
+    if name == 'history_mode':
+        from .history import history_mode
+        return history_mode
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 print("Debug: Finished src/assistant/__init__.py")
\ No newline at end of file
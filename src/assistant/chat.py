@@ -1,123 +1,100 @@
 # src/assistant/chat.py
 
-from src.services.groq_api import GroqService
-from src.ui.display import render_markdown
+from src.services.clients import get_client_registry
+from src.services.context_window import ContextWindow
+from src.ui.display import render_markdown, get_console, StreamingMarkdown
 from src.config import load_config
-from dotenv import load_dotenv
-from rich.console import Console
-from rich.markdown import Markdown
+from src.models.models import ChatMessage
 from rich.text import Text
 import os
 
-# Load environment variables
-load_dotenv()
-
-def load_or_create_env():
+def load_or_create_env(config):
     """Load or create environment variables."""
     if not os.path.exists('.env'):
         with open('.env', 'w') as file:
             for key, value in config.DEFAULT_SETTINGS.items():
                 file.write(f"{key}={value}\n")
-    load_dotenv()
-
-<<<<<<< HEAD
-def get_groq_response(groq_service, input_text, history, DEFAULT_SETTINGS):
-    """Get the GROQ response."""
-    groq_model = os.getenv("GROQ_MODEL", DEFAULT_SETTINGS["GROQ_MODEL"])
-    max_tokens = int(os.getenv("MAX_TOKENS", DEFAULT_SETTINGS["MAX_TOKENS"]))
-    temperature = float(os.getenv("TEMPERATURE", DEFAULT_SETTINGS["TEMPERATURE"]))
-    top_p = float(os.getenv("TOP_P", DEFAULT_SETTINGS["TOP_P"]))
-    system_prompt = os.getenv("SYSTEM_PROMPT", DEFAULT_SETTINGS["SYSTEM_PROMPT"])
-=======
-def get_formatted_model_name(config):
-    if "llama3-8b" in config.groq_model:
+    config.refresh()
+
+def get_formatted_model_name(config, model=None):
+    model = model or config.groq_model
+    if "llama3-8b" in model:
         model_emoji = "🦙8B"
-    elif "llama3-70b" in config.groq_model:
+    elif "llama3-70b" in model:
         model_emoji = "🦙70B"
-    elif "mixtral" in config.groq_model:
+    elif "mixtral" in model:
         model_emoji = "🌀"
-    elif "gemma" in config.groq_model:
+    elif "gemma" in model:
         model_emoji = "💎"
     else:
         model_emoji = "🤖"
     
-    return f"{model_emoji} {config.groq_model}"
+    return f"{model_emoji} {model}"
+
+def build_messages(input_text, history, config):
+    config.refresh()  # Picks up edits to .env or system_prompts.json; a stat per file otherwise
+    return history.messages(config.system_prompt, input_text)
+
+def summarize_history(groq_service, summary, messages):
+    """Fold evicted turns into the running conversation summary."""
+    transcript = "\n".join(f"{msg.role}: {msg.content}" for msg in messages)
+    prompt = (
+        "Update the summary of this conversation in under 200 words, keeping facts, decisions and open questions.\n\n"
+        f"Current summary: {summary or '(none)'}\n\nNew turns:\n{transcript}"
+    )
+    return groq_service.generate_response([ChatMessage(role="user", content=prompt)], task="summarize")
 
 def get_groq_response(groq_service, input_text, history, config):
-    config.load_system_prompts()  # Refresh prompts before each interaction
-    messages = []
-    if config.system_prompt:
-        messages.append(ChatMessage(role="system", content=config.system_prompt))
-    messages.extend([ChatMessage(role=msg["role"], content=msg["content"]) for msg in history])
-    messages.append(ChatMessage(role="user", content=input_text))
->>>>>>> c099e0e (chaosINorder)
-
-    body = {
-        "model": groq_model,
-        "messages": history + [{"role": "user", "content": input_text}],
-        "max_tokens": max_tokens,
-        "temperature": temperature,
-        "top_p": top_p
-    }
-    if system_prompt:
-        body["messages"].insert(0, {"role": "system", "content": system_prompt})
-
-<<<<<<< HEAD
-    response = groq_service.post("/chat/completions", json=body)
-    response.raise_for_status()
-    return response.json()['choices'][0]['message']['content']
-
-=======
->>>>>>> c099e0e (chaosINorder)
+    return groq_service.generate_response(build_messages(input_text, history, config))
+
+def stream_groq_response(groq_service, input_text, history, config, console):
+    """Render the response incrementally as deltas arrive and return the full text."""
+    deltas = groq_service.stream_response(build_messages(input_text, history, config))
+    # Titled with the model the router picked, which may differ from GROQ_MODEL
+    model_name = get_formatted_model_name(config, groq_service.last_metrics.model_name)
+    header = Text.from_markup(f"[bold cyan]{model_name}:[/bold cyan]")
+    with StreamingMarkdown(console, header) as view:
+        for delta in deltas:
+            view.update(delta)
+    return view.text
+
+def print_stream_metrics(console, metrics):
+    """Print time-to-first-token and throughput for the last streamed turn."""
+    if metrics is None:
+        return
+    ttft = f"{metrics.ttft:.2f}s" if metrics.ttft is not None else "n/a"
+    console.print(
+        f"TTFT: {ttft}  |  {metrics.completion_tokens} tokens in {metrics.total_time:.2f}s  "
+        f"|  {metrics.tokens_per_second:.1f} tokens/s",
+        style="dim"
+    )
+
 def chat_mode(config, console):
     """Initiates the chat mode with configuration and console support."""
-    load_or_create_env()
-    # Utilize config for environment variables if needed
-    groq_service = GroqService()
+    load_or_create_env(config)
 
-<<<<<<< HEAD
-=======
     try:
-        groq_service = GroqService()
+        groq_service = get_client_registry(config).groq_service
     except Exception as e:
         console.print(f"Error initializing GroqService: {str(e)}", style="bold red")
         return
 
->>>>>>> c099e0e (chaosINorder)
-    history = []
+    summarizer = None
+    if config.context_summarize:
+        summarizer = lambda summary, messages: summarize_history(groq_service, summary, messages)
+    history = ContextWindow(config, summarizer=summarizer)
+    session_store = get_client_registry(config).session_store
 
     display_banner(console, config)
 
     while True:
-<<<<<<< HEAD
-        questions = [
-            inquirer.Text('message', message="Enter your message (or type 'exit' to quit): ")
-        ]
-        answers = inquirer.prompt(questions)
-        input_text = answers['message']
-        
-        if input_text.lower() == 'exit':
-            break
-
-        response = get_groq_response(groq_service, input_text, history, config.DEFAULT_SETTINGS)
-        console.print("Response:", style="bold green")
-        render_markdown(response, console)
-        history.append({"role": "user", "content": input_text})
-        history.append({"role": "assistant", "content": response})
-
-if __name__ != "__main__":
-    # This block ensures that the chat loop doesn't start automatically when importing chat.py
-    pass
-else:
-    config = load_config()  # Assuming load_config() is defined in src.config
-=======
         user_input = console.input("[bold magenta]YOU:[/bold magenta] ")
 
         if user_input.lower() in ['/quit', '/back']:
             break
         elif user_input.lower() == '/save':
             if history:
-                save_last_response(history[-1]["content"])
+                save_last_response(history.last_message().content)
                 console.print("Last response saved.", style="bold green")
             else:
                 console.print("No response to save yet.", style="bold yellow")
@@ -128,14 +105,15 @@ else:
         console.print()  # Add an empty line for better readability
 
         try:
-            response = get_groq_response(groq_service, user_input, history, config)
-            model_name = get_formatted_model_name(config)
-            console.print(f"[bold cyan]{model_name}:[/bold cyan] [#00FF00]{response}[/#00FF00]")
+            response = stream_groq_response(groq_service, user_input, history, config, console)
+            print_stream_metrics(console, groq_service.last_metrics)
             console.print()  # Add an empty line for better readability
             console.print("-" * 40, style="dim")  # Add a subtle separator line
             console.print()  # Add another empty line after the separator
-            history.append({"role": "user", "content": user_input})
-            history.append({"role": "assistant", "content": response})
+            history.add("user", user_input)
+            history.add("assistant", response)
+            if session_store is not None:
+                session_store.add_chat_turn(user_input, response)
         except Exception as e:
             console.print(f"An error occurred: {str(e)}", style="bold red")
 
@@ -144,6 +122,8 @@ else:
 def display_banner(console, config):
     """Display a banner with model settings and tips."""
     model_name = get_formatted_model_name(config)
+    if config.get('model_routing', False) and config.get('model_routing_chat', False):
+        model_name += " [dim](auto-routed by prompt size and latency)[/dim]"
     model_settings = (
         f"[bold underline #00FFFF]SETTINGS:[/bold underline #00FFFF] "
         f"  {model_name}   "
@@ -170,6 +150,5 @@ def save_last_response(response):
 
 if __name__ == "__main__":
     config = load_config()
->>>>>>> c099e0e (chaosINorder)
-    console = Console()
+    console = get_console(config)
     chat_mode(config, console)
\ No newline at end of file
@@ -1,19 +1,20 @@
 import os
-import shlex
-import subprocess
 import traceback
 import json
 import platform
 import logging
+from functools import lru_cache
 import inquirer
 from pathlib import Path
-from dotenv import load_dotenv
-from groq import Client, Groq
-from src.main import cheat_sheet_menu
 # Import your custom modules
-from src.services.file_service import CheatSheet, write_json_file
-from src.services.groq_api import Groq#Service
-from src.services.tavily_api import TavilyService
+from src.services.file_service import CheatSheet, get_command_history_file
+from src.services.clients import get_client_registry
+from src.services.tokens import measure_prompt
+from src.services.command_runner import run_command
+from src.services.command_history import CommandHistory
+from src.services.cheat_sheet_index import CheatSheetIndex
+from src.services.path_index import get_path_index
+from src.services.command_validator import validate_commands, order_candidates
 from src.ui.display import (
     print_welcome_message, print_command_output, print_error_message,
     print_command_history, print_help_message, print_code_snippet
@@ -22,27 +23,53 @@ from src.ui.prompts import (
     get_user_input, get_choice, get_confirmation,
     get_multiple_choices, get_form_input
 )
-from src.assistant.chat import chat_mode
-from src.assistant.search import search_mode
 from src.assistant.system_info import SystemInfo
-from src.config import load_config
 print("Debug: Entering src/assistant/cli_assistant.py")
-# Setup logging
-logging.basicConfig(filename='assistant.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Initialize SystemInfo
-system_info = SystemInfo()
+# Created by init_cli_assistant() the first time the mode is entered
+system_info = None
 
-# Initialize the cheat sheet if it doesn't exist
-write_json_file(Path.home() / ".croqli_cheatsheet.json")
-
-# Initialize an empty list to keep the history of commands and their contexts
-command_history = []
+# Ring buffer of recent commands and their contexts, resized from config by init_cli_assistant()
 COMMAND_HISTORY_LENGTH = 10
+command_history = CommandHistory(COMMAND_HISTORY_LENGTH)
+# Persistent history on disk (config.command_history_path), opened by init_cli_assistant()
+history_file = None
+# Searchable store of past sessions from the client registry; None when disabled
+session_store = None
+# Picks the model for each command translation; from the client registry
+model_router = None
+
+# Execution limits, set from config by init_cli_assistant()
+COMMAND_TIMEOUT = None
+COMMAND_MAX_OUTPUT_BYTES = 1_000_000
+
+
+def init_cli_assistant(config):
+    """One-time setup for CLI Assistant mode: logging, the cheat sheet file, SystemInfo and its inventory thread."""
+    global system_info, history_file, session_store, model_router, COMMAND_TIMEOUT, COMMAND_MAX_OUTPUT_BYTES
+    if system_info is not None:
+        return
+    COMMAND_TIMEOUT = config.command_timeout or None
+    COMMAND_MAX_OUTPUT_BYTES = config.command_max_output_bytes
+    command_history.resize(config.command_history_length)
+    history_file = get_command_history_file(config.command_history_path)
+    session_store = get_client_registry(config).session_store
+    model_router = get_client_registry(config).model_router
+    logging.basicConfig(filename=str(config.log_file), level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Initialize the cheat sheet if it doesn't exist
+    if not config.cheat_sheet_path.exists():
+        cheat_sheet = CheatSheet(config.cheat_sheet_path)
+        cheat_sheet.save()
+        cheat_sheet.flush()
+    system_info = SystemInfo(
+        config.cheat_sheet_path, cheat_sheet=getattr(config, 'cheat_sheet', None), inventory_ttls=config.inventory_ttls
+    )
+    if config.inventory_enabled:
+        system_info.collect_system_info()
 
-
-
-# Detect shell and operating system
+# Detect shell and operating system; neither changes while the process runs
+@lru_cache(maxsize=None)
 def detect_shell_and_os():
     """Detect the current shell and operating system."""
     # Detect the shell
@@ -60,7 +87,7 @@ def handle_cheat_sheet_action(config, choice):
     elif choice == 'Edit (manually)':
         config.cheat_sheet.edit_manually()
     elif choice == 'Edit (AI-assisted)':
-        config.cheat_sheet.edit_ai_assisted(config.groq_service.generate_response)
+        config.cheat_sheet.edit_ai_assisted(get_client_registry(config).groq_service.generate_response)
     elif choice == 'Update (auto-run)':
         config.cheat_sheet.update_auto_run(config)
     elif choice == 'Add categories':
@@ -69,19 +96,29 @@ def handle_cheat_sheet_action(config, choice):
         ])['category']
         config.cheat_sheet.add_category(category_name)
 
+# Shells that take `-n -c` for a syntax check and `-c` to run, with POSIX-style command syntax
+POSIX_SHELLS = {"sh", "bash", "zsh", "ksh", "dash"}
+
+@lru_cache(maxsize=None)
+def command_shell():
+    """The shell commands are validated and run with: the user's $SHELL if it is POSIX-like, else bash or sh."""
+    shell = os.getenv('SHELL', '')
+    if os.path.basename(shell) in POSIX_SHELLS and get_path_index().is_installed(shell):
+        return shell
+    return get_path_index().which('bash') or '/bin/sh'
+
 def execute_command(command):
-    """Execute a shell command and return the output and exit code."""
+    """Execute a shell command, streaming its output as it arrives, and return the output and exit code."""
     try:
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
-        stdout, stderr = process.communicate()
-        exit_code = process.wait()
-        return stdout.decode().strip(), stderr.decode().strip(), exit_code
+        return run_command(
+            command, timeout=COMMAND_TIMEOUT, max_output_bytes=COMMAND_MAX_OUTPUT_BYTES, shell=command_shell()
+        )
     except Exception as e:
         return "", str(e), 1
 
 def check_program_installed(program: str) -> bool:
     """Check if a particular program is installed and available."""
-    return subprocess.call(['which', program], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) == 0
+    return get_path_index().is_installed(program)
 
 def provide_helpful_tips(command: str, stderr: str) -> str:
     """Provide tips or suggestions when a command fails."""
@@ -93,16 +130,12 @@ def provide_helpful_tips(command: str, stderr: str) -> str:
     return stderr
 
 def update_command_history(user_prompt, command, success, output=None, error=None):
-    command_history.append({
-            'user_prompt': user_prompt,
-        'command': command,
-        'success': success,
-        'output': output,
-        'error': error
-    })
-    # Keep only the last N commands in memory to avoid unbounded growth
-    if len(command_history) > COMMAND_HISTORY_LENGTH:
-        command_history.pop(0)
+    # The ring buffer evicts the oldest entry itself once it is full
+    command_history.add(user_prompt, command, success, output, error)
+    if history_file is not None:
+        history_file.append(command, "Success" if success else f"Error: {error}")
+    if session_store is not None:
+        session_store.add_command(user_prompt, command, success, output, error)
 
     log_command(user_prompt, command, success, output, error)
 
@@ -111,59 +144,154 @@ def log_command(user_prompt, command, success, output=None, error=None):
     result = "Success" if success else "Error"
     logging.info(f"User Prompt: {user_prompt}, Command: {command}, Result: {result}, Output: {output}, Error: {error}")
 
-def generate_system_prompt(shell_name, operating_system):
-    """Generate the system prompt, incorporating command history and environment information."""
-    platform_info = {
-            "macos": {
-                "open_command": "open",
-            "browser": "Safari"
-        },
-        "linux": {
-                "open_command": "xdg-open",
-            "browser": "firefox"
-        },
-        "windows": {
-                "open_command": "start",
-            "browser": "Microsoft Edge"
-        }
+PLATFORM_INFO = {
+    "macos": {
+        "open_command": "open",
+        "browser": "Safari"
+    },
+    "linux": {
+        "open_command": "xdg-open",
+        "browser": "firefox"
+    },
+    "windows": {
+        "open_command": "start",
+        "browser": "Microsoft Edge"
     }
+}
+# platform.system() reports macOS as "darwin"
+PLATFORM_ALIASES = {"darwin": "macos"}
+PROMPT_HISTORY_LENGTH = 3
+# Tools worth telling the model about when they are installed
+NOTABLE_TOOLS = (
+    "brew", "apt", "dnf", "pacman", "git", "docker", "kubectl", "python3", "node", "npm",
+    "rg", "fd", "jq", "fzf", "curl", "wget", "ffmpeg", "convert", "rsync", "tmux",
+)
 
-    platform_data = platform_info.get(operating_system, {})
-    history_info = '\n'.join([
-            f"Previous Command: {h['command']}, Success: {h['success']}, Error: {h['error'] or 'None'}"
-        for h in command_history[-3:]
-    ])  # Last 3 commands
 
-    system_prompt = f"""You are an AI assistant that can understand natural language prompts and generate the appropriate shell commands to execute based on the user's request. Your task is to analyze the user's input and determine the best command to execute, then provide the command in a valid JSON format with a "command" key.
+class SystemPromptTemplate:
+    """CLI Assistant system prompt with the environment section rendered once per session.
+
+    Everything that does not change between queries is kept in `prefix`, ahead of
+    the command history tail, so the start of every request is byte-identical and
+    providers that cache prompt prefixes can reuse it. `render` only formats the
+    history lines, and returns the previous string when the tail has not changed.
+    """
+
+    def __init__(self, shell_name, operating_system, candidates=1, installed_tools=()):
+        if candidates > 1:
+            answer_format = f'provide {candidates} alternative commands, best first, in a valid JSON format with a "commands" key holding a list of strings'
+        else:
+            answer_format = 'provide the command in a valid JSON format with a "command" key'
+        platform_data = PLATFORM_INFO.get(PLATFORM_ALIASES.get(operating_system, operating_system), {})
+        self.prefix = f"""You are an AI assistant that can understand natural language prompts and generate the appropriate shell commands to execute based on the user's request. Your task is to analyze the user's input and determine the best command to execute, then {answer_format}.
 
 Environment Information:
 - Shell: {shell_name}
 - Operating System: {operating_system}
 - Open Command: {platform_data.get("open_command", "unknown")}
 - Default Browser: {platform_data.get("browser", "unknown")}
-
-{history_info}
+- Installed Tools: {", ".join(installed_tools) or "unknown"}
 
 Please be concise and only provide the necessary command, without any additional explanation or context. Your goal is to provide the most appropriate command for the user's request.
 """
-    return system_prompt
-
-def handle_error_and_retry(user_prompt, error_message, shell_name, operating_system):
-    """Handle errors by requesting a new command based on the error message."""
-    retry_prompt = f"The last command failed with the following error: {error_message}. Please modify the command to fix the error."
-    system_prompt = generate_system_prompt(shell_name, operating_system)
-    chat_completion = Client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-            {"role": "user", "content": retry_prompt}
+        self._history_key = None
+        self._rendered = self.prefix
+
+    def render(self, history=()):
+        history_key = tuple(h.id for h in history)
+        if history_key != self._history_key:
+            history_info = '\n'.join(
+                f"Previous Command: {h.command}, Success: {h.success}, Error: {h.error or 'None'}"
+                for h in history
+            )
+            self._rendered = f"{self.prefix}\n{history_info}\n" if history_info else self.prefix
+            self._history_key = history_key
+        return self._rendered
+
+
+@lru_cache(maxsize=None)
+def get_system_prompt_template(shell_name, operating_system, candidates=1):
+    installed_tools = get_path_index().installed(NOTABLE_TOOLS)
+    return SystemPromptTemplate(shell_name, operating_system, candidates, installed_tools)
+
+def generate_system_prompt(shell_name, operating_system, candidates=1):
+    """Generate the system prompt, incorporating command history and environment information."""
+    template = get_system_prompt_template(shell_name, operating_system, candidates)
+    return template.render(command_history.recent(PROMPT_HISTORY_LENGTH))
+
+def parse_commands(response_json):
+    """Candidate commands from a model answer with either a "commands" list or a single "command"."""
+    command_dict = json.loads(response_json)
+    commands = command_dict.get('commands') or command_dict['command']
+    if isinstance(commands, str):
+        commands = [commands]
+    commands = list(dict.fromkeys(c.strip() for c in commands if isinstance(c, str) and c.strip()))
+    if not commands:
+        raise ValueError("The response did not contain a command.")
+    return commands
+
+def run_candidates(user_prompt, commands):
+    """Run the best candidate command.
+
+    With several candidates they are validated locally in parallel (programs on
+    PATH, syntax under the shell that will run them), and the model's best valid
+    choice is run, so a broken first choice falls through to the next without
+    another LLM round trip. Only one command ever runs: a runtime failure is
+    not retried with the other candidates, as they may have side effects too.
+    If none validates, the model's first choice is run to surface the real error.
+    Returns (success, command, helpful tips for a failure).
+    """
+    command = commands[0]
+    if len(commands) > 1:
+        candidates = order_candidates(validate_commands(commands, shell=command_shell()))
+        for candidate in candidates:
+            if not candidate.valid:
+                logging.info(f"Skipping candidate {candidate.command!r}: "
+                             f"{candidate.syntax_error or 'missing ' + ', '.join(candidate.missing_programs)}")
+        if candidates[0].valid:
+            command = candidates[0].command
+
+    print(f"Running command [{command}] ...")
+    stdout, stderr, exit_code = execute_command(command)
+    if exit_code == 0:
+        update_command_history(user_prompt, command, True, stdout)
+        return True, command, None
+    helpful_tips = provide_helpful_tips(command, stderr)
+    update_command_history(user_prompt, command, False, error=helpful_tips)
+    print("Error executing command:")
+    print(helpful_tips)
+    return False, command, helpful_tips
+
+def command_request(system_prompt, user_content):
+    """A JSON command-translation request, on the model the router picks for it (max_tokens clamped to fit)."""
+    request = dict(
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
         ],
-        model="mixtral-8x7b-32768",
+        model=model_router.config.groq_model,
         temperature=0.1,
         max_tokens=32768,
         response_format={"type": "json_object"}
     )
+    return model_router.route("command", request)
+
+def command_cache_key(shell_name, operating_system, candidates, user_input):
+    """Completion cache key for a query: the stable prompt prefix, configured model and the query.
+
+    The history tail, cheat sheet context and routed model change from one query
+    to the next, so keying on the full request would make repeats miss.
+    """
+    template = get_system_prompt_template(shell_name, operating_system, candidates)
+    return dict(prompt=template.prefix, model=model_router.config.groq_model, query=user_input)
+
+def handle_error_and_retry(backend, completion_cache, user_prompt, error_message, shell_name, operating_system):
+    """Handle errors by requesting a new command based on the error message."""
+    retry_prompt = f"The last command failed with the following error: {error_message}. Please modify the command to fix the error."
+    system_prompt = generate_system_prompt(shell_name, operating_system)
+    request = command_request(system_prompt, retry_prompt)
+    response_json = completion_cache.complete(backend, **request)
 
-    response_json = chat_completion.choices[0].message.content
     try:
         command_dict = json.loads(response_json)
         command = command_dict['command']
@@ -173,14 +301,14 @@ def handle_error_and_retry(user_prompt, error_message, shell_name, operating_sys
         if exit_code == 0:
             update_command_history(user_prompt, command, True, stdout)
             print("Command executed successfully.")
-            print("Command output:")
-            print(stdout)
         else:
+            completion_cache.invalidate(request)
             helpful_tips = provide_helpful_tips(command, stderr)
             update_command_history(user_prompt, command, False, error=helpful_tips)
             print("Error executing command:")
             print(helpful_tips)
     except json.JSONDecodeError as e:
+        completion_cache.invalidate(request)
         print(f"Error parsing response as JSON: {e}")
         print(f"Response JSON: {response_json}")
         print("Tip: Please ensure your input is clear, or try simplifying your request.")
@@ -191,7 +319,10 @@ def handle_error_and_retry(user_prompt, error_message, shell_name, operating_sys
 
 def suggest_similar_commands(user_prompt):
     """Suggest similar commands based on previous commands."""
-    suggestions = [h['command'] for h in command_history if user_prompt.lower() in h['user_prompt'].lower()]
+    suggestions = [h.command for h in command_history.search_prompts(user_prompt)]
+    if session_store is not None:
+        # Past sessions fill in after this session's matches
+        suggestions += [c for c in session_store.similar_commands(user_prompt) if c not in suggestions]
     if suggestions:
         print("Did you mean one of these commands?")
         for i, suggestion in enumerate(suggestions, 1):
@@ -213,16 +344,6 @@ def suggest_similar_commands(user_prompt):
         #print("Unknown command. Try /add followed by the question.")
 
 
-# Activate the virtual environment
-venv_path = '/Users/Shared/Relocated Items/Docs_dump/visual studio code projects/CLI_assistant/my_env'
-activate_script = os.path.join(venv_path, 'bin', 'activate')
-activate_script = shlex.quote(activate_script)
-subprocess.run(f'source {activate_script}', shell=True, check=True)
-
-# Load environment variables
-#env_path = Path('/Users/Shared/Relocated Items/Docs_dump/visual studio code projects/CLI_assistant/.env')
-#load_dotenv(dotenv_path=env_path)
-
 # src/assistant/cli_assistant.py
 
 def cli_assistant_mode(config, console):
@@ -231,16 +352,21 @@ def cli_assistant_mode(config, console):
     This is the main entry point for the "CLI Assistant" mode.
     """
     try:
-        load_dotenv() 
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
+        if not config.groq_api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables.")
 
-        client = Groq(api_key=api_key)
+        init_cli_assistant(config)
 
-        shell_name, operating_system = detect_shell_and_os()
-        cheat_sheet = CheatSheet(config.cheat_sheet_path)
+        clients = get_client_registry(config)
+        backend = clients.llm_backend
+        completion_cache = clients.completion_cache
 
+        shell_name, operating_system = detect_shell_and_os()
+        # The same CheatSheet the background inventory collector updates
+        cheat_sheet = system_info.cheat_sheet
+        cheat_sheet_index = CheatSheetIndex(
+            cheat_sheet, top_k=config.cheat_sheet_top_k, max_tokens=config.cheat_sheet_context_tokens
+        )
 
         while True:
             user_input = input("Query:> ")
@@ -248,51 +374,39 @@ def cli_assistant_mode(config, console):
             if user_input.lower().strip() in ['exit', 'quit', '/menu']:
                 break
             elif user_input == "/cheat_sheet":
+                from src.main import cheat_sheet_menu
                 cheat_sheet_menu(config)
+                continue
             #elif user_input.startswith("/add"):
                 #handle_add_command(user_input, cheat_sheet)
             else:
                 # Process other commands or queries as usual
                 suggest_similar_commands(user_input)
 
-                system_prompt = generate_system_prompt(shell_name, operating_system)
-                cheat_sheet_context = cheat_sheet.get_context()
-                
-                # Include cheat sheet context in the system prompt
-                system_prompt += f"\n\nCheat Sheet Context: {json.dumps(cheat_sheet_context)}"
-
-                chat_completion = client.chat.completions.create(
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_input}
-                    ],
-                    model="mixtral-8x7b-32768",
-                    temperature=0.1,
-                    max_tokens=32768,
-                    response_format={"type": "json_object"}
-                )
-
-            response_json = chat_completion.choices[0].message.content
+                system_prompt = generate_system_prompt(shell_name, operating_system, config.cli_command_candidates)
+                cheat_sheet.refresh()  # other sessions may have saved to the sheet
+                # Only the cheat sheet entries relevant to this query, within the token budget
+                cheat_sheet_context = cheat_sheet_index.context(user_input)
+                usage = measure_prompt(system_prompt, cheat_sheet_context)
+                logging.info(f"Prompt tokens: system={usage.system_prompt}, cheat_sheet={usage.cheat_sheet}, total={usage.total}")
+                system_prompt += f"\n\nCheat Sheet Context:\n{cheat_sheet_context}"
+
+                request = command_request(system_prompt, user_input)
+                cache_key = command_cache_key(shell_name, operating_system, config.cli_command_candidates, user_input)
+                response_json = completion_cache.complete(backend, cache_key=cache_key, **request)
 
             try:
-                command_dict = json.loads(response_json)
-                command = command_dict['command']
-                print(f"Running command [{command}] ...")
-                stdout, stderr, exit_code = execute_command(command)
-
-                if exit_code == 0:
-                    cheat_sheet.data["installed_apps"]["python"] = platform.python_version(), cheat_sheet.save()
-                    update_command_history(user_input, command, True, stdout)
+                success, command, helpful_tips = run_candidates(user_input, parse_commands(response_json))
+
+                if success:
+                    # A no-op once the version is recorded, so the cheat sheet index stays cached
+                    cheat_sheet.update({"python": platform.python_version()}, "installed_apps")
                     print("Command executed successfully.")
-                    print("Command output:")
-                    print(stdout)
                 else:
-                    helpful_tips = provide_helpful_tips(command, stderr)
-                    update_command_history(user_input, command, False, error=helpful_tips)
-                    print("Error executing command:")
-                    print(helpful_tips)
-                    handle_error_and_retry(user_input, helpful_tips, shell_name, operating_system)
+                    completion_cache.invalidate(request, cache_key)
+                    handle_error_and_retry(backend, completion_cache, user_input, helpful_tips, shell_name, operating_system)
             except json.JSONDecodeError as e:
+                completion_cache.invalidate(request, cache_key)
                 print(f"Error parsing response as JSON: {e}")
                 print(f"Response JSON: {response_json}")
                 print("Tip: Please ensure your input is clear, or try simplifying your request.")
@@ -0,0 +1,62 @@
+# src/assistant/history.py
+
+from datetime import datetime
+from rich.table import Table
+from rich.text import Text
+from src.services.clients import get_client_registry
+from src.services.session_store import MATCH_START, MATCH_END
+from src.ui.prompts import prompt_user_input
+
+KIND_FILTERS = {'/commands': 'command', '/chats': 'chat', '/searches': 'search'}
+
+
+def highlight_matches(snippet):
+    """Snippet as Rich Text, with the terms between the match markers styled instead of parsed as markup."""
+    text = Text()
+    for i, part in enumerate(snippet.replace(MATCH_END, MATCH_START).split(MATCH_START)):
+        text.append(part, style="bold yellow" if i % 2 else "")
+    return text
+
+
+def print_session_entries(console, entries):
+    table = Table(title="Past Sessions", show_lines=True)
+    table.add_column("When", style="dim", no_wrap=True)
+    table.add_column("Type", style="cyan")
+    table.add_column("Prompt / Query", style="bold")
+    table.add_column("Match")
+    for entry in entries:
+        when = datetime.fromtimestamp(entry.created_at).strftime("%Y-%m-%d %H:%M")
+        # Titles and bodies are arbitrary text (e.g. "[/INST]"), so none of it goes through markup
+        match = highlight_matches(entry.snippet) if entry.snippet else Text(entry.body[:200])
+        table.add_row(when, entry.kind, Text(entry.title), match)
+    console.print(table)
+
+
+def history_mode(config, console):
+    """Full-text search over past CLI commands, chat exchanges and searches."""
+    session_store = get_client_registry(config).session_store
+    if session_store is None:
+        console.print("Session history is disabled (SESSION_STORE_ENABLED=false).", style="bold yellow")
+        return
+
+    console.print(
+        "Search your past sessions. Prefix a query with /commands, /chats or /searches to filter, "
+        "or type '/menu' to return to the main menu.", style="bold blue"
+    )
+    while True:
+        query = prompt_user_input("History").strip()
+        if query.lower() in ['/menu', '/back', 'exit']:
+            return
+        if not query:
+            continue
+
+        kind = None
+        first, _, rest = query.partition(" ")
+        if first.lower() in KIND_FILTERS:
+            kind, query = KIND_FILTERS[first.lower()], rest
+
+        entries = session_store.search(query, kind=kind) if query.strip() else session_store.recent(kind)
+        if entries:
+            print_session_entries(console, entries)
+        else:
+            console.print("No matching history.", style="bold yellow")
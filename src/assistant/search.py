@@ -1,41 +1,27 @@
 # src/assistant/search.py
 
-from src.services.tavily_api import TavilyService
+from src.services.clients import get_client_registry
+from src.services.search_engine import AsyncSearchEngine
 from src.ui.display import render_markdown
 from src.config import load_config
 from src.ui.prompts import prompt_user_input
-from groq import Groq
 
 class SearchModule:
     def __init__(self, config):
         self.config = config
-        self.tavily_service = TavilyService()
-        self.groq_client = Groq(api_key=self.config.get('groq_api_key'))
-
-    def fetch_and_process_tavily(self, query):
-        """Fetch and process data from Tavily."""
-        return self.tavily_service.perform_search(query).context
-
-    def summarize_search_results(self, context):
-        """Summarize the search results using the LLM."""
-        prompt = f"Summarize the following information: {context}"
-        summary = self.groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model=self.config.get('groq_model'),
-            max_tokens=self.config.get('max_tokens'),
-            temperature=self.config.get('temperature'),
-            top_p=self.config.get('top_p')
-        ).choices[0].message.content
-        return summary
+        clients = get_client_registry(config)
+        self.engine = AsyncSearchEngine(config, clients)
+        self.session_store = clients.session_store
 
     def search(self, query):
         """Perform a search and return summarized results."""
         try:
-            context = self.fetch_and_process_tavily(query)
-            summary = self.summarize_search_results(context)
-            return summary
+            result = self.engine.search(query)
         except Exception as e:
             return f"An error occurred during the search: {str(e)}"
+        if self.session_store is not None:
+            self.session_store.add_search(query, result)
+        return result
 
 def search_mode(config, console):
     print("Debug: Entering search mode")
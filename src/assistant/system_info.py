@@ -2,78 +2,69 @@
 
 import sys
 import json
-import platform
-import subprocess
 from pathlib import Path
 from src.services.file_service import CheatSheet
+from src.services.path_index import get_path_index
+from src.services.inventory import InventoryCollector
 
 
 
 
 class SystemInfo:
-    def __init__(self):
-        self.cheat_sheet = CheatSheet(Path.home / '.croqli_cheatsheet.json')  # Correct instantiation
+    def __init__(self, cheat_sheet_path=None, cheat_sheet=None, inventory_ttls=None):
+        # Share the caller's CheatSheet when given, so background updates and the prompt loop see one copy
+        self.cheat_sheet = cheat_sheet or CheatSheet(cheat_sheet_path or Path.home() / '.croqli_cheatsheet.json')
+        self.inventory = InventoryCollector(self.cheat_sheet, ttls=inventory_ttls)
 
     def load_cheat_sheet(self):
         return self.cheat_sheet.data
        
 
     def save_cheat_sheet(self, cheat_sheet_data):
-        self.cheat_sheet.data = cheat_sheet_data
-        self.cheat_sheet.save()
+        self.cheat_sheet.replace(cheat_sheet_data)
 
     def check_brew_installed(self):
-        return subprocess.call(['which', 'brew'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) == 0
+        return get_path_index().is_installed('brew')
 
     def update_cheat_sheet(self, key, value):
-        self.cheat_sheet.data[key] = value
-        self.save_cheat_sheet(self.cheat_sheet.data)
+        self.cheat_sheet.update({key: value})
 
     def get_cheat_sheet_value(self, key):
         return self.cheat_sheet.data.get(key)
 
     def add_favorite_directory(self, directory):
-        favorites = self.get_cheat_sheet_value("favorite_directories")
+        favorites = self.get_cheat_sheet_value("favorite_directories") or []
         if directory not in favorites:
-            favorites.append(directory)
-            self.cheat_sheet.data["favorite_directories"] = favorites
-            self.cheat_sheet.save()
+            self.update_cheat_sheet("favorite_directories", favorites + [directory])
 
     def remove_favorite_directory(self, directory):
-        favorites = self.get_cheat_sheet_value("favorite_directories")
+        favorites = self.get_cheat_sheet_value("favorite_directories") or []
         if directory in favorites:
-            favorites.remove(directory)
-            self.update_cheat_sheet["favorite_directories"] = favorites
-            self.cheat_sheet.save()
+            self.update_cheat_sheet("favorite_directories", [d for d in favorites if d != directory])
 
    
     def collect_system_info(self):
-        # This method can be expanded to collect more system information
-        self.cheat_sheet.data["os"], platform.system()
-        self.cheat_sheet.data["python_path"], sys.executable
-        self.cheat_sheet.data["brew_installed"], self.check_brew_installed()
-        self.cheat_sheet.data["system_info_collected"], True
-        self.cheat_sheet.save()
+        """Start refreshing OS, shell and package inventories in the background."""
+        self.cheat_sheet.update({
+            "python_path": sys.executable,
+            "brew_installed": self.check_brew_installed(),
+            "system_info_collected": True
+        })
+        self.inventory.start()
 
     def get_brew_list(self):
-        if self.get_cheat_sheet_value("brew_installed"):
-            try:
-                result = subprocess.run(['brew', 'list'], capture_output=True, text=True)
-                return result.stdout.strip().split('\n')
-            except subprocess.CalledProcessError:
-                return []
-        return []
+        return self.cheat_sheet.data.get("installed_apps", {}).get("brew", [])
 
     def update_brew_list(self):
-        brew_list = self.get_brew_list()
-        self.cheat_sheet.data["brew_list"] = brew_list
-        self.cheat_sheet.save()
+        """Ask the background collector to re-read `brew list` now instead of waiting for its TTL."""
+        self.inventory.refresh("brew")
+        self.inventory.start()
 
     def suggest_updates(self):
         suggestions = []
         if not self.get_cheat_sheet_value("system_info_collected"):
             suggestions.append("Collect initial system information")
-        if self.get_cheat_sheet_value("brew_installed") and "brew_list" not in self.cheat_sheet.data:
+        if self.get_cheat_sheet_value("brew_installed") and not self.get_brew_list():
             suggestions.append("Update Homebrew package list")
         # Add more suggestions as needed
         return suggestions
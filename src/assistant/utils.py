@@ -1,28 +1,17 @@
 # croqli/src/assistant/utils.py
 
-import httpx
 import os
-from rich.console import Console
-from rich.markdown import Markdown
 from src.ui.display import render_markdown
+from src.services.clients import get_client_registry
 
 def init_rest_client():
-    """Initialize and return a GroqService instance."""
-    groq_api_key = os.getenv("GROQ_API_KEY")
-    if not groq_api_key:
+    """Return the shared Groq REST client from the process-wide client registry."""
+    clients = get_client_registry()
+    if not clients.config.groq_api_key:
         raise ValueError("GROQ_API_KEY environment variable is not set")
-    return httpx.Client(
-        base_url="https://api.groq.com/openai/v1",
-        headers={"Authorization": f"Bearer {groq_api_key}"}
-    )
+    return clients.rest_client
 
 
-def render_markdown(text: str):
-    """Render markdown text using Rich."""
-    console = Console()
-    md = Markdown(text)
-    console.print(md)
-
 def handle_error(error, console):
     error_message = str(error)
     console.print(f"[bold red]Error:[/bold red] {error_message}")
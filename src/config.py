@@ -2,28 +2,105 @@
 import inquirer
 import os
 import json
+import re
 from pathlib import Path
-from dotenv import load_dotenv, set_key
+from typing import Dict
+from dotenv import dotenv_values, set_key
+from src.services.file_service import SharedJsonFile, atomic_write, file_lock
 
 BRAND_PRIMARY = "#F55036"  # Orange
 BRAND_SECONDARY = "#CCCCCC"  # Light gray
 BRAND_TEXT = "#FFFFFF"  # White for text on primary background
 BRAND_DARK = "#666666"  # Darker gray
 
+ENV_PATH = Path('.env')
+SYSTEM_PROMPTS_PATH = 'system_prompts.json'
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+# .env as last applied to os.environ; _env_version counts re-reads so each Config can tell it is stale
+_env_mtime = None
+_env_values = {}
+_env_version = 0
+
+
+def load_env_file(path=ENV_PATH) -> bool:
+    """Apply `path` to os.environ if it changed since the last call; returns whether it was re-read.
+
+    As with load_dotenv, variables from the real environment win; values taken
+    from an earlier version of the file are updated when the file changes.
+    """
+    global _env_mtime, _env_values, _env_version
+    mtime = _mtime(path)
+    if mtime == _env_mtime:
+        return False
+    values = {k: v for k, v in dotenv_values(path).items() if v is not None} if mtime is not None else {}
+    for key, value in values.items():
+        if key not in os.environ or os.environ[key] == _env_values.get(key):
+            os.environ[key] = value
+    _env_mtime, _env_values = mtime, values
+    _env_version += 1
+    return True
+
+
+_ENV_LINE = re.compile(r'^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_.]*)\s*=')
+
+
+def _env_line(key: str, value: str) -> str:
+    # Same quoting as dotenv.set_key, so files written either way read back identically
+    escaped = value.replace("'", "\\'")
+    return f"{key}='{escaped}'\n"
+
+
+def update_env_file(path, updates: Dict[str, str]) -> None:
+    """Apply several key changes to a .env file in one locked, atomic rewrite.
+
+    Existing keys are replaced in place, new ones appended; comments and every
+    other line are kept as they are.
+    """
+    path = Path(path)
+    with file_lock(path):
+        try:
+            lines = path.read_text().splitlines(keepends=True)
+        except FileNotFoundError:
+            lines = []
+        pending = dict(updates)
+        for i, line in enumerate(lines):
+            match = _ENV_LINE.match(line)
+            if match and match.group(1) in updates:
+                lines[i] = _env_line(match.group(1), str(updates[match.group(1)]))
+                pending.pop(match.group(1), None)
+        if lines and not lines[-1].endswith('\n'):
+            lines[-1] += '\n'
+        lines += [_env_line(key, str(value)) for key, value in pending.items()]
+        atomic_write(path, ''.join(lines).encode())
+
 
 class Config:
 
     
     def save_system_prompts(self):
-        with open('system_prompts.json', 'w') as f:
-            json.dump(self.SYSTEM_PROMPTS, f)
+        """Persist the prompts, merged with edits other CroqLI sessions saved since we last synced."""
+        self.SYSTEM_PROMPTS, _ = self._prompts_file.save(self.SYSTEM_PROMPTS)
+        self._prompts_mtime = self._prompts_file.stamp[1]
 
-    def load_system_prompts(self):
-        try:
-            with open('system_prompts.json', 'r') as f:
-                self.SYSTEM_PROMPTS = json.load(f)
-        except FileNotFoundError:
-            pass  # Use default prompts if file doesn't exist
+    def load_system_prompts(self, force: bool = False) -> bool:
+        """Read system_prompts.json unless it is unchanged since the last read; returns whether it was read."""
+        mtime = _mtime(SYSTEM_PROMPTS_PATH)
+        if mtime is None or (not force and mtime == self._prompts_mtime):
+            return False  # Use default prompts if file doesn't exist
+        prompts = self._prompts_file.load()
+        self._prompts_mtime = self._prompts_file.stamp[1]
+        if prompts is None:
+            return False
+        self.SYSTEM_PROMPTS = prompts
+        return True
 
     def set_active_prompt(self, index: int):
         self.active_prompt_index = index
@@ -31,10 +108,6 @@ class Config:
         self.save_system_prompts()
 
     def __init__(self):
-        load_dotenv()
-
-        
-       
         self.SYSTEM_PROMPTS = [
             {"title": "Friendly Assistant", "prompt": "You are a helpful and friendly assistant."},
             {"title": "Technical Support", "prompt": "You are a technical support specialist, ready to solve complex issues."},
@@ -51,9 +124,6 @@ class Config:
             "SYSTEM_PROMPT": ""
         }
 
-<<<<<<< HEAD
-        # API Keys
-=======
         self.model_max_tokens = {
             "llama3-8b-8192": 8192,
             "llama3-70b-8192": 8192,
@@ -61,7 +131,15 @@ class Config:
             "gemma-7b-it": 8192
         }
 
->>>>>>> c099e0e (chaosINorder)
+        self._prompts_file = SharedJsonFile(SYSTEM_PROMPTS_PATH, default=None)
+        self._prompts_mtime = None
+        self._load_settings()
+        self.load_system_prompts()
+
+    def _load_settings(self):
+        """(Re)read every setting from the environment, after applying .env if it changed."""
+        load_env_file()
+        self._env_version = _env_version
         self.groq_api_key = os.getenv('GROQ_API_KEY')
         self.tavily_api_key = os.getenv('TAVILY_API_KEY')
 
@@ -70,16 +148,70 @@ class Config:
         self.temperature = float(os.getenv('TEMPERATURE', self.DEFAULT_SETTINGS["TEMPERATURE"]))
         self.top_p = float(os.getenv('TOP_P', self.DEFAULT_SETTINGS["TOP_P"]))
         self.system_prompt = str(os.getenv("SYSTEM_PROMPT", self.DEFAULT_SETTINGS["SYSTEM_PROMPT"]))
+        self.system_prompt_title = str(os.getenv("SYSTEM_PROMPT_TITLE", ""))
         
         self.tavily_search_depth = os.getenv('TAVILY_SEARCH_DEPTH', 'advanced')
         self.tavily_max_tokens = int(os.getenv('TAVILY_MAX_TOKENS', '1500'))
+        self.search_concurrency = int(os.getenv('SEARCH_CONCURRENCY', '4'))
+        self.search_subqueries = int(os.getenv('SEARCH_SUBQUERIES', '0'))
+        self.search_cache_enabled = os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true'
+        self.search_cache_ttl = float(os.getenv('SEARCH_CACHE_TTL', '3600'))
+        self.search_cache_max_entries = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '500'))
+
+        # Chat-completions backend: "groq" (SDK), "openai" (any OpenAI-compatible LLM_BASE_URL) or "fake" (local stand-in)
+        self.llm_provider = os.getenv('LLM_PROVIDER', 'groq').lower()
+        self.llm_base_url = os.getenv('LLM_BASE_URL', '')
+        self.llm_api_key = os.getenv('LLM_API_KEY') or self.groq_api_key
+
+        # Per-request model choice across model_max_tokens by task, prompt size and observed latency;
+        # MODEL_ROUTING=false keeps GROQ_MODEL for every request
+        self.model_routing = os.getenv('MODEL_ROUTING', 'true').lower() == 'true'
+        # Chat answers stay on GROQ_MODEL unless this is also on
+        self.model_routing_chat = os.getenv('MODEL_ROUTING_CHAT', 'false').lower() == 'true'
+        # p95 latency (seconds; time to first token for streamed chat) above which the router tries the next model
+        self.router_latency_budgets = {
+            task: float(os.getenv(f'ROUTER_LATENCY_BUDGET_{task.upper()}', default))
+            for task, default in {'command': 1.5, 'chat': 2.0, 'summarize': 4.0}.items()
+        }
+
+        # HTTP connection pool shared by every service
+        self.http2 = os.getenv('HTTP2', 'true').lower() == 'true'
+        self.http_max_connections = int(os.getenv('HTTP_MAX_CONNECTIONS', '20'))
+        self.http_max_keepalive_connections = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '10'))
+        self.http_keepalive_expiry = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '120'))
+        self.http_timeout = float(os.getenv('HTTP_TIMEOUT', '60'))
+
+        # Completion cache for low-temperature requests (command translation)
+        self.completion_cache_enabled = os.getenv('COMPLETION_CACHE_ENABLED', 'true').lower() == 'true'
+        self.completion_cache_max_temperature = float(os.getenv('COMPLETION_CACHE_MAX_TEMPERATURE', '0.2'))
+        self.completion_cache_max_entries = int(os.getenv('COMPLETION_CACHE_MAX_ENTRIES', '1000'))
+        self.completion_cache_ttl = float(os.getenv('COMPLETION_CACHE_TTL', str(7 * 24 * 3600)))
+
+        # Chat history budget (0 = derive from the model's context limit)
+        self.context_history_budget = int(os.getenv('CONTEXT_HISTORY_BUDGET', '0'))
+        self.context_summarize = os.getenv('CONTEXT_SUMMARIZE', 'true').lower() == 'true'
 
         # Assistant settings
         self.command_history_length = int(os.getenv('COMMAND_HISTORY_LENGTH', '10'))
+        self.command_timeout = float(os.getenv('COMMAND_TIMEOUT', '0'))  # seconds, 0 = no limit
+        self.command_max_output_bytes = int(os.getenv('COMMAND_MAX_OUTPUT_BYTES', '1000000'))
+        self.inventory_enabled = os.getenv('INVENTORY_ENABLED', 'true').lower() == 'true'
+        # Per-source refresh intervals (seconds) for the background system inventory
+        self.inventory_ttls = {
+            source: float(os.getenv(f'INVENTORY_TTL_{source.upper()}', default))
+            for source, default in {'system': 86400, 'brew': 3600, 'apt': 3600, 'pip': 1800}.items()
+        }
+        self.cli_command_candidates = max(1, int(os.getenv('CLI_COMMAND_CANDIDATES', '3')))
+        self.cheat_sheet_context_tokens = int(os.getenv('CHEAT_SHEET_CONTEXT_TOKENS', '512'))  # 0 = send the whole sheet
+        self.cheat_sheet_top_k = int(os.getenv('CHEAT_SHEET_TOP_K', '20'))
 
         self.log_file = Path(os.getenv('LOG_FILE', 'assistant.log'))
         self.cheat_sheet_path = Path(os.getenv('CHEAT_SHEET_PATH', Path.home() / '.croqli_cheatsheet.json'))
         self.command_history_path = Path(os.getenv('COMMAND_HISTORY_PATH', Path.home() / '.croqli_command_history.txt'))
+        self.search_cache_path = Path(os.getenv('SEARCH_CACHE_PATH', Path.home() / '.croqli_search_cache.db'))
+        self.completion_cache_path = Path(os.getenv('COMPLETION_CACHE_PATH', Path.home() / '.croqli_completion_cache.db'))
+        self.session_store_enabled = os.getenv('SESSION_STORE_ENABLED', 'true').lower() == 'true'
+        self.session_store_path = Path(os.getenv('SESSION_STORE_PATH', Path.home() / '.croqli_sessions.db'))
 
 
         self.brand_primary = BRAND_PRIMARY
@@ -87,16 +219,23 @@ class Config:
         self.brand_text = BRAND_TEXT
         self.brand_dark = BRAND_DARK
 
-        self.active_prompt_index = int(os.getenv('ACTIVE_PROMPT_INDEX', '0'))
-        self.load_system_prompts()
+        # Switching prompts in the menu only persists the prompt text, so keep the in-session index on reload
+        self.active_prompt_index = int(os.getenv('ACTIVE_PROMPT_INDEX', getattr(self, 'active_prompt_index', 0)))
 
-        
+    def refresh(self) -> bool:
+        """Reload settings and prompts that changed on disk; a stat per file when nothing did."""
+        changed = load_env_file() or self._env_version != _env_version
+        if changed:
+            self._load_settings()
+        return self.load_system_prompts() or changed
 
     def update_system_prompts(self, prompts):
         self.SYSTEM_PROMPTS = prompts
         self.system_prompt = prompts[self.active_prompt_index]['prompt']
-        self.save_to_env('SYSTEM_PROMPT', self.system_prompt)
-        self.save_to_env('SYSTEM_PROMPT_TITLE', prompts[self.active_prompt_index]['title'])
+        self.save_env({
+            'SYSTEM_PROMPT': self.system_prompt,
+            'SYSTEM_PROMPT_TITLE': prompts[self.active_prompt_index]['title']
+        })
     
     def get(self, key, default=None):
         return getattr(self, key, default)
@@ -107,38 +246,47 @@ class Config:
             raise ValueError("GROQ_API_KEY is not set in the environment variables.")
         if not self.tavily_api_key:
             raise ValueError("TAVILY_API_KEY is not set in the environment variables.")
-        
-<<<<<<< HEAD
-        # Add more validation as needed
-=======
+
+    def save_env(self, values):
+        """Write several settings to .env in one rewrite and mirror them on the config."""
+        update_env_file(ENV_PATH, {key: str(value) for key, value in values.items()})
+        for key, value in values.items():
+            setattr(self, key.lower(), value)
+        # Absorb our own write without re-parsing, so the values set here stay authoritative
+        load_env_file()
+        self._env_version = _env_version
+
     def save_to_env(self, key, value):
-        set_key('.env', key, str(value))
-        setattr(self, key.lower(), value)
+        self.save_env({key: value})
 
     def update_model_settings(self, model=None, max_tokens=None, temperature=None, top_p=None):
+        updates = {}
         if model:
-            self.save_to_env('GROQ_MODEL', model)
-            self.groq_model = model
+            updates['GROQ_MODEL'] = model
+        if max_tokens is not None:
+            updates['MAX_TOKENS'] = str(max_tokens)
+        if temperature is not None:
+            updates['TEMPERATURE'] = str(temperature)
+        if top_p is not None:
+            updates['TOP_P'] = str(top_p)
+        if not updates:
+            return
+        self.save_env(updates)
         if max_tokens is not None:
-            self.save_to_env('MAX_TOKENS', str(max_tokens))
             self.max_tokens = max_tokens
         if temperature is not None:
-            self.save_to_env('TEMPERATURE', str(temperature))
             self.temperature = temperature
         if top_p is not None:
-            self.save_to_env('TOP_P', str(top_p))
             self.top_p = top_p
+
     def update_api_keys(self, groq_key=None, tavily_key=None):
+        updates = {}
         if groq_key:
-            self.save_to_env('GROQ_API_KEY', groq_key)
+            updates['GROQ_API_KEY'] = groq_key
         if tavily_key:
-            self.save_to_env('TAVILY_API_KEY', tavily_key)
-
-    def update_system_prompts(self, prompts):
-        self.SYSTEM_PROMPTS = prompts
-        self.save_to_env('SYSTEM_PROMPT', prompts[0]['prompt'])
-        self.save_to_env('SYSTEM_PROMPT_TITLE', prompts[0]['title'])
->>>>>>> c099e0e (chaosINorder)
+            updates['TAVILY_API_KEY'] = tavily_key
+        if updates:
+            self.save_env(updates)
 
     def to_dict(self):
         """Convert configuration to a dictionary."""
@@ -162,8 +310,17 @@ class Config:
             'brand_dark': self.brand_dark
         }
 
+_config = None
+
+
 def load_config():
-    env_path = Path('.env')
+    """Return the process-wide Config, prompting for API keys when there is no .env yet.
+
+    The first call loads .env and system_prompts.json; later calls hand back the
+    same instance, refreshed only if either file changed on disk.
+    """
+    global _config
+    env_path = ENV_PATH
     if not env_path.exists():
         groq_key = inquirer.prompt([
             inquirer.Text('groq_key', message="Please enter your GROQ API key:")
@@ -176,21 +333,8 @@ def load_config():
         set_key(str(env_path), 'GROQ_API_KEY', groq_key)
         set_key(str(env_path), 'TAVILY_API_KEY', tavily_key)
 
-    load_dotenv()
-    """Load and validate the configuration."""
-    config = Config()
-<<<<<<< HEAD
-    config.validate()
-    return config
-
-
-
-## Example usage
-#if __name__ == "__main__":
-    #config = load_config()
-    #print(config.to_dict())
-    #print("Default Settings:", config.DEFAULT_SETTINGS)
-    #print("System Prompts:", config.SYSTEM_PROMPTS)
-=======
-    return config
->>>>>>> c099e0e (chaosINorder)
+    if _config is None:
+        _config = Config()
+    else:
+        _config.refresh()
+    return _config
@@ -5,28 +5,16 @@ from logging import config
 import inquirer
 import sys
 from pathlib import Path
-from src.assistant.cli_assistant import cli_assistant_mode
-from dotenv import load_dotenv, set_key 
+from dotenv import load_dotenv
 from inquirer import prompt, List
-from src.config import load_config
-from src.assistant.chat import chat_mode
-from src.assistant.search import search_mode
-#from src.assistant import cli_assistant 
-from src.ui.display import Console
-from src.services.file_service import CheatSheet
+from src.config import load_config, Config
+# Mode modules and the Groq/Tavily/Rich stacks are imported on first use (see run_mode)
 
 
 project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 
 def model_settings_menu(config):
-    model_max_tokens = {
-        "llama3-8b-8192": 8192,
-        "llama3-70b-8192": 8192,
-        "mixtral-8x7b-32768": 32768,
-        "gemma-7b-it": 8192
-    }
-
     while True:
         setting = inquirer.prompt([
             inquirer.List('setting',
@@ -48,11 +36,19 @@ def model_settings_menu(config):
                 config.update_model_settings(model=new_model)
                 #set_key('.env', 'GROQ_MODEL', new_model)
         elif setting == 'Max Tokens':
-            new_max_tokens = inquirer.prompt([
-                inquirer.Text('max_tokens', 
-                              message=f"Enter max tokens (current: {config.max_tokens}, range: 0-{model_max_tokens[config.groq_model]}, default: {config.DEFAULT_SETTINGS['MAX_TOKENS']}):", 
-                              default=str(config.max_tokens))
-            ])['max_tokens']
+            from src.services.tokens import count_message_tokens
+            context_limit = config.model_max_tokens.get(config.groq_model, 8192)
+            prompt_tokens = count_message_tokens("system", config.system_prompt) if config.system_prompt else 0
+            max_range = max(0, context_limit - prompt_tokens)
+            while True:
+                new_max_tokens = inquirer.prompt([
+                    inquirer.Text('max_tokens', 
+                                  message=f"Enter max tokens (current: {config.max_tokens}, range: 0-{max_range}, system prompt uses {prompt_tokens} of {context_limit}, default: {config.DEFAULT_SETTINGS['MAX_TOKENS']}):", 
+                                  default=str(config.max_tokens))
+                ])['max_tokens']
+                if not new_max_tokens.strip() or (new_max_tokens.strip().isdigit() and int(new_max_tokens) <= max_range):
+                    break
+                print(f"Please enter a whole number between 0 and {max_range}.")
             if new_max_tokens.strip():
                 config.update_model_settings(max_tokens=int(new_max_tokens))
 
@@ -75,8 +71,6 @@ def model_settings_menu(config):
                 config.update_model_settings(top_p=float(new_top_p))
 
 
-<<<<<<< HEAD
-=======
 def settings_menu(config: Config):
     while True:
         choices = ['BACK', 'Model Settings', 'API Keys', 'System Prompts', 'back']
@@ -110,6 +104,9 @@ def api_keys_menu(config: Config):
                       default='')
     ])['tavily_key']
 
+    # Empty answers keep the current keys
+    config.update_api_keys(groq_key=new_groq_key.strip(), tavily_key=new_tavily_key.strip())
+
 def prompt_actions_menu(config: Config, index: int):
     while True:
         choices = ['BACK', 'Edit Prompt', 'Change Title', 'Move Up', 'Move Down', 'Pin/Unpin', 'Delete', 'Use', 'back']
@@ -181,8 +178,7 @@ def switch_active_prompt(config: Config):
 
 def use_prompt(config: Config, index: int):
     config.set_active_prompt(index)
-    set_key('.env', 'SYSTEM_PROMPT', config.system_prompt)
-    set_key('.env', 'SYSTEM_PROMPT_TITLE', config.SYSTEM_PROMPTS[index]['title'])
+    config.save_env({'SYSTEM_PROMPT': config.system_prompt, 'SYSTEM_PROMPT_TITLE': config.SYSTEM_PROMPTS[index]['title']})
     print(f"Active system prompt switched to: {config.SYSTEM_PROMPTS[index]['title']}")
     return 'chat'
 
@@ -246,8 +242,7 @@ def delete_prompt(config: Config, index: int):
 
 def use_prompt(config: Config, index: int):
     config.set_active_prompt(index)
-    set_key('.env', 'SYSTEM_PROMPT', config.system_prompt)
-    set_key('.env', 'SYSTEM_PROMPT_TITLE', config.SYSTEM_PROMPTS[index]['title'])
+    config.save_env({'SYSTEM_PROMPT': config.system_prompt, 'SYSTEM_PROMPT_TITLE': config.SYSTEM_PROMPTS[index]['title']})
     print(f"Active system prompt switched to: {config.SYSTEM_PROMPTS[index]['title']}")
     return 'main_menu'
 
@@ -268,53 +263,51 @@ def cheat_sheet_menu(config: Config):
             handle_cheat_sheet_action(config, choice)
        
 
->>>>>>> c099e0e (chaosINorder)
+def init_services(config):
+    """Build the shared cheat sheet, client registry and console the first time a mode runs."""
+    from src.ui.display import get_console
+    from src.services.file_service import CheatSheet
+    from src.services.clients import get_client_registry
+    config.cheat_sheet = CheatSheet(config.cheat_sheet_path)
+    config.clients = get_client_registry(config)
+    return get_console(config)
+
+def run_mode(mode, config, console):
+    if mode == 'Chat':
+        from src.assistant.chat import chat_mode
+        chat_mode(config, console)
+    elif mode == 'Search':
+        from src.assistant.search import search_mode
+        search_mode(config, console)
+    elif mode == 'CLI Assistant':
+        from src.assistant.cli_assistant import cli_assistant_mode
+        cli_assistant_mode(config, console)
+    elif mode == 'History':
+        from src.assistant.history import history_mode
+        history_mode(config, console)
+
 def main():
     config = load_config()
-    config.cheat_sheet = CheatSheet(config.cheat_sheet_path)
-    console = Console()
+    console = None
     while True:
         mode = inquirer.prompt([
             inquirer.List('mode',
                  message="Select a mode",
-                 choices=['Chat', 'Search', 'CLI Assistant', 'Settings', 'Exit'])
+                 choices=['Chat', 'Search', 'CLI Assistant', 'History', 'Settings', 'Exit'])
         ])['mode']
         
         if mode == 'Exit':
             print("Exiting the program. Goodbye!")
+            if console is not None:
+                from src.services.clients import close_client_registry
+                close_client_registry()
             sys.exit(0)
-        elif mode == 'Chat':
-            chat_mode(config, console)
-        elif mode == 'Search':
-            search_mode(config, console)
-        elif mode == 'CLI Assistant':
-            cli_assistant_mode(config, console)
         elif mode == 'Settings':
             settings_menu(config)
-
-if __name__ == "__main__":
-    main()
-    #load_dotenv()
-    
-
-def settings_menu(config):
-    config = load_config()
-    while True:
-        setting = inquirer.prompt([
-            inquirer.List('setting',
-                         message="Choose a setting to modify",
-                         choices=['Model Settings', 'API Keys', 'System Prompts', 'Back'])
-        ])['setting']
-
-        if setting == 'Back':
-            break
-        elif setting == 'Model Settings':
-            model_settings_menu(config) 
-        elif setting == 'API Keys':
-            api_keys_menu(config)  # <-- You'll need to create this function
-        elif setting == 'System Prompts':
-            system_prompts_menu(config)
-            
+        else:
+            if console is None:
+                console = init_services(config)
+            run_mode(mode, config, console)
 
 def validate_max_tokens(answers, current):
     max_range = model_max_tokens[answers.get('model', config.groq_model)]
@@ -330,83 +323,6 @@ model_max_tokens = {
     "gemma-7b-it": 8192
 }
 
-<<<<<<< HEAD
-def validate_max_tokens(answers, current):
-    max_range = model_max_tokens[config.groq_model]
-    return current.isdigit() and 0 <= int(current) <= max_range
-
-def validate_float_range(answers, current):
-    return is_float(current) and 0.0 <= float(current) <= 1.0
-
-def model_settings_menu(config):
-    model_max_tokens = {
-        "llama3-8b-8192": 8192,
-        "llama3-70b-8192": 8192,
-        "mixtral-8x7b-32768": 32768,
-        "gemma-7b-it": 8192
-    }
-
-    def create_validate_max_tokens(config, model_max_tokens):
-        def validate_max_tokens(answers, current):
-            max_range = model_max_tokens[config.groq_model]
-            return current.isdigit() and 0 <= int(current) <= max_range
-        return validate_max_tokens
-
-    def validate_float_range(answers, current):
-        return is_float(current) and 0.0 <= float(current) <= 1.0
-
-    while True:
-        setting = inquirer.prompt([
-            inquirer.List('setting',
-                          message="Choose a model setting to modify",
-                          choices=['Model Name', 'Max Tokens', 'Temperature', 'Top P', 'Back'])
-        ])['setting']
-
-        if setting == 'Back':
-            break
-
-        elif setting == 'Model Name':
-            new_model = inquirer.prompt([
-                inquirer.List('model', 
-                              message="Choose the model to use", 
-                              choices=list(model_max_tokens.keys()))
-            ])['model']
-            config.groq_model = new_model
-            set_key('.env', 'GROQ_MODEL', new_model)
-
-        elif setting == 'Max Tokens':
-            validate_max_tokens = create_validate_max_tokens(config, model_max_tokens)
-            new_max_tokens = inquirer.prompt([
-                inquirer.Text('max_tokens', 
-                              message=f"Enter max tokens (range 0-{model_max_tokens[config.groq_model]}):", 
-                              default=str(config.max_tokens),
-                              validate=validate_max_tokens)
-            ])['max_tokens']
-            config.max_tokens = int(new_max_tokens)
-            set_key('.env', 'MAX_TOKENS', new_max_tokens)
-
-        elif setting == 'Temperature':
-            new_temperature = inquirer.prompt([
-                inquirer.Text('temperature', 
-                              message="Enter temperature (0.0 - 1.0):", 
-                              default=str(config.temperature),
-                              validate=validate_float_range)
-            ])['temperature']
-            config.temperature = float(new_temperature)
-            set_key('.env', 'TEMPERATURE', new_temperature)
-
-        elif setting == 'Top P':
-            new_top_p = inquirer.prompt([
-                inquirer.Text('top_p', 
-                              message="Enter top P (0.0 - 1.0):", 
-                              default=str(config.top_p),
-                              validate=validate_float_range)
-            ])['top_p']
-            config.top_p = float(new_top_p)
-            set_key('.env', 'TOP_P', new_top_p)
-
-=======
->>>>>>> c099e0e (chaosINorder)
 def is_float(value):
     try:
         float(value)
@@ -414,132 +330,6 @@ def is_float(value):
     except ValueError:
         return False
 
-<<<<<<< HEAD
-def api_keys_menu(config):
-    config = load_config()
-    console = Console()
-    while True:
-        action = inquirer.prompt([
-            inquirer.List('action',
-                          message="Choose an action for API keys:",
-                          choices=['View Keys', 'Edit Keys', 'Back'])
-        ])['action']
-
-        if action == 'Back':
-            break
-
-        elif action == 'View Keys':
-            console.print(f"GROQ API Key: {config.groq_api_key}", style="bold green")
-            console.print(f"Tavily API Key: {config.tavily_api_key}", style="bold green")
-
-        elif action == 'Edit Keys':
-            new_groq_key = inquirer.prompt([
-                inquirer.Text('groq_key', 
-                              message="Enter your new GROQ API key:", 
-                              default=config.groq_api_key)
-            ])['groq_key']
-            new_tavily_key = inquirer.prompt([
-                inquirer.Text('tavily_key', 
-                              message="Enter your new Tavily API key:", 
-                              default=config.tavily_api_key)
-            ])['tavily_key']
-
-            config.groq_api_key = new_groq_key
-            config.tavily_api_key = new_tavily_key
-            set_key('.env', 'GROQ_API_KEY', new_groq_key)
-            set_key('.env', 'TAVILY_API_KEY', new_tavily_key)
-            console.print("API keys updated successfully!", style="bold green")
-
-
-def system_prompts_menu(config):
-    config = load_config()
-    while True:
-        # 1. Display numbered list of prompts using inquirer.List
-        prompt_choices = [
-            inquirer.List('prompt_choice',
-                        message="Choose a system prompt to modify:",
-                        choices=[
-                            f"{i+1}. {p.get('title', 'Untitled Prompt')}" 
-                            for i, p in enumerate(config.SYSTEM_PROMPTS)
-                        ] + ['Add New Prompt', 'Back'])
-        ]
-        answer = inquirer.prompt(prompt_choices)['prompt_choice']
-
-        if answer == 'Back':
-            break
-
-        elif answer == 'Add New Prompt':
-            # Get new prompt title and content
-            new_title = inquirer.prompt([
-                inquirer.Text('title', message="Enter a title for the new prompt:")
-            ])['title']
-            new_prompt = inquirer.prompt([
-                inquirer.Text('prompt', message="Enter the new system prompt:")
-            ])['prompt']
-
-            # Append to SYSTEM_PROMPTS and update .env
-            config.SYSTEM_PROMPTS.append({'title': new_title, 'prompt': new_prompt})
-            set_key('.env', 'SYSTEM_PROMPT', new_prompt)
-            set_key('.env', 'SYSTEM_PROMPT_TITLE', new_title)
-
-        else:
-            # Extract prompt index from the chosen option
-            try:
-                prompt_index = int(answer.split('.')[0]) - 1
-            except (ValueError, IndexError):
-                print("Invalid prompt selection.")
-                continue
-
-            # 2. Get user choice (Edit, Delete, Move, Back)
-            action = inquirer.prompt([
-                inquirer.List('action',
-                            message="Choose an action:",
-                            choices=['Edit', 'Delete', 'Move Up', 'Move Down', 'Back'])
-            ])['action']
-
-            if action == 'Back':
-                continue
-
-            elif action == 'Edit':
-                # Edit prompt title and/or content
-                updated_title = inquirer.prompt([
-                    inquirer.Text('title', 
-                                message="Edit the prompt title:", 
-                                default=config.SYSTEM_PROMPTS[prompt_index]['title'])
-                ])['title']
-                updated_prompt = inquirer.prompt([
-                    inquirer.Text('prompt', 
-                                message="Edit the system prompt:", 
-                                default=config.SYSTEM_PROMPTS[prompt_index]['prompt'])
-                ])['prompt']
-
-                # Update SYSTEM_PROMPTS and .env
-                config.SYSTEM_PROMPTS[prompt_index]['title'] = updated_title
-                config.SYSTEM_PROMPTS[prompt_index]['prompt'] = updated_prompt
-                set_key('.env', 'SYSTEM_PROMPT', updated_prompt)
-                set_key('.env', 'SYSTEM_PROMPT_TITLE', updated_title)
-
-            elif action == 'Delete':
-                # Delete the prompt
-                del config.SYSTEM_PROMPTS[prompt_index]
-                # Update .env with the first prompt (or a default)
-                if config.SYSTEM_PROMPTS:
-                    set_key('.env', 'SYSTEM_PROMPT', config.SYSTEM_PROMPTS[0]['prompt'])
-                    set_key('.env', 'SYSTEM_PROMPT_TITLE', config.SYSTEM_PROMPTS[0]['title'])
-                else:
-                    set_key('.env', 'SYSTEM_PROMPT', "You are a helpful assistant.")
-                    set_key('.env', 'SYSTEM_PROMPT_TITLE', "Default Prompt")
-
-            elif action.startswith('Move'):
-                # Move the prompt up or down
-                new_index = prompt_index + (1 if action == 'Move Down' else -1)
-                if 0 <= new_index < len(config.SYSTEM_PROMPTS):
-                    config.SYSTEM_PROMPTS.insert(new_index, config.SYSTEM_PROMPTS.pop(prompt_index))
-                    # No need to update .env here, as the order doesn't affect it
-
-
-=======
->>>>>>> c099e0e (chaosINorder)
 print("Debug: Reached end of file")
 
 if __name__ == "__main__":
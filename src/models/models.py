@@ -27,9 +27,59 @@ class SearchResult(BaseModel):
     summary: str
 
 class ChatMessage(BaseModel):
+    # Frozen so messages are hashable and their token counts can be cached
+    model_config = ConfigDict(frozen=True)
+
     role: str
     content: str
 
+class TokenUsage(BaseModel):
+    system_prompt: int = 0
+    cheat_sheet: int = 0
+    history: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.system_prompt + self.cheat_sheet + self.history
+
+class StreamMetrics(BaseModel):
+    model_name: str
+    ttft: Optional[float] = None  # seconds until the first content delta
+    total_time: float = 0.0
+    completion_tokens: int = 0
+
+    @property
+    def tokens_per_second(self) -> float:
+        if self.total_time <= 0:
+            return 0.0
+        return self.completion_tokens / self.total_time
+
+class SessionEntry(BaseModel):
+    id: int
+    session: str
+    kind: str  # "command", "chat" or "search"
+    created_at: float
+    title: str  # user prompt, chat question or search query
+    body: str  # command, assistant answer or search result
+    success: Optional[bool] = None
+    detail: Optional[str] = None  # command output or error
+    snippet: str = ""
+
+class CommandCandidate(BaseModel):
+    command: str
+    rank: int = 0  # position in the model's answer, 0 = its preferred command
+    syntax_error: Optional[str] = None
+    missing_programs: List[str] = []
+
+    @property
+    def valid(self) -> bool:
+        return self.syntax_error is None and not self.missing_programs
+
+class InventoryDiff(BaseModel):
+    source: str  # "system", "brew", "apt" or "pip"
+    added: List[str] = []
+    removed: List[str] = []
+
 class Conversation(BaseModel):
     messages: List[ChatMessage]
 
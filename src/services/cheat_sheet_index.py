@@ -0,0 +1,106 @@
+# src/services/cheat_sheet_index.py
+
+import heapq
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+from src.services.tokens import count_tokens
+
+# Small top-level facts that are relevant to every command
+ALWAYS_INCLUDE = ("os", "shell", "package_manager")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def flatten(data, path: str = "") -> List[Tuple[str, str]]:
+    """Split the cheat sheet into (path, value) entries; list items become one entry each."""
+    if isinstance(data, dict):
+        entries = []
+        for key, value in data.items():
+            entries.extend(flatten(value, f"{path}.{key}" if path else str(key)))
+        return entries
+    if isinstance(data, list):
+        entries = []
+        for item in data:
+            entries.extend(flatten(item, path))
+        return entries
+    value = data if isinstance(data, str) else json.dumps(data)
+    return [(path, value)] if value != "" else []
+
+
+class CheatSheetIndex:
+    """BM25 index over cheat sheet entries that selects the context worth sending.
+
+    The index is rebuilt only when the cheat sheet's `version` changes, so each
+    query costs a lookup over the query terms' postings rather than a full dump.
+    """
+
+    def __init__(self, cheat_sheet, top_k: int = 20, max_tokens: int = 512):
+        self.cheat_sheet = cheat_sheet
+        self.top_k = top_k
+        self.max_tokens = max_tokens
+        self._version = None
+        self.entries: List[Tuple[str, str]] = []
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._lengths: List[int] = []
+        self._average_length = 0.0
+        self._always: List[int] = []
+
+    def _ensure_index(self) -> None:
+        version = getattr(self.cheat_sheet, "version", None)
+        if version is not None and version == self._version:
+            return
+        self._version = version
+        self.entries = flatten(self.cheat_sheet.get_context())
+        self._postings = defaultdict(dict)
+        self._lengths = []
+        for entry_id, (path, value) in enumerate(self.entries):
+            terms = tokenize(f"{path} {value}")
+            self._lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                self._postings[term][entry_id] = frequency
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        self._always = [i for i, (path, _) in enumerate(self.entries) if path in ALWAYS_INCLUDE]
+
+    def search(self, query: str, top_k: int = None) -> List[Tuple[float, int]]:
+        """(score, entry id) pairs for the best-matching entries, highest score first."""
+        self._ensure_index()
+        total = len(self.entries)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for entry_id, frequency in postings.items():
+                norm = 1 - BM25_B + BM25_B * self._lengths[entry_id] / self._average_length
+                scores[entry_id] += idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+        return heapq.nlargest(top_k or self.top_k, ((score, entry_id) for entry_id, score in scores.items()))
+
+    def context(self, query: str) -> str:
+        """Cheat sheet lines relevant to `query`, capped at `max_tokens`.
+
+        With `max_tokens` set to 0 the whole cheat sheet is returned as JSON, as before.
+        """
+        if not self.max_tokens:
+            return json.dumps(self.cheat_sheet.get_context())
+        self._ensure_index()
+        selected = list(self._always)
+        selected += [entry_id for _, entry_id in self.search(query) if entry_id not in selected]
+
+        lines, used = [], 0
+        for entry_id in selected:
+            path, value = self.entries[entry_id]
+            line = f"- {path}: {value}"
+            tokens = count_tokens(line) + 1
+            if used + tokens > self.max_tokens:
+                continue
+            lines.append(line)
+            used += tokens
+        return "\n".join(lines)
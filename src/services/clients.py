@@ -0,0 +1,297 @@
+# src/services/clients.py
+
+import asyncio
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from src.config import load_config
+
+try:
+    import h2  # noqa: F401  (httpx only speaks HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+GROQ_REST_BASE_URL = "https://api.groq.com/openai/v1"
+
+
+class ClientRegistry:
+    """Process-wide owner of the HTTP connection pools and API service instances.
+
+    Every mode gets its clients from here, so keep-alive connections (and the TLS
+    sessions behind them) survive switching between Chat, Search and CLI Assistant.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.RLock()
+        self._transport = None
+        self._http_client = None
+        self._rest_client = None
+        self._requests_session = None
+        self._groq_service = None
+        self._llm_backend = None
+        self._fake_llm_server = None
+        self._model_router = None
+        self._tavily_service = None
+        self._search_cache = None
+        self._completion_cache = None
+        self._session_store = None
+        self._loop = None
+        self._loop_thread = None
+        self._async_transport = None
+        self._async_groq_client = None
+        self._async_tavily_client = None
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.config.http_max_connections,
+            max_keepalive_connections=self.config.http_max_keepalive_connections,
+            keepalive_expiry=self.config.http_keepalive_expiry
+        )
+
+    @property
+    def transport(self) -> httpx.HTTPTransport:
+        with self._lock:
+            if self._transport is None:
+                self._transport = httpx.HTTPTransport(
+                    http2=self.config.http2 and HTTP2_AVAILABLE,
+                    limits=self._limits()
+                )
+            return self._transport
+
+    @property
+    def http_client(self) -> httpx.Client:
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(transport=self.transport, timeout=self.config.http_timeout)
+            return self._http_client
+
+    @property
+    def requests_session(self) -> requests.Session:
+        """Pooled session for SDKs built on `requests` (Tavily)."""
+        with self._lock:
+            if self._requests_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.config.http_max_keepalive_connections,
+                    pool_maxsize=self.config.http_max_connections
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._requests_session = session
+            return self._requests_session
+
+    @property
+    def model_router(self):
+        """Per-request model choice, fed by the latencies the backend records."""
+        from src.services.model_router import LatencyTracker, ModelRouter
+        with self._lock:
+            if self._model_router is None:
+                # The model table holds Groq model names, which other OpenAI-compatible servers won't know
+                self._model_router = ModelRouter(
+                    self.config, LatencyTracker(),
+                    enabled=self.config.model_routing and self.config.llm_provider != "openai"
+                )
+            return self._model_router
+
+    @property
+    def llm_backend(self):
+        """The chat-completions backend every mode talks to, chosen by LLM_PROVIDER, with latency tracking."""
+        with self._lock:
+            if self._llm_backend is None:
+                from src.services.model_router import LatencyTrackingBackend
+                self._llm_backend = LatencyTrackingBackend(self._create_llm_backend(), self.model_router.tracker)
+            return self._llm_backend
+
+    def _create_llm_backend(self):
+        from groq import Groq
+        from src.services.llm_backend import GroqBackend, OpenAICompatibleBackend
+        provider = self.config.llm_provider
+        if provider == "groq":
+            return GroqBackend(Groq(api_key=self.config.groq_api_key, http_client=self.http_client), self.async_groq_client)
+        if provider not in ("openai", "fake"):
+            raise ValueError(f"Unknown LLM_PROVIDER {provider!r}; use groq, openai or fake")
+        base_url = self.config.llm_base_url or GROQ_REST_BASE_URL
+        if provider == "fake":
+            from src.services.fake_llm_server import FakeLLMServer
+            self._fake_llm_server = FakeLLMServer().start()
+            base_url = self._fake_llm_server.url
+        return OpenAICompatibleBackend(
+            base_url, api_key=self.config.llm_api_key, name=provider, transport=self.transport,
+            async_transport=self.async_transport, timeout=self.config.http_timeout
+        )
+
+    @property
+    def groq_service(self):
+        from src.services.groq_api import GroqService
+        with self._lock:
+            if self._groq_service is None:
+                self._groq_service = GroqService(config=self.config, backend=self.llm_backend, router=self.model_router)
+            return self._groq_service
+
+    @property
+    def tavily_service(self):
+        from src.services.tavily_api import TavilyService
+        with self._lock:
+            if self._tavily_service is None:
+                self._tavily_service = TavilyService(
+                    config=self.config, session=self.requests_session, cache=self.search_cache
+                )
+            return self._tavily_service
+
+    @property
+    def search_cache(self):
+        """Shared on-disk Tavily result cache, or None when SEARCH_CACHE_ENABLED is off."""
+        from src.services.search_cache import SearchCache
+        with self._lock:
+            if self._search_cache is None and self.config.search_cache_enabled:
+                self._search_cache = SearchCache(
+                    self.config.search_cache_path,
+                    ttl=self.config.search_cache_ttl,
+                    max_entries=self.config.search_cache_max_entries
+                )
+            return self._search_cache
+
+    @property
+    def completion_cache(self):
+        """Shared content-addressed completion cache; COMPLETION_CACHE_ENABLED=false makes it pass-through."""
+        from src.services.completion_cache import CompletionCache
+        with self._lock:
+            if self._completion_cache is None:
+                self._completion_cache = CompletionCache(
+                    self.config.completion_cache_path,
+                    max_temperature=self.config.completion_cache_max_temperature,
+                    max_entries=self.config.completion_cache_max_entries,
+                    ttl=self.config.completion_cache_ttl,
+                    enabled=self.config.completion_cache_enabled
+                )
+            return self._completion_cache
+
+    @property
+    def session_store(self):
+        """Shared history of commands, chat exchanges and searches, or None when SESSION_STORE_ENABLED is off."""
+        from src.services.session_store import SessionStore
+        with self._lock:
+            if self._session_store is None and self.config.session_store_enabled:
+                self._session_store = SessionStore(self.config.session_store_path)
+            return self._session_store
+
+    @property
+    def rest_client(self) -> httpx.Client:
+        """Raw Groq REST client with auth headers; it reuses the shared connection pool."""
+        with self._lock:
+            if self._rest_client is None:
+                self._rest_client = httpx.Client(
+                    base_url=GROQ_REST_BASE_URL,
+                    headers={"Authorization": f"Bearer {self.config.groq_api_key}"},
+                    transport=self.transport,
+                    timeout=self.config.http_timeout
+                )
+            return self._rest_client
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Background event loop that owns the async clients, so their pools outlive a single call."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="croqli-async", daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def run_async(self, coro, timeout=None):
+        """Run `coro` on the registry loop and block until it returns."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    @property
+    def async_transport(self) -> httpx.AsyncHTTPTransport:
+        with self._lock:
+            if self._async_transport is None:
+                self._async_transport = httpx.AsyncHTTPTransport(
+                    http2=self.config.http2 and HTTP2_AVAILABLE,
+                    limits=self._limits()
+                )
+            return self._async_transport
+
+    @property
+    def async_groq_client(self):
+        from groq import AsyncGroq
+        with self._lock:
+            if self._async_groq_client is None:
+                self._async_groq_client = AsyncGroq(
+                    api_key=self.config.groq_api_key,
+                    http_client=httpx.AsyncClient(transport=self.async_transport, timeout=self.config.http_timeout)
+                )
+            return self._async_groq_client
+
+    @property
+    def async_tavily_client(self):
+        from tavily import AsyncTavilyClient
+        with self._lock:
+            if self._async_tavily_client is None:
+                # AsyncTavilyClient sets its own base URL and headers on the client it is given.
+                self._async_tavily_client = AsyncTavilyClient(
+                    api_key=self.config.tavily_api_key,
+                    client=httpx.AsyncClient(transport=self.async_transport, timeout=self.config.http_timeout)
+                )
+            return self._async_tavily_client
+
+    def close(self):
+        with self._lock:
+            if self._loop is not None:
+                if self._async_transport is not None:
+                    self.run_async(self._async_transport.aclose())
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop_thread.join()
+                self._loop.close()
+            self._loop = None
+            self._loop_thread = None
+            self._async_transport = None
+            self._async_groq_client = None
+            self._async_tavily_client = None
+            # The httpx clients share one transport, so closing the transport closes them all.
+            if self._transport is not None:
+                self._transport.close()
+            if self._requests_session is not None:
+                self._requests_session.close()
+            if self._search_cache is not None:
+                self._search_cache.close()
+            if self._completion_cache is not None:
+                self._completion_cache.close()
+            if self._session_store is not None:
+                self._session_store.close()
+            self._search_cache = None
+            self._completion_cache = None
+            self._session_store = None
+            self._transport = None
+            self._http_client = None
+            self._rest_client = None
+            self._requests_session = None
+            self._groq_service = None
+            self._llm_backend = None
+            self._model_router = None
+            self._tavily_service = None
+            if self._fake_llm_server is not None:
+                self._fake_llm_server.stop()
+                self._fake_llm_server = None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_client_registry(config=None) -> ClientRegistry:
+    """Return the process-wide registry, creating it from `config` (or `load_config()`) on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry(config or load_config())
+        return _registry
+
+def close_client_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.close()
+            _registry = None
@@ -0,0 +1,139 @@
+# src/services/command_history.py
+
+import time
+from collections import defaultdict, deque
+from typing import Dict, Iterator, List, Optional, Set
+
+NGRAM_SIZE = 3
+
+
+class CommandRecord:
+    __slots__ = ('id', 'user_prompt', 'command', 'success', 'output', 'error', 'timestamp')
+
+    def __init__(self, id: int, user_prompt: str, command: str, success: bool,
+                 output: Optional[str] = None, error: Optional[str] = None, timestamp: Optional[float] = None):
+        self.id = id
+        self.user_prompt = user_prompt
+        self.command = command
+        self.success = success
+        self.output = output
+        self.error = error
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    def __getitem__(self, key):
+        # Dict-style access for display helpers that take history entries as mappings
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f"CommandRecord(id={self.id}, command={self.command!r}, success={self.success})"
+
+
+def _ngrams(text: str) -> Set[str]:
+    """All 1- to 3-character substrings, so any query of any length can be looked up."""
+    grams = set()
+    for size in range(1, NGRAM_SIZE + 1):
+        grams.update(text[i:i + size] for i in range(len(text) - size + 1))
+    return grams
+
+
+class SubstringIndex:
+    """Case-insensitive substring index over record ids, backed by n-gram posting sets."""
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+
+    def add(self, record_id: int, text: str) -> None:
+        for gram in _ngrams(text.lower()):
+            self._postings[gram].add(record_id)
+
+    def remove(self, record_id: int, text: str) -> None:
+        for gram in _ngrams(text.lower()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(record_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def candidates(self, query: str) -> Set[int]:
+        """Ids whose text may contain `query`; callers still verify the match."""
+        query = query.lower()
+        size = min(NGRAM_SIZE, len(query))
+        grams = {query[i:i + size] for i in range(len(query) - size + 1)}
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        if not postings:
+            return set()
+        result = set(postings[0])
+        for other in postings[1:]:
+            result &= other
+            if not result:
+                break
+        return result
+
+
+class CommandHistory:
+    """Fixed-size ring buffer of CommandRecords with substring/prefix indexes.
+
+    Appending and evicting cost O(length of the prompt and command), independent of
+    how many records are kept, and lookups only touch records sharing the query's n-grams.
+    """
+
+    def __init__(self, maxlen: int = 10):
+        self.maxlen = max(1, maxlen)
+        self._records = deque()
+        self._by_id: Dict[int, CommandRecord] = {}
+        self._prompt_index = SubstringIndex()
+        self._command_index = SubstringIndex()
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[CommandRecord]:
+        return iter(self._records)
+
+    def add(self, user_prompt: str, command: str, success: bool,
+            output: Optional[str] = None, error: Optional[str] = None,
+            timestamp: Optional[float] = None) -> CommandRecord:
+        record = CommandRecord(self._next_id, user_prompt, command, success, output, error, timestamp)
+        self._next_id += 1
+        while len(self._records) >= self.maxlen:
+            self._evict()
+        self._records.append(record)
+        self._by_id[record.id] = record
+        self._prompt_index.add(record.id, user_prompt)
+        self._command_index.add(record.id, command)
+        return record
+
+    def _evict(self) -> None:
+        record = self._records.popleft()
+        del self._by_id[record.id]
+        self._prompt_index.remove(record.id, record.user_prompt)
+        self._command_index.remove(record.id, record.command)
+
+    def resize(self, maxlen: int) -> None:
+        self.maxlen = max(1, maxlen)
+        while len(self._records) > self.maxlen:
+            self._evict()
+
+    def recent(self, n: int) -> List[CommandRecord]:
+        n = min(n, len(self._records))
+        return [self._records[i] for i in range(len(self._records) - n, len(self._records))]
+
+    def _lookup(self, index: SubstringIndex, field: str, query: str, prefix: bool) -> List[CommandRecord]:
+        query_lower = query.lower()
+        matches = []
+        for record_id in sorted(index.candidates(query)):
+            text = getattr(self._by_id[record_id], field).lower()
+            if text.startswith(query_lower) if prefix else query_lower in text:
+                matches.append(self._by_id[record_id])
+        return matches
+
+    def search_prompts(self, query: str) -> List[CommandRecord]:
+        """Records whose user prompt contains `query` (case-insensitive), oldest first."""
+        return self._lookup(self._prompt_index, 'user_prompt', query, prefix=False)
+
+    def search_commands(self, query: str) -> List[CommandRecord]:
+        return self._lookup(self._command_index, 'command', query, prefix=False)
+
+    def commands_with_prefix(self, prefix: str) -> List[CommandRecord]:
+        return self._lookup(self._command_index, 'command', prefix, prefix=True)
@@ -0,0 +1,127 @@
+# src/services/command_runner.py
+
+import asyncio
+import os
+import signal
+import sys
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+READ_CHUNK_SIZE = 64 * 1024
+TIMEOUT_EXIT_CODE = 124      # same convention as coreutils `timeout`
+INTERRUPTED_EXIT_CODE = 130  # 128 + SIGINT
+
+
+def print_line(stream_name: str, line: str) -> None:
+    print(line, file=sys.stderr if stream_name == "stderr" else sys.stdout, flush=True)
+
+
+class OutputTail:
+    """Keeps only the last `max_bytes` of a stream's lines and counts what was dropped."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.lines = deque()
+        self.size = 0
+        self.dropped = 0
+
+    def append(self, line: str) -> None:
+        self.lines.append(line)
+        self.size += len(line) + 1
+        while self.size > self.max_bytes and len(self.lines) > 1:
+            dropped = self.lines.popleft()
+            self.size -= len(dropped) + 1
+            self.dropped += len(dropped) + 1
+
+    def text(self) -> str:
+        body = "\n".join(self.lines)
+        if self.dropped:
+            return f"... ({self.dropped} bytes truncated)\n{body}"
+        return body
+
+
+async def _pump(stream: asyncio.StreamReader, stream_name: str, tail: OutputTail,
+                on_line: Optional[Callable[[str, str], None]]) -> None:
+    """Forward complete lines as they arrive; chunked reads so huge lines cannot overrun the reader."""
+    pending = b""
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for raw in lines:
+            line = raw.decode(errors="replace").rstrip("\r")
+            tail.append(line)
+            if on_line:
+                on_line(stream_name, line)
+    if pending:
+        line = pending.decode(errors="replace")
+        tail.append(line)
+        if on_line:
+            on_line(stream_name, line)
+
+
+def _kill(process: asyncio.subprocess.Process, detached: bool) -> None:
+    """Kill the command; a detached one takes its whole process group, so pipelines and grandchildren die with it."""
+    try:
+        if detached:
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_command_async(command: str, on_line: Optional[Callable[[str, str], None]] = print_line,
+                            timeout: Optional[float] = None, max_output_bytes: int = 1_000_000,
+                            shell: Optional[str] = None) -> Tuple[str, str, int]:
+    """Run a shell command, streaming its output line by line.
+
+    The command runs as `<shell> -c command`, or under the platform shell (/bin/sh)
+    when `shell` is None. Returns (stdout, stderr, exit_code) where the captured text
+    is capped to the last `max_output_bytes` of each stream. A timeout kills the
+    command and returns 124.
+    """
+    # With a timeout the command gets its own session, so the whole command tree can be
+    # killed when it expires. Without one it stays on our terminal, so sudo, ssh and other
+    # tty prompts keep working, and Ctrl-C reaches it through the foreground process group.
+    detached = bool(timeout) and os.name == "posix"
+    options = dict(stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=detached)
+    if shell:
+        process = await asyncio.create_subprocess_exec(shell, "-c", command, **options)
+    else:
+        process = await asyncio.create_subprocess_shell(command, **options)
+    stdout_tail, stderr_tail = OutputTail(max_output_bytes), OutputTail(max_output_bytes)
+    pumps = asyncio.gather(
+        _pump(process.stdout, "stdout", stdout_tail, on_line),
+        _pump(process.stderr, "stderr", stderr_tail, on_line),
+        process.wait()
+    )
+    try:
+        await asyncio.wait_for(pumps, timeout=timeout or None)
+        exit_code = process.returncode
+    except asyncio.TimeoutError:
+        _kill(process, detached)
+        await process.wait()
+        stderr_tail.append(f"Command timed out after {timeout} seconds and was killed.")
+        exit_code = TIMEOUT_EXIT_CODE
+    except asyncio.CancelledError:
+        _kill(process, detached)
+        await process.wait()
+        raise
+    return stdout_tail.text().strip(), stderr_tail.text().strip(), exit_code
+
+
+def run_command(command: str, on_line: Optional[Callable[[str, str], None]] = print_line,
+                timeout: Optional[float] = None, max_output_bytes: int = 1_000_000,
+                shell: Optional[str] = None) -> Tuple[str, str, int]:
+    """Blocking wrapper around `run_command_async`.
+
+    Ctrl-C cancels the run and kills the command's process group; the caller gets
+    exit code 130 instead of a KeyboardInterrupt, so the prompt loop keeps running.
+    """
+    try:
+        return asyncio.run(run_command_async(command, on_line, timeout, max_output_bytes, shell))
+    except KeyboardInterrupt:
+        return "", "Command interrupted by user.", INTERRUPTED_EXIT_CODE
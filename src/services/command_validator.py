@@ -0,0 +1,99 @@
+# src/services/command_validator.py
+
+import asyncio
+import os
+import shlex
+from typing import List, Optional, Set
+from src.models.models import CommandCandidate
+from src.services.path_index import is_installed
+
+SEPARATORS = {"|", "||", "&&", ";", "&", "(", ")", "|&", ";;"}
+# Keywords and wrappers that are followed by the actual program
+PREFIX_WORDS = {
+    "!", "{", "}", "if", "then", "else", "elif", "fi", "while", "until", "do", "done", "esac",
+    "time", "sudo", "env", "nohup", "exec", "command", "builtin", "xargs", "watch",
+}
+# Followed by a variable name or word list rather than a program
+HEADER_WORDS = {"for", "select", "case", "function"}
+# Shell builtins: valid commands that are not on PATH
+BUILTINS = {
+    "cd", "echo", "export", ".", "alias", "unalias", "set", "unset", "read", "eval",
+    "exit", "return", "printf", "test", "[", "type", "hash",
+    "jobs", "fg", "bg", "wait", "kill", "trap", "ulimit", "umask", "true", "false",
+    "shift", "local", ":",
+}
+# Builtins of bash, zsh and ksh that plain POSIX shells (sh, dash) run as programs and fail to find
+EXTENDED_BUILTINS = {"[[", "declare", "let", "source", "pushd", "popd", "dirs", "history", "typeset"}
+POSIX_ONLY_SHELLS = {"sh", "dash"}
+SYNTAX_CHECK_TIMEOUT = 5.0
+
+
+def builtins_of(shell: str) -> Set[str]:
+    if os.path.basename(shell) in POSIX_ONLY_SHELLS:
+        return BUILTINS
+    return BUILTINS | EXTENDED_BUILTINS
+
+
+def programs_in(command: str, shell: str = "bash") -> List[str]:
+    """The program names that start each segment of a shell pipeline or command list."""
+    builtins = builtins_of(shell)
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    programs, expecting_program = [], True
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        return []  # unbalanced quotes; the syntax check reports it
+    for token in tokens:
+        if token in SEPARATORS:
+            expecting_program = True
+        elif expecting_program:
+            if "=" in token and not token.startswith("="):
+                continue  # VAR=value prefix
+            if token in PREFIX_WORDS or token.startswith("-"):
+                continue
+            expecting_program = False
+            if token in HEADER_WORDS or token in builtins or token[0] in "<>$`" or token.isdigit():
+                continue
+            programs.append(token)
+    return programs
+
+
+async def check_syntax(command: str, shell: str = "bash") -> Optional[str]:
+    """Parse `command` with `<shell> -n` without running it; returns the error text or None."""
+    if not is_installed(shell):
+        return None
+    process = await asyncio.create_subprocess_exec(
+        shell, "-n", "-c", command,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=SYNTAX_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None
+    if process.returncode != 0:
+        return stderr.decode(errors="replace").strip() or f"{shell} -n exited with {process.returncode}"
+    return None
+
+
+async def validate_command(command: str, rank: int = 0, shell: str = "bash") -> CommandCandidate:
+    missing = [program for program in programs_in(command, shell) if not is_installed(program)]
+    return CommandCandidate(
+        command=command, rank=rank, syntax_error=await check_syntax(command, shell), missing_programs=missing
+    )
+
+
+async def validate_commands_async(commands: List[str], shell: str = "bash") -> List[CommandCandidate]:
+    return list(await asyncio.gather(*(validate_command(c, rank, shell) for rank, c in enumerate(commands))))
+
+
+def validate_commands(commands: List[str], shell: str = "bash") -> List[CommandCandidate]:
+    """Validate candidate commands concurrently, preserving the model's order."""
+    return asyncio.run(validate_commands_async(commands, shell))
+
+
+def order_candidates(candidates: List[CommandCandidate]) -> List[CommandCandidate]:
+    """Locally valid candidates first, each group in the model's preferred order."""
+    return sorted(candidates, key=lambda candidate: (not candidate.valid, candidate.rank))
@@ -0,0 +1,85 @@
+# src/services/completion_cache.py
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from src.services.cache import SQLiteLRUCache
+
+
+class CompletionCache:
+    """Content-addressed cache for near-deterministic chat completions.
+
+    Requests at or below `max_temperature` are keyed on a hash of the model, messages
+    and sampling parameters. Hits are served from an in-memory LRU first and from
+    SQLite second, so repeated command translations skip the network round trip.
+    Callers can pass `cache_key` to hash only the stable parts of a request instead.
+    """
+
+    def __init__(self, path: Path, max_temperature: float = 0.2, max_entries: int = 1000,
+                 ttl: float = 7 * 24 * 3600, enabled: bool = True):
+        self.max_temperature = max_temperature
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = SQLiteLRUCache(path, "completion_cache", ttl=ttl, max_entries=max_entries)
+
+    @staticmethod
+    def make_key(request: dict) -> str:
+        payload = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def cacheable(self, request: dict) -> bool:
+        return (
+            self.enabled
+            and not request.get("stream")
+            and request.get("temperature", 1.0) <= self.max_temperature
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        content = self._store.get(key)
+        if content is not None:
+            self._remember(key, content)
+        return content
+
+    def put(self, key: str, content: str) -> None:
+        self._remember(key, content)
+        self._store.put(key, content)
+
+    def invalidate(self, request: dict, cache_key: Optional[dict] = None) -> None:
+        """Drop the cached answer for `request`, e.g. after the generated command failed."""
+        key = self.make_key(cache_key or request)
+        with self._lock:
+            self._memory.pop(key, None)
+        self._store.delete(key)
+
+    def _remember(self, key: str, content: str) -> None:
+        with self._lock:
+            self._memory[key] = content
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def complete(self, backend, cache_key: Optional[dict] = None, **request) -> str:
+        """Return the message content for `request`, calling the LLM backend only on a cache miss.
+
+        `cache_key` is hashed in place of the request when given.
+        """
+        if not self.cacheable(request):
+            return backend.complete(**request)
+        key = self.make_key(cache_key or request)
+        content = self.get(key)
+        if content is None:
+            content = backend.complete(**request)
+            self.put(key, content)
+        return content
+
+    def close(self) -> None:
+        self._store.close()
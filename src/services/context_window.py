@@ -0,0 +1,89 @@
+# src/services/context_window.py
+
+from collections import deque
+from typing import Callable, List, Optional
+from src.models.models import ChatMessage, TokenUsage
+from src.services.tokens import count_chat_message, count_message_tokens, measure_prompt
+
+DEFAULT_CONTEXT_LIMIT = 8192
+# When older turns are rolled into a summary, trim below the budget so the
+# (expensive) summary call happens once every few turns instead of every turn.
+SUMMARY_TRIM_TARGET = 0.75
+
+
+class ContextWindow:
+    """Chat history that keeps each request inside the active model's token budget.
+
+    Token counts are computed once per message when it is added, so keeping the
+    running total costs only the new turn. When the budget is exceeded the oldest
+    turns are dropped, or rolled into a running summary if a summarizer is given.
+    """
+
+    def __init__(self, config, summarizer: Optional[Callable[[str, List[ChatMessage]], str]] = None):
+        self.config = config
+        self.summarizer = summarizer
+        self.turns = deque()  # (ChatMessage, token count)
+        self.history_tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+
+    @property
+    def context_limit(self) -> int:
+        return self.config.model_max_tokens.get(self.config.groq_model, DEFAULT_CONTEXT_LIMIT)
+
+    def budget(self, system_prompt: str = "") -> int:
+        """Tokens available for summary + history + the pending user message."""
+        if self.config.context_history_budget:
+            return self.config.context_history_budget
+        response_reserve = min(self.config.max_tokens, self.context_limit // 2)
+        system_tokens = count_message_tokens("system", system_prompt) if system_prompt else 0
+        return max(0, self.context_limit - response_reserve - system_tokens)
+
+    def add(self, role: str, content: str) -> None:
+        message = ChatMessage(role=role, content=content)
+        tokens = count_chat_message(message)
+        self.turns.append((message, tokens))
+        self.history_tokens += tokens
+
+    def usage(self, system_prompt: str = "") -> TokenUsage:
+        """Token totals for the next request, from the cached per-message counts."""
+        usage = measure_prompt(system_prompt=system_prompt)
+        usage.history = self.summary_tokens + self.history_tokens
+        return usage
+
+    def last_message(self) -> Optional[ChatMessage]:
+        return self.turns[-1][0] if self.turns else None
+
+    def __len__(self):
+        return len(self.turns)
+
+    def fit(self, system_prompt: str = "", pending: str = "") -> None:
+        """Drop or summarize the oldest turns until the next request fits the budget."""
+        budget = self.budget(system_prompt)
+        pending_tokens = count_message_tokens("user", pending)
+        if self.summary_tokens + self.history_tokens + pending_tokens <= budget:
+            return
+
+        target = budget * SUMMARY_TRIM_TARGET if self.summarizer else budget
+        evicted = []
+        while self.turns and self.summary_tokens + self.history_tokens + pending_tokens > target:
+            message, tokens = self.turns.popleft()
+            self.history_tokens -= tokens
+            evicted.append(message)
+
+        if evicted and self.summarizer:
+            self.summary = self.summarizer(self.summary, evicted)
+            self.summary_tokens = count_message_tokens("system", self.summary)
+        if self.summary_tokens + self.history_tokens + pending_tokens > budget:
+            self.summary, self.summary_tokens = "", 0
+
+    def messages(self, system_prompt: str, user_input: str) -> List[ChatMessage]:
+        self.fit(system_prompt, user_input)
+        messages = []
+        if system_prompt:
+            messages.append(ChatMessage(role="system", content=system_prompt))
+        if self.summary:
+            messages.append(ChatMessage(role="system", content=f"Summary of the earlier conversation: {self.summary}"))
+        messages.extend(message for message, _ in self.turns)
+        messages.append(ChatMessage(role="user", content=user_input))
+        return messages
@@ -0,0 +1,150 @@
+# src/services/fake_llm_server.py
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def echo_reply(request: dict) -> str:
+    """Default reply: the last user message, echoed back."""
+    user_messages = [m.get("content", "") for m in request.get("messages", []) if m.get("role") == "user"]
+    return f"Echo: {user_messages[-1] if user_messages else ''}"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default backlog of 5 drops connections under concurrent load
+
+
+class FakeLLMServer:
+    """Local OpenAI-compatible chat-completions server for tests, benchmarks and offline use.
+
+    Serves POST /v1/chat/completions (plain JSON, or server-sent events when the
+    request sets "stream") and GET /v1/models. `latency` delays the first byte and
+    `tokens_per_second` paces streamed deltas; both can be changed while running.
+    Every request body is kept in `requests`.
+
+        with FakeLLMServer(latency=0.05) as server:
+            backend = OpenAICompatibleBackend(server.url, name="fake")
+    """
+
+    def __init__(self, reply: Optional[Callable[[dict], str]] = None, latency: float = 0.0,
+                 tokens_per_second: float = 0.0, model: str = "fake-model", host: str = "127.0.0.1", port: int = 0):
+        self.reply = reply or echo_reply
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.model = model
+        self.requests: List[dict] = []
+        self._server = _Server((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm-server", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def _completion(self, request: dict, text: str) -> dict:
+        prompt_tokens = sum(len(TOKEN_PATTERN.findall(str(m.get("content", "")))) for m in request.get("messages", []))
+        completion_tokens = len(TOKEN_PATTERN.findall(text))
+        return {
+            "id": f"fake-{len(self.requests)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", self.model),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, body: dict) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/v1/models":
+                    self._send_json(200, {"object": "list", "data": [{"id": server.model, "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": {"message": "Request body is not JSON"}})
+                    return
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                server.requests.append(request)
+                if server.latency:
+                    time.sleep(server.latency)
+                text = server.reply(request)
+                if request.get("stream"):
+                    self._stream(request, text)
+                else:
+                    self._send_json(200, server._completion(request, text))
+
+            def _stream(self, request: dict, text: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                completion = server._completion(request, text)
+                base = {key: completion[key] for key in ("id", "created", "model")}
+                for token in TOKEN_PATTERN.findall(text):
+                    chunk = dict(base, object="chat.completion.chunk",
+                                 choices=[{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    if server.tokens_per_second:
+                        time.sleep(1 / server.tokens_per_second)
+                final = dict(base, object="chat.completion.chunk", usage=completion["usage"],
+                             choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+                self.wfile.flush()
+
+        return Handler
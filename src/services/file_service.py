@@ -1,41 +1,356 @@
 # croqli/src/services/file_service.py
 
+import atexit
+import copy
 import json
-import os 
+import os
+import tempfile
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Dict, List
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
-from config import Config
-import inquirer
+
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes stay atomic, just unlocked
+    fcntl = None
 
 
 def ensure_directory_exists(directory: Path) -> None:
     """Ensure that the specified directory exists."""
     directory.mkdir(parents=True, exist_ok=True)
 
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on `<path>.lock` so concurrent CroqLI processes take turns.
+
+    Yields the open lock file, which SharedJsonFile uses to keep its version counter.
+    """
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield lock_file
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def atomic_write(path, content: bytes) -> None:
+    """Replace `path` with `content` via a fsynced temp file and rename, keeping its permissions."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        if path.exists():
+            os.chmod(temp_path, path.stat().st_mode & 0o7777)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+_MISSING = object()
+
+
+def merge_values(base, ours, theirs):
+    """Three-way merge of JSON values: keep both sides' changes relative to `base`.
+
+    Dicts merge key by key (a key deleted on one side and untouched on the other
+    stays deleted); lists keep our order, drop items the other side removed and
+    append items it added. When both sides changed the same scalar, ours wins.
+    """
+    if ours == theirs or theirs == base:
+        return ours
+    if ours == base:
+        return theirs
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        base = base if isinstance(base, dict) else {}
+        merged = {}
+        for key in list(ours) + [key for key in theirs if key not in ours]:
+            value = merge_values(base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING))
+            if value is not _MISSING:
+                merged[key] = value
+        return merged
+    if isinstance(ours, list) and isinstance(theirs, list):
+        base = base if isinstance(base, list) else []
+        removed = [item for item in base if item not in theirs]
+        added = [item for item in theirs if item not in base and item not in ours]
+        return [item for item in ours if item not in removed] + added
+    return ours
+
+
+class SharedJsonFile:
+    """A JSON document that several CroqLI processes read and write.
+
+    Every write holds the flock on `<path>.lock` and bumps a version counter kept
+    in that lock file. If the version (or the file's mtime, for edits made outside
+    CroqLI) moved since this process last synced, the file is re-read and our
+    changes are three-way merged onto it against the last synced copy, so
+    concurrent sessions never drop each other's updates.
+    """
+
+    def __init__(self, path, default):
+        self.path = Path(path)
+        self.default = default
+        self.base = None
+        self.stamp = None
+
+    def _read(self):
+        try:
+            return json.loads(self.path.read_bytes())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return copy.deepcopy(self.default)
+
+    def _stamp(self, lock_file):
+        lock_file.seek(0)
+        try:
+            counter = int(lock_file.read() or 0)
+        except ValueError:
+            counter = 0
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        return counter, mtime
+
+    def changed(self) -> bool:
+        """Whether another writer touched the file since we last synced with it."""
+        with file_lock(self.path) as lock_file:
+            return self._stamp(lock_file) != self.stamp
+
+    def load(self):
+        with file_lock(self.path) as lock_file:
+            data = self._read()
+            self.stamp = self._stamp(lock_file)
+        self.base = copy.deepcopy(data)
+        return data
+
+    def save(self, data) -> Tuple[Any, bool]:
+        """Write `data`, merged with concurrent changes if there were any.
+
+        Returns the data as written and whether the file was rewritten; nothing is
+        written when neither this process nor another one changed anything, unless
+        the file does not exist yet (a save of the defaults creates it).
+        """
+        with file_lock(self.path) as lock_file:
+            stamp = self._stamp(lock_file)
+            if stamp == self.stamp and data == self.base and stamp[1] is not None:
+                return data, False
+            if stamp != self.stamp:
+                base = self.base if self.base is not None else type(data)()
+                data = merge_values(base, data, self._read())
+            atomic_write(self.path, json.dumps(data, indent=2).encode())
+            lock_file.truncate(0)
+            lock_file.write(str(stamp[0] + 1))
+            lock_file.flush()
+            self.stamp = self._stamp(lock_file)
+        self.base = copy.deepcopy(data)
+        return data, True
+
+
+HISTORY_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+HISTORY_BLOCK_SIZE = 64 * 1024
+
+
+def _history_timestamp(line: bytes) -> datetime:
+    """Parse the leading timestamp of a history line; malformed lines sort first."""
+    try:
+        return datetime.strptime(line[:19].decode(), HISTORY_TIMESTAMP_FORMAT)
+    except ValueError:
+        return datetime.min
+
+
+class CommandHistoryFile:
+    """Append-only command history file that is queried without reading it whole.
+
+    Appends go through a buffered writer that is flushed every `flush_every` entries
+    and fsynced at most every `fsync_interval` seconds (and on close). Reads scan
+    fixed-size blocks backwards from the end of the file, and time-range queries
+    binary-search byte offsets, relying on entries being appended in time order.
+    """
+
+    def __init__(self, file_path: Path, flush_every: int = 32, fsync_interval: float = 5.0):
+        self.file_path = Path(file_path)
+        self.flush_every = flush_every
+        self.fsync_interval = fsync_interval
+        self._writer = None
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        self._lock = threading.Lock()
+
+    def append(self, command: str, result: str, timestamp: Optional[datetime] = None) -> None:
+        """Queue one entry; newlines are escaped so every entry stays on one line."""
+        timestamp = (timestamp or datetime.now()).strftime(HISTORY_TIMESTAMP_FORMAT)
+        command = command.replace("\n", "\\n")
+        result = str(result).replace("\n", "\\n")
+        with self._lock:
+            if self._writer is None:
+                self.file_path.parent.mkdir(parents=True, exist_ok=True)
+                self._writer = self.file_path.open('a', buffering=HISTORY_BLOCK_SIZE)
+            self._writer.write(f"{timestamp} | Command: {command} | Result: {result}\n")
+            self._pending += 1
+            if self._pending >= self.flush_every or time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._flush_locked(fsync=time.monotonic() - self._last_fsync >= self.fsync_interval)
+
+    def flush(self, fsync: bool = False) -> None:
+        with self._lock:
+            self._flush_locked(fsync)
+
+    def _flush_locked(self, fsync: bool) -> None:
+        if self._writer is None:
+            return
+        self._writer.flush()
+        self._pending = 0
+        if fsync:
+            os.fsync(self._writer.fileno())
+            self._last_fsync = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked(fsync=True)
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def _iter_reversed(self):
+        """Yield complete lines (as bytes, without newline) from the end of the file backwards."""
+        self.flush()
+        if not self.file_path.exists():
+            return
+        with self.file_path.open('rb') as file:
+            position = file.seek(0, os.SEEK_END)
+            remainder = b""
+            while position > 0:
+                size = min(HISTORY_BLOCK_SIZE, position)
+                position -= size
+                file.seek(position)
+                lines = (file.read(size) + remainder).split(b"\n")
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line:
+                        yield line
+            if remainder:
+                yield remainder
+
+    def tail(self, num_entries: int = 100) -> List[str]:
+        """The last `num_entries` entries, oldest first."""
+        entries = []
+        for line in self._iter_reversed():
+            if len(entries) >= num_entries:
+                break
+            entries.append(line.decode(errors="replace"))
+        return entries[::-1]
+
+    def search(self, keyword: str, limit: int = 100) -> List[str]:
+        """Up to `limit` most recent entries containing `keyword` (case-insensitive), newest first."""
+        needle = keyword.lower().encode()
+        matches = []
+        for line in self._iter_reversed():
+            if needle in line.lower():
+                matches.append(line.decode(errors="replace"))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def between(self, start: datetime, end: datetime) -> List[str]:
+        """Entries with start <= timestamp <= end, oldest first."""
+        self.flush()
+        if not self.file_path.exists():
+            return []
+        with self.file_path.open('rb') as file:
+            size = file.seek(0, os.SEEK_END)
+
+            def line_start(offset: int) -> int:
+                # Offset of the first line beginning at or after `offset`
+                if offset == 0:
+                    return 0
+                file.seek(offset - 1)
+                file.readline()
+                return file.tell()
+
+            low, high = 0, size
+            while low < high:
+                middle = (low + high) // 2
+                file.seek(line_start(middle))
+                line = file.readline()
+                if not line or _history_timestamp(line) >= start:
+                    high = middle
+                else:
+                    low = middle + 1
+
+            file.seek(line_start(low))
+            entries = []
+            for line in file:
+                if _history_timestamp(line) > end:
+                    break
+                entries.append(line.rstrip(b"\n").decode(errors="replace"))
+            return entries
+
+
+_history_files: Dict[Path, CommandHistoryFile] = {}
+
+
+def get_command_history_file(file_path: Path) -> CommandHistoryFile:
+    """Shared writer per history path, flushed and fsynced at interpreter exit."""
+    file_path = Path(file_path)
+    if file_path not in _history_files:
+        history_file = CommandHistoryFile(file_path)
+        atexit.register(history_file.close)
+        _history_files[file_path] = history_file
+    return _history_files[file_path]
+
 def append_to_command_history(file_path: Path, command: str, result: str) -> None:
     """Append a command and its result to the command history file."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with file_path.open('a') as file:
-        file.write(f"{timestamp} | Command: {command} | Result: {result}\n")
+    get_command_history_file(file_path).append(command, result)
 
 def read_command_history(file_path: Path, num_entries: int = 100) -> List[str]:
     """Read the last N entries from the command history file."""
-    with file_path.open('r') as file:
-        lines = file.readlines()
-    return lines[-num_entries:]
+    return get_command_history_file(file_path).tail(num_entries)
+
+CHEAT_SHEET_FLUSH_DELAY = 2.0  # seconds of quiet before queued changes are written
+
+
+# Every live CheatSheet, flushed by one exit hook; held weakly so short-lived instances don't pile up
+_open_cheat_sheets = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_cheat_sheets():
+    for cheat_sheet in list(_open_cheat_sheets):
+        cheat_sheet.flush()
+
 
 class CheatSheet:
-    def __init__(self, file_path):
-        self.file_path = Path(file_path)
-        self.data = self.load()
+    """The JSON cheat sheet, persisted write-behind.
 
-    def load(self):
-        if self.file_path.exists():
-            return self.read_json_file()
-        return {
+    `save()` only marks the sheet dirty and arms a timer, so a burst of mutations
+    becomes one write `flush_delay` seconds later (or at exit). The file is a
+    SharedJsonFile: writes are atomic, skipped when nothing changed, and merged
+    with whatever other CroqLI sessions wrote in the meantime. The timer flushes
+    from its own thread, so change `data` through `update()` and `replace()`,
+    which hold the lock.
+    """
+
+    def __init__(self, file_path, flush_delay: float = CHEAT_SHEET_FLUSH_DELAY):
+        self.file_path = Path(file_path)
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._timer = None
+        self._dirty = False
+        self._file = SharedJsonFile(self.file_path, default={
             "os": "",
             "shell": "",
             "package_manager": "",
@@ -46,34 +361,91 @@ class CheatSheet:
             "error_handling": {},
             "context_specific": {},
             "shortcuts": {}
-        }
+        })
+        self.version = 0  # bumped whenever data changes, so derived indexes know when to rebuild
+        self.data = self.load()
+        _open_cheat_sheets.add(self)
+
+    def load(self):
+        return self._file.load()
 
     def save(self):
-        self.write_json_file(self.data)
+        """Queue the current data to be written; repeated calls coalesce into one write."""
+        with self._lock:
+            self._dirty = True
+            self.version += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
 
-    def read_json_file(self) -> Dict[str, Any]:
-        """Read and return the contents of the JSON file."""
-        with self.file_path.open('r') as file:
-            return json.load(file)
+    def update(self, values: Dict[str, Any], category: Optional[str] = None) -> bool:
+        """Set several keys (inside `category` if given) and queue a save; safe from other threads.
+
+        Values equal to the current ones are skipped, so an update that changes
+        nothing neither bumps `version` nor schedules a write. Returns whether anything changed.
+        """
+        with self._lock:
+            current = (self.data.get(category) or {}) if category else self.data
+            changed = {key: value for key, value in values.items() if key not in current or current[key] != value}
+            if not changed:
+                return False
+            target = self.data.setdefault(category, {}) if category else self.data
+            target.update(changed)
+            self.save()
+            return True
+
+    def replace(self, data: Dict[str, Any]):
+        """Swap in new data wholesale and queue a save."""
+        with self._lock:
+            self.data = data
+            self.save()
+
+    def flush(self) -> bool:
+        """Write pending changes now, merged with other sessions' changes. Returns True if the file was rewritten."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return False
+            snapshot = copy.deepcopy(self.data)
+            try:
+                data, written = self._file.save(snapshot)
+            except Exception:
+                self._dirty = True  # keep the change for the next save or the exit flush
+                raise
+            self._dirty = False
+            if data is not snapshot:
+                # Merged with another session's changes
+                self.data = data
+                self.version += 1
+            return written
+
+    def refresh(self) -> bool:
+        """Pick up changes other sessions wrote; pending local changes are merged in on the next flush instead."""
+        with self._lock:
+            if self._dirty or not self._file.changed():
+                return False
+            self.data = self.load()
+            self.version += 1
+            return True
 
-    def write_json_file(self, data: Dict[str, Any]) -> None:
-        """Write data to the JSON file."""
-        with self.file_path.open('w') as file:
-            json.dump(data, file, indent=2)
     def view(self):
         print(json.dumps(self.data, indent=2))
 
     def edit_manually(self):
         print("Editing cheat sheet manually...")
-        for category in self.data:
+        for category in list(self.data):
             print(f"\nEditing {category}:")
+            values = {}
             while True:
                 key = input("Enter key (or press Enter to finish this category): ")
                 if not key:
                     break
-                value = input("Enter value: ")
-                self.data[category][key] = value
-        self.save()
+                values[key] = input("Enter value: ")
+            if values:
+                self.update(values, category)
 
     def edit_ai_assisted(self, llm_function):
         print("Editing cheat sheet with AI assistance...")
@@ -87,47 +459,41 @@ class CheatSheet:
         print("\nAI Suggestion:")
         print(suggestion)
         
+        import inquirer
         apply_changes = inquirer.confirm("Do you want to apply these changes?", default=True)
         if apply_changes:
             # Here you would parse the AI's suggestion and apply it to self.data
             # For simplicity, let's just add it as a new entry in "ai_suggestions"
-            if "ai_suggestions" not in self.data:
-                self.data["ai_suggestions"] = {}
-            self.data["ai_suggestions"][datetime.now().isoformat()] = suggestion
-            self.save()
+            self.update({datetime.now().isoformat(): suggestion}, "ai_suggestions")
             print("Changes applied.")
         else:
             print("Changes discarded.")
 
     def update_auto_run(self, config):
         print("Automatically updating cheat sheet...")
-        # Implement auto-update logic
-        # For example, updating the installed apps:
-        import subprocess
-        try:
-            result = subprocess.run(['brew', 'list'], capture_output=True, text=True)
-            if result.returncode == 0:
-                brew_list = result.stdout.strip().split('\n')
-                self.data['installed_apps']['brew'] = brew_list
-                self.save()
-                print("Updated brew list in cheat sheet.")
-        except FileNotFoundError:
-            print("Brew is not installed or not in PATH.")
+        from src.services.inventory import InventoryCollector
+        diffs = InventoryCollector(self, ttls=config.inventory_ttls).collect(force=True)
+        for diff in diffs:
+            print(f"Updated {diff.source}: {len(diff.added)} added, {len(diff.removed)} removed.")
+        if not diffs:
+            print("Cheat sheet is already up to date.")
 
     def add_category(self, category_name):
         if category_name not in self.data:
-            self.data[category_name] = {}
-            self.save()
+            self.update({category_name: {}})
             print(f"Category '{category_name}' added.")
         else:
             print(f"Category '{category_name}' already exists.")
 
     def get_context(self):
-        return self.data
+        """A deep copy of the data, taken under the lock so background updates cannot change it mid-read."""
+        with self._lock:
+            return copy.deepcopy(self.data)
 
 
 # Example usage
 if __name__ == "__main__":
+    from src.config import Config
     config = Config()
     cheat_sheet_path = config.cheat_sheet_path
     command_history_path = config.command_history_path
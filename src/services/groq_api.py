@@ -1,29 +1,66 @@
 # src/services/groq_api.py
 
+import logging
 from groq import Groq
-from src.models.models import LLMModelParams, ChatMessage
+from src.models.models import LLMModelParams, ChatMessage, StreamMetrics
 from src.config import load_config
-from typing import List
+from src.services.llm_backend import GroqBackend
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
 
 class GroqService:
-    def __init__(self):
-        self.config = load_config()
-        self.client = Groq(api_key=self.config.groq_api_key)
-        self.model_params = LLMModelParams(
+    """Chat-facing completions: applies the configured model settings to ChatMessage lists.
+
+    Requests go through an LLMBackend, by default Groq's SDK; the registry passes
+    whichever backend LLM_PROVIDER selects, and a ModelRouter that may pick a
+    different model per request.
+    """
+
+    def __init__(self, config=None, http_client=None, backend=None, router=None):
+        self.config = config or load_config()
+        self.backend = backend or GroqBackend(Groq(api_key=self.config.groq_api_key, http_client=http_client))
+        self.router = router
+        self.last_metrics: Optional[StreamMetrics] = None
+
+    @property
+    def client(self):
+        """The provider client behind the backend (the Groq SDK client by default)."""
+        return self.backend.client
+
+    @property
+    def model_params(self) -> LLMModelParams:
+        """Current model settings, read from the shared config so reloads and menu changes apply."""
+        return LLMModelParams(
             model_name=self.config.groq_model,
             max_tokens=self.config.max_tokens,
             temperature=self.config.temperature,
             top_p=self.config.top_p
         )
 
-    def generate_response(self, messages: List[ChatMessage]) -> str:
-        response = self.client.chat.completions.create(
-            model=self.model_params.model_name,
+    def _request(self, messages: List[ChatMessage], task: str = "chat") -> dict:
+        params = self.model_params
+        request = dict(
+            model=params.model_name,
             messages=[{"role": msg.role, "content": msg.content} for msg in messages],
-            max_tokens=self.model_params.max_tokens,
-            temperature=self.model_params.temperature,
-            top_p=self.model_params.top_p
+            max_tokens=params.max_tokens,
+            temperature=params.temperature,
+            top_p=params.top_p
         )
-        return response.choices[0].message.content
+        return self.router.route(task, request) if self.router else request
+
+    def generate_response(self, messages: List[ChatMessage], task: str = "chat") -> str:
+        return self.backend.complete(**self._request(messages, task))
+
+    def stream_response(self, messages: List[ChatMessage]) -> Iterator[str]:
+        """An iterator of content deltas; latency metrics go to `last_metrics`.
+
+        The request is routed before this returns, so `last_metrics.model_name`
+        already names the model that will answer.
+        """
+        request = self._request(messages)
+        metrics = StreamMetrics(model_name=request["model"])
+        self.last_metrics = metrics
+        return self.backend.stream(metrics, **request)
 
 # You can add more GROQ-related functions here as needed
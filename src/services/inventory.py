@@ -0,0 +1,177 @@
+# src/services/inventory.py
+
+import asyncio
+import logging
+import os
+import platform
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from src.models.models import InventoryDiff
+from src.services.path_index import get_path_index
+
+DEFAULT_TTLS = {"system": 24 * 3600, "brew": 3600, "apt": 3600, "pip": 1800}
+SOURCE_TIMEOUT = 60.0
+
+
+def _lines(output: str) -> List[str]:
+    return [line.strip() for line in output.splitlines() if line.strip()]
+
+
+def _pip_names(output: str) -> List[str]:
+    return [line.split("==")[0] for line in _lines(output) if not line.startswith("-e ")]
+
+
+# source -> (program that must be installed, argv, parser for stdout). argv[0] is run as the
+# program found through the PATH index, so pip lists the user's python3, not CroqLI's own environment.
+PACKAGE_SOURCES = {
+    "brew": ("brew", ["brew", "list", "-1"], _lines),
+    "apt": ("dpkg-query", ["dpkg-query", "-W", "-f", "${Package}\\n"], _lines),
+    "pip": ("python3", ["python3", "-m", "pip", "list", "--format=freeze", "--disable-pip-version-check"], _pip_names),
+}
+PACKAGE_MANAGERS = ("brew", "apt", "dnf", "pacman", "zypper", "apk")
+
+
+def collect_system_facts() -> Dict[str, str]:
+    """OS, shell and package manager, gathered in-process."""
+    path_index = get_path_index()
+    package_manager = next((pm for pm in PACKAGE_MANAGERS if path_index.is_installed(pm)), "")
+    return {
+        "os": platform.system().lower(),
+        "shell": os.path.basename(os.getenv("SHELL", "/bin/bash")),
+        "package_manager": package_manager,
+    }
+
+
+async def _run(argv: List[str]) -> Optional[str]:
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+    except OSError:
+        return None
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout=SOURCE_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None
+    return stdout.decode(errors="replace") if process.returncode == 0 else None
+
+
+class InventoryCollector:
+    """Keeps the cheat sheet's system facts and package inventories fresh in the background.
+
+    Each source has its own TTL. A pass runs every due source concurrently,
+    diffs the result against what the cheat sheet already holds and writes only
+    the sources that changed, through the cheat sheet's write-behind `save()`.
+    `start()` runs passes on a daemon thread so the prompt loop never waits on
+    `brew list` and friends.
+    """
+
+    def __init__(self, cheat_sheet, ttls: Optional[Dict[str, float]] = None,
+                 on_change: Optional[Callable[[List[InventoryDiff]], None]] = None):
+        self.cheat_sheet = cheat_sheet
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.on_change = on_change
+        self.collected_at: Dict[str, float] = {}
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pass_lock = threading.Lock()
+
+    def available_sources(self) -> List[str]:
+        path_index = get_path_index()
+        sources = ["system"]
+        for source, (program, _, _) in PACKAGE_SOURCES.items():
+            if program is None or path_index.is_installed(program):
+                sources.append(source)
+        return sources
+
+    def due_sources(self, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        return [s for s in self.available_sources() if now - self.collected_at.get(s, 0) >= self.ttls.get(s, 3600)]
+
+    async def _collect_source(self, source: str):
+        if source == "system":
+            return collect_system_facts()
+        program, argv, parse = PACKAGE_SOURCES[source]
+        if program is not None:
+            path = get_path_index().which(program)
+            if path is None:
+                return None
+            argv = [path] + argv[1:]
+        output = await _run(argv)
+        return None if output is None else sorted(set(parse(output)))
+
+    async def _collect_async(self, sources: List[str]) -> Dict[str, object]:
+        results = await asyncio.gather(*(self._collect_source(source) for source in sources))
+        return dict(zip(sources, results))
+
+    def _apply(self, source: str, result) -> Optional[InventoryDiff]:
+        if source == "system":
+            changed = {key: value for key, value in result.items() if self.cheat_sheet.data.get(key) != value}
+            if changed:
+                self.cheat_sheet.update(changed)
+            return InventoryDiff(source=source, added=sorted(f"{k}={v}" for k, v in changed.items())) if changed else None
+        previous = set(self.cheat_sheet.data.get("installed_apps", {}).get(source) or [])
+        added, removed = sorted(set(result) - previous), sorted(previous - set(result))
+        if not added and not removed:
+            return None
+        self.cheat_sheet.update({source: result}, category="installed_apps")
+        return InventoryDiff(source=source, added=added, removed=removed)
+
+    def collect(self, force: bool = False) -> List[InventoryDiff]:
+        """Run one pass over the due sources (all of them with `force`) and return what changed."""
+        with self._pass_lock:
+            sources = self.available_sources() if force else self.due_sources()
+            if not sources:
+                return []
+            results = asyncio.run(self._collect_async(sources))
+            now = time.time()
+            diffs = []
+            for source, result in results.items():
+                if result is None:
+                    logging.info(f"Inventory source {source} failed; will retry after its TTL")
+                else:
+                    diff = self._apply(source, result)
+                    if diff:
+                        logging.info(f"Inventory {source}: +{len(diff.added)} -{len(diff.removed)}")
+                        diffs.append(diff)
+                self.collected_at[source] = now
+        if diffs and self.on_change:
+            self.on_change(diffs)
+        return diffs
+
+    def _next_due_in(self) -> float:
+        now = time.time()
+        waits = [self.collected_at.get(s, 0) + self.ttls.get(s, 3600) - now for s in self.available_sources()]
+        return max(1.0, min(waits)) if waits else 3600.0
+
+    def _run_loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.collect()
+            except Exception as e:
+                logging.warning(f"Inventory collection failed: {e}")
+            self._wake.wait(self._next_due_in())
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="inventory-collector", daemon=True)
+            self._thread.start()
+
+    def refresh(self, *sources: str) -> None:
+        """Mark sources (default: all) stale and wake the background thread."""
+        for source in sources or list(self.collected_at):
+            self.collected_at.pop(source, None)
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,166 @@
+# src/services/llm_backend.py
+
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional, Tuple
+import httpx
+from src.models.models import StreamMetrics
+
+logger = logging.getLogger(__name__)
+
+# (content delta or None, completion tokens reported by the provider or None)
+StreamChunk = Tuple[Optional[str], Optional[int]]
+
+
+class LLMBackend(ABC):
+    """One chat-completions endpoint, whichever provider is behind it.
+
+    Requests are OpenAI-style keyword arguments (messages as role/content dicts,
+    model, temperature, max_tokens, top_p, response_format), and every backend
+    answers with plain strings, so callers never touch a provider SDK.
+    Subclasses implement `complete`, `acomplete` and `_stream_chunks`.
+    """
+
+    name = "llm"
+
+    @abstractmethod
+    def complete(self, **request) -> str:
+        ...
+
+    @abstractmethod
+    async def acomplete(self, **request) -> str:
+        ...
+
+    @abstractmethod
+    def _stream_chunks(self, request: dict) -> Iterator[StreamChunk]:
+        ...
+
+    def stream(self, metrics: Optional[StreamMetrics] = None, **request) -> Iterator[str]:
+        """Yield content deltas as they arrive, filling `metrics` with TTFT, token count and total time."""
+        metrics = metrics if metrics is not None else StreamMetrics(model_name=request.get("model", ""))
+        start = time.perf_counter()
+        chunk_count = 0
+        usage = None
+        for delta, completion_tokens in self._stream_chunks(request):
+            # Providers report exact usage on the final chunk; fall back to counting deltas.
+            if completion_tokens is not None:
+                usage = completion_tokens
+            if not delta:
+                continue
+            if metrics.ttft is None:
+                metrics.ttft = time.perf_counter() - start
+            chunk_count += 1
+            yield delta
+
+        metrics.total_time = time.perf_counter() - start
+        metrics.completion_tokens = usage if usage is not None else chunk_count
+        logger.info(
+            f"Stream finished: backend={self.name}, model={metrics.model_name}, ttft={metrics.ttft}, "
+            f"tokens={metrics.completion_tokens}, tokens_per_second={metrics.tokens_per_second:.1f}"
+        )
+
+    def close(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        self.close()
+
+
+class GroqBackend(LLMBackend):
+    """Groq through its SDK clients (sync for chat and the CLI, async for search fan-out)."""
+
+    name = "groq"
+
+    def __init__(self, client, async_client=None):
+        self.client = client
+        self.async_client = async_client
+
+    def complete(self, **request) -> str:
+        return self.client.chat.completions.create(**request).choices[0].message.content
+
+    async def acomplete(self, **request) -> str:
+        if self.async_client is None:
+            raise RuntimeError("GroqBackend was created without an async client")
+        response = await self.async_client.chat.completions.create(**request)
+        return response.choices[0].message.content
+
+    def _stream_chunks(self, request: dict) -> Iterator[StreamChunk]:
+        for chunk in self.client.chat.completions.create(stream=True, **request):
+            x_groq = getattr(chunk, "x_groq", None)
+            usage = getattr(x_groq, "usage", None) if x_groq is not None else None
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            yield delta, usage.completion_tokens if usage is not None else None
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server speaking the OpenAI chat-completions API (OpenAI, Groq's REST API,
+    vLLM, llama.cpp, Ollama, FakeLLMServer), over plain httpx.
+
+    Pass the registry's transports to share its connection pools; without them
+    the backend owns its own clients and `close()` releases them.
+    """
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, name: str = "openai",
+                 transport: Optional[httpx.HTTPTransport] = None,
+                 async_transport: Optional[httpx.AsyncHTTPTransport] = None, timeout: float = 60.0):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._owns_transports = transport is None
+        self.client = httpx.Client(base_url=self.base_url, headers=headers, transport=transport, timeout=timeout)
+        self.async_client = httpx.AsyncClient(
+            base_url=self.base_url, headers=headers, transport=async_transport, timeout=timeout
+        )
+
+    def complete(self, **request) -> str:
+        response = self.client.post("/chat/completions", json=request)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def acomplete(self, **request) -> str:
+        response = await self.async_client.post("/chat/completions", json=request)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    def _stream_chunks(self, request: dict) -> Iterator[StreamChunk]:
+        with self.client.stream("POST", "/chat/completions", json={**request, "stream": True}) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage") or {}
+                choices = chunk.get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                yield delta, usage.get("completion_tokens")
+
+    def close(self) -> None:
+        # Clients built on the registry's shared transports are closed with the registry
+        if not self._owns_transports:
+            return
+        self.client.close()
+        if self.async_client.is_closed:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("close() called from a running event loop; await aclose() instead")
+        try:
+            asyncio.run(self.async_client.aclose())
+        except RuntimeError as e:
+            # Its connections belong to an event loop that has already closed
+            logger.warning(f"Could not close the {self.name} async client ({e}); await aclose() on the loop that used it")
+
+    async def aclose(self) -> None:
+        """Close both clients; await it on the event loop that ran acomplete(), which owns the async connections."""
+        if self._owns_transports:
+            self.client.close()
+            await self.async_client.aclose()
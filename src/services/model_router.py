@@ -0,0 +1,182 @@
+# src/services/model_router.py
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from src.models.models import StreamMetrics
+from src.services.llm_backend import LLMBackend
+from src.services.tokens import count_message_tokens
+
+logger = logging.getLogger(__name__)
+
+# Models per task in order of preference: small and fast first where a small model does the job.
+# Chat is pinned to GROQ_MODEL unless MODEL_ROUTING_CHAT is on, and then starts from it (see ModelRouter.candidates).
+TASK_MODELS = {
+    "command": ["llama3-8b-8192", "gemma-7b-it", "llama3-70b-8192", "mixtral-8x7b-32768"],
+    "summarize": ["llama3-8b-8192", "mixtral-8x7b-32768", "llama3-70b-8192", "gemma-7b-it"],
+}
+DEFAULT_CONTEXT_LIMIT = 8192
+# Room that must be left for the answer when checking whether a prompt fits a model
+MIN_COMPLETION_TOKENS = 256
+LATENCY_WINDOW = 50
+LATENCY_MAX_AGE = 300.0  # seconds; older samples are forgotten so a model that was slow gets retried
+MIN_SAMPLES = 3
+
+# The task of the request being routed in this thread or asyncio task; set by ModelRouter.route()
+# and read by LatencyTrackingBackend, which only sees the provider request
+_current_task: ContextVar[str] = ContextVar("llm_task", default="chat")
+
+
+class LatencyTracker:
+    """Rolling latency samples per (task, model): the last `window` requests, no older than `max_age` seconds.
+
+    Tasks are kept apart because they measure different things (chat streams
+    record time to first token, commands and summaries the whole call), so long
+    summaries never count against a model's command budget.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW, max_age: float = LATENCY_MAX_AGE):
+        self.window = window
+        self.max_age = max_age
+        self._samples: Dict[Tuple[str, str], deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, task: str, model: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault((task, model), deque(maxlen=self.window)).append((time.monotonic(), seconds))
+
+    def percentiles(self, task: str, model: str, *qs: float) -> Optional[Tuple[float, ...]]:
+        """The q-th percentiles (0-1) of one snapshot of recent latencies, or None with fewer than MIN_SAMPLES."""
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            samples = sorted(seconds for at, seconds in self._samples.get((task, model), ()) if at >= cutoff)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return tuple(samples[min(len(samples) - 1, int(q * len(samples)))] for q in qs)
+
+    def percentile(self, task: str, model: str, q: float) -> Optional[float]:
+        stats = self.percentiles(task, model, q)
+        return stats[0] if stats else None
+
+    def p50(self, task: str, model: str) -> Optional[float]:
+        return self.percentile(task, model, 0.5)
+
+    def p95(self, task: str, model: str) -> Optional[float]:
+        return self.percentile(task, model, 0.95)
+
+
+class ModelRouter:
+    """Chooses the model for each request from the config's model table.
+
+    For a task ("command", "chat" or "summarize") the candidates are its models
+    in order of preference. Models whose context limit cannot hold the prompt
+    plus room for the answer are skipped, and so are models whose rolling p95
+    latency for the task is over the task's budget; if every model that fits is over budget,
+    the lowest p50 wins. Models without enough samples count as fast, so they
+    get tried. max_tokens is clamped to what the chosen model has left.
+    With `enabled=False`, and for chat unless `config.model_routing_chat` is set,
+    the model is left alone and only max_tokens is clamped.
+    """
+
+    def __init__(self, config, tracker: Optional[LatencyTracker] = None, enabled: bool = True):
+        self.config = config
+        self.tracker = tracker or LatencyTracker()
+        self.enabled = enabled
+
+    def context_limit(self, model: str) -> int:
+        return self.config.model_max_tokens.get(model, DEFAULT_CONTEXT_LIMIT)
+
+    def candidates(self, task: str) -> List[str]:
+        limits = self.config.model_max_tokens
+        if task in TASK_MODELS:
+            return [model for model in TASK_MODELS[task] if model in limits]
+        # Chat: the user's model first, then the others from the smallest context up
+        others = sorted((model for model in limits if model != self.config.groq_model), key=limits.get)
+        return [self.config.groq_model] + others
+
+    def choose(self, task: str, prompt_tokens: int) -> str:
+        candidates = self.candidates(task)
+        fitting = [m for m in candidates if self.context_limit(m) >= prompt_tokens + MIN_COMPLETION_TOKENS]
+        if not fitting:
+            return max(candidates, key=self.context_limit)
+        budget = self.config.router_latency_budgets.get(task)
+        # One (p50, p95) snapshot per model, so samples ageing out mid-decision cannot leave a p50 of None
+        stats = {model: self.tracker.percentiles(task, model, 0.5, 0.95) for model in fitting}
+        for model in fitting:
+            if stats[model] is None or budget is None or stats[model][1] <= budget:
+                return model
+        return min(fitting, key=lambda model: stats[model][0] if stats[model] else math.inf)
+
+    def routes(self, task: str) -> bool:
+        """Whether `task` gets a model chosen for it; chat keeps GROQ_MODEL unless MODEL_ROUTING_CHAT is on."""
+        return self.enabled and (task != "chat" or self.config.get('model_routing_chat', False))
+
+    def route(self, task: str, request: dict) -> dict:
+        """Return a copy of `request` with the model chosen for `task` and a max_tokens that fits it.
+
+        Also marks the current context with `task`, so the latency of the call that
+        follows is recorded under it.
+        """
+        _current_task.set(task)
+        prompt_tokens = sum(count_message_tokens(m["role"], m["content"]) for m in request["messages"])
+        model = self.choose(task, prompt_tokens) if self.routes(task) else request["model"]
+        routed = dict(request, model=model)
+        if "max_tokens" in request:
+            routed["max_tokens"] = max(1, min(request["max_tokens"], self.context_limit(model) - prompt_tokens))
+        if model != request["model"]:
+            logger.info(f"Routed {task} request ({prompt_tokens} prompt tokens) to {model}")
+        return routed
+
+
+class LatencyTrackingBackend(LLMBackend):
+    """Wraps a backend and records each request's latency under its task and model.
+
+    complete()/acomplete() record the whole call, stream() the time to the first
+    token; failed calls are recorded too, so a timing-out model gets routed around.
+    The task is the one the last ModelRouter.route() call in this context set.
+    """
+
+    def __init__(self, backend: LLMBackend, tracker: LatencyTracker):
+        self.backend = backend
+        self.tracker = tracker
+        self.name = backend.name
+
+    @property
+    def client(self):
+        return self.backend.client
+
+    def complete(self, **request) -> str:
+        start = time.perf_counter()
+        try:
+            return self.backend.complete(**request)
+        finally:
+            self.tracker.record(_current_task.get(), request.get("model", ""), time.perf_counter() - start)
+
+    async def acomplete(self, **request) -> str:
+        start = time.perf_counter()
+        try:
+            return await self.backend.acomplete(**request)
+        finally:
+            self.tracker.record(_current_task.get(), request.get("model", ""), time.perf_counter() - start)
+
+    def stream(self, metrics: Optional[StreamMetrics] = None, **request):
+        metrics = metrics if metrics is not None else StreamMetrics(model_name=request.get("model", ""))
+        start = time.perf_counter()
+        try:
+            yield from self.backend.stream(metrics, **request)
+        finally:
+            ttft = metrics.ttft if metrics.ttft is not None else time.perf_counter() - start
+            self.tracker.record(_current_task.get(), request.get("model", ""), ttft)
+
+    def _stream_chunks(self, request: dict):
+        return self.backend._stream_chunks(request)
+
+    def close(self) -> None:
+        self.backend.close()
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
@@ -0,0 +1,129 @@
+# src/services/path_index.py
+
+import bisect
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# How long a scan is trusted before the PATH directories' mtimes are checked again
+RECHECK_INTERVAL = 1.0
+
+
+def _scan_directory(directory: str) -> List[str]:
+    """Executable names in one PATH directory (without extension on Windows)."""
+    names = []
+    extensions = [ext.lower() for ext in os.environ.get("PATHEXT", "").split(os.pathsep) if ext] if os.name == "nt" else []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_file():
+                        continue
+                    if extensions:
+                        stem, ext = os.path.splitext(entry.name)
+                        if ext.lower() in extensions:
+                            names.append(stem)
+                    elif entry.stat().st_mode & 0o111:
+                        names.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return names
+
+
+class PathIndex:
+    """In-process index of the executables on PATH, replacing `which` subprocesses.
+
+    Each PATH directory is scanned once with `os.scandir` and rescanned only when
+    its mtime changes (checked at most every RECHECK_INTERVAL seconds) or PATH
+    itself changes. Lookups are a dict hit; prefix completion is a bisect over
+    the sorted names.
+    """
+
+    def __init__(self, path: Optional[str] = None, recheck_interval: float = RECHECK_INTERVAL):
+        self._fixed_path = path
+        self.recheck_interval = recheck_interval
+        self._lock = threading.Lock()
+        self._path = None
+        self._directories: Dict[str, Tuple[float, List[str]]] = {}
+        self._locations: Dict[str, str] = {}
+        self._sorted_names: List[str] = []
+        self._checked_at = 0.0
+
+    def _current_path(self) -> str:
+        return self._fixed_path if self._fixed_path is not None else os.environ.get("PATH", os.defpath)
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        path = self._current_path()
+        if path == self._path and now - self._checked_at < self.recheck_interval:
+            return
+        self._checked_at = now
+        directories = list(dict.fromkeys(d for d in path.split(os.pathsep) if d))
+        changed = path != self._path
+        for directory in directories:
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                mtime = None
+            cached = self._directories.get(directory)
+            if cached is None or cached[0] != mtime:
+                self._directories[directory] = (mtime, _scan_directory(directory) if mtime is not None else [])
+                changed = True
+        if not changed:
+            return
+        self._path = path
+        for directory in set(self._directories) - set(directories):
+            del self._directories[directory]
+        # Earlier PATH entries win, as with `which`
+        locations = {}
+        for directory in reversed(directories):
+            for name in self._directories[directory][1]:
+                locations[name] = directory
+        self._locations = locations
+        self._sorted_names = sorted(locations)
+
+    def which(self, program: str) -> Optional[str]:
+        """Full path of `program` as the shell would resolve it, or None."""
+        if os.sep in program or (os.altsep and os.altsep in program):
+            return program if os.path.isfile(program) and os.access(program, os.X_OK) else None
+        with self._lock:
+            self._refresh()
+            directory = self._locations.get(program)
+        return os.path.join(directory, program) if directory else None
+
+    def is_installed(self, program: str) -> bool:
+        return self.which(program) is not None
+
+    def complete(self, prefix: str, limit: int = 50) -> List[str]:
+        """Installed program names starting with `prefix`, alphabetically."""
+        with self._lock:
+            self._refresh()
+            names = self._sorted_names
+            start = bisect.bisect_left(names, prefix)
+            matches = []
+            for name in names[start:start + limit]:
+                if not name.startswith(prefix):
+                    break
+                matches.append(name)
+            return matches
+
+    def installed(self, programs) -> List[str]:
+        """The subset of `programs` that are installed, in the given order."""
+        return [program for program in programs if self.is_installed(program)]
+
+
+_path_index = None
+
+
+def get_path_index() -> PathIndex:
+    global _path_index
+    if _path_index is None:
+        _path_index = PathIndex()
+    return _path_index
+
+
+def is_installed(program: str) -> bool:
+    return get_path_index().is_installed(program)
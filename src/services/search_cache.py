@@ -0,0 +1,43 @@
+# src/services/search_cache.py
+
+from pathlib import Path
+from typing import Optional
+from src.services.cache import SQLiteLRUCache
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as part of the cache key."""
+    return " ".join(query.lower().split())
+
+
+class SearchCache(SQLiteLRUCache):
+    """Persistent Tavily result cache with TTL expiry and size-bounded LRU eviction.
+
+    Entries are keyed on (normalized query, search depth, max tokens) and stored in
+    SQLite, so repeats are served from disk across sessions without touching the API.
+    Merged summaries are stored alongside under the user's original query, so a
+    repeat skips sub-query generation and summarization as well.
+    """
+
+    def __init__(self, path: Path, ttl: float = 3600, max_entries: int = 500):
+        super().__init__(path, "search_cache", ttl=ttl, max_entries=max_entries)
+
+    @staticmethod
+    def make_key(query: str, search_depth: str, max_tokens: int) -> str:
+        return f"{normalize_query(query)}\x1f{search_depth}\x1f{max_tokens}"
+
+    def get(self, query: str, search_depth: str, max_tokens: int) -> Optional[str]:
+        return super().get(self.make_key(query, search_depth, max_tokens))
+
+    def put(self, query: str, search_depth: str, max_tokens: int, context: str) -> None:
+        super().put(self.make_key(query, search_depth, max_tokens), context)
+
+    @classmethod
+    def make_summary_key(cls, query: str, search_depth: str, max_tokens: int, model: str, subqueries: int) -> str:
+        return f"summary\x1f{cls.make_key(query, search_depth, max_tokens)}\x1f{model}\x1f{subqueries}"
+
+    def get_summary(self, query: str, search_depth: str, max_tokens: int, model: str, subqueries: int) -> Optional[str]:
+        return super().get(self.make_summary_key(query, search_depth, max_tokens, model, subqueries))
+
+    def put_summary(self, query: str, search_depth: str, max_tokens: int, model: str, subqueries: int, summary: str) -> None:
+        super().put(self.make_summary_key(query, search_depth, max_tokens, model, subqueries), summary)
@@ -0,0 +1,114 @@
+# src/services/search_engine.py
+
+import asyncio
+import json
+from src.services.clients import get_client_registry
+
+
+class AsyncSearchEngine:
+    """Fan out several Tavily queries at once and summarize each result concurrently.
+
+    Sub-queries are opt-in (`config.search_subqueries`, default 0); when enabled,
+    the user's own query is fetched while they are still being generated.
+
+    Wall time is roughly that of the slowest query/summary pair instead of the sum,
+    with at most `config.search_concurrency` requests in flight per stage.
+    """
+
+    def __init__(self, config, clients=None):
+        self.config = config
+        self.clients = clients or get_client_registry(config)
+
+    def search(self, query):
+        """Blocking entry point for the synchronous UI loop."""
+        return self.clients.run_async(self.search_async(query))
+
+    async def search_async(self, query):
+        cache, settings = self.clients.search_cache, self.summary_settings()
+        summary = cache.get_summary(query, *settings) if cache else None
+        if summary is not None:
+            return summary
+        semaphore = asyncio.Semaphore(max(1, self.config.get('search_concurrency', 4)))
+        # The user's own query starts right away; sub-queries join once generated
+        main = asyncio.ensure_future(self.search_one(query, semaphore))
+        subqueries = await self.generate_subqueries(query)
+        results = await asyncio.gather(
+            main, *(self.search_one(q, semaphore) for q in subqueries), return_exceptions=True
+        )
+        found = [(q, r) for q, r in zip([query] + subqueries, results) if isinstance(r, str) and r]
+        if not found:
+            error = next((r for r in results if isinstance(r, Exception)), None)
+            return f"An error occurred during the search: {str(error) if error else 'no results'}"
+        summary = self.merge_summaries(found)
+        # Sub-queries differ between runs, so the merged answer is cached under the user's query;
+        # partial results are left uncached so a later search can fill the gaps
+        if cache and not any(isinstance(r, Exception) for r in results):
+            cache.put_summary(query, *settings, summary)
+        return summary
+
+    def summary_settings(self):
+        """Everything besides the query that shapes a merged summary."""
+        return (self.config.get('tavily_search_depth'), self.config.get('tavily_max_tokens'),
+                self.config.get('groq_model'), self.config.get('search_subqueries', 0))
+
+    async def search_one(self, query, semaphore):
+        """Fetch and summarize one query; None when Tavily has nothing for it."""
+        context = await self.fetch_context(query, semaphore)
+        if not context:
+            return None
+        return await self.summarize(context, semaphore)
+
+    async def generate_subqueries(self, query):
+        """Ask the LLM for a few complementary search queries; failures just mean no sub-queries."""
+        count = self.config.get('search_subqueries', 0)
+        if count <= 0:
+            return []
+        prompt = (
+            f"Write up to {count} short web search queries that cover different aspects of: {query}\n"
+            'Reply with JSON in the form {"queries": ["..."]}.'
+        )
+        try:
+            # Short structured output, like command translation
+            response = await self.clients.llm_backend.acomplete(**self.clients.model_router.route("command", dict(
+                messages=[{"role": "user", "content": prompt}],
+                model=self.config.get('groq_model'),
+                temperature=0.2,
+                max_tokens=256,
+                response_format={"type": "json_object"}
+            )))
+            subqueries = json.loads(response).get("queries", [])
+        except Exception:
+            return []
+        return [q for q in subqueries if isinstance(q, str) and q.strip() and q != query][:count]
+
+    async def fetch_context(self, query, semaphore):
+        depth, max_tokens = self.config.get('tavily_search_depth'), self.config.get('tavily_max_tokens')
+        cache = self.clients.search_cache
+        context = cache.get(query, depth, max_tokens) if cache else None
+        if context is not None:
+            return context
+        async with semaphore:
+            context = await self.clients.async_tavily_client.get_search_context(
+                query=query,
+                search_depth=depth,
+                max_tokens=max_tokens
+            )
+        if cache:
+            cache.put(query, depth, max_tokens, context)
+        return context
+
+    async def summarize(self, context, semaphore):
+        async with semaphore:
+            return await self.clients.llm_backend.acomplete(**self.clients.model_router.route("summarize", dict(
+                messages=[{"role": "user", "content": f"Summarize the following information: {context}"}],
+                model=self.config.get('groq_model'),
+                max_tokens=self.config.get('max_tokens'),
+                temperature=self.config.get('temperature'),
+                top_p=self.config.get('top_p')
+            )))
+
+    @staticmethod
+    def merge_summaries(summaries):
+        if len(summaries) == 1:
+            return summaries[0][1]
+        return "\n\n".join(f"### {query}\n\n{summary}" for query, summary in summaries)
@@ -0,0 +1,146 @@
+# src/services/session_store.py
+
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+from src.models.models import SessionEntry
+
+COLUMNS = "id, session, kind, created_at, title, body, success, detail"
+# Wrap matched terms in search snippets; control characters cannot clash with text or Rich markup
+MATCH_START, MATCH_END = "\x02", "\x03"
+
+
+def fts_query(text: str, any_term: bool = False) -> str:
+    """Turn free text into a safe FTS5 query; the last term also matches as a prefix."""
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return (" OR " if any_term else " ").join(quoted)
+
+
+class SessionStore:
+    """Local SQLite store of CLI commands, chat exchanges and search results.
+
+    The database runs in WAL mode so appends from one mode never block reads from
+    another, and an FTS5 index over titles and bodies answers "search my past
+    sessions" and similar-command lookups without scanning the history.
+    """
+
+    def __init__(self, path: Path, session: Optional[str] = None):
+        self.path = Path(path)
+        self.session = session or uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS entries (
+                   id INTEGER PRIMARY KEY,
+                   session TEXT NOT NULL,
+                   kind TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   title TEXT NOT NULL,
+                   body TEXT NOT NULL,
+                   success INTEGER,
+                   detail TEXT
+               );
+               CREATE INDEX IF NOT EXISTS entries_kind_time ON entries (kind, created_at);
+               CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+                   title, body, content='entries', content_rowid='id'
+               );
+               CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+                   INSERT INTO entries_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+               END;
+               CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+                   INSERT INTO entries_fts (entries_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+               END;"""
+        )
+        self._conn.commit()
+
+    def add(self, kind: str, title: str, body: str, success: Optional[bool] = None,
+            detail: Optional[str] = None) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO entries (session, kind, created_at, title, body, success, detail) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.session, kind, time.time(), title, body, None if success is None else int(success), detail)
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def add_command(self, user_prompt: str, command: str, success: bool,
+                    output: Optional[str] = None, error: Optional[str] = None) -> int:
+        return self.add("command", user_prompt, command, success, output if success else error)
+
+    def add_chat_turn(self, user_input: str, response: str) -> int:
+        return self.add("chat", user_input, response)
+
+    def add_search(self, query: str, result: str) -> int:
+        return self.add("search", query, result)
+
+    @staticmethod
+    def _entry(row, snippet: str = "") -> SessionEntry:
+        id, session, kind, created_at, title, body, success, detail = row
+        return SessionEntry(
+            id=id, session=session, kind=kind, created_at=created_at, title=title, body=body,
+            success=None if success is None else bool(success), detail=detail, snippet=snippet
+        )
+
+    def search(self, text: str, kind: Optional[str] = None, limit: int = 20) -> List[SessionEntry]:
+        """Best-matching entries for `text` across all sessions, ranked by BM25."""
+        query = fts_query(text)
+        if not query:
+            return []
+        sql = (
+            f"SELECT {', '.join('e.' + c for c in COLUMNS.split(', '))}, "
+            f"snippet(entries_fts, -1, '{MATCH_START}', '{MATCH_END}', '...', 12) "
+            "FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+            "WHERE entries_fts MATCH ?"
+        )
+        params = [query]
+        if kind:
+            sql += " AND e.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY bm25(entries_fts) LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._entry(row[:-1], row[-1]) for row in rows]
+
+    def similar_commands(self, user_prompt: str, limit: int = 5) -> List[str]:
+        """Distinct successful commands whose prompts share terms with `user_prompt`."""
+        query = fts_query(user_prompt, any_term=True)
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT e.body FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+                "WHERE entries_fts MATCH ? AND e.kind = 'command' AND e.success = 1 "
+                "ORDER BY bm25(entries_fts) LIMIT ?",
+                ("title : (" + query + ")", limit * 5)
+            ).fetchall()
+        # bm25() cannot be aggregated, so repeated commands are collapsed here
+        return list(dict.fromkeys(row[0] for row in rows))[:limit]
+
+    def recent(self, kind: Optional[str] = None, limit: int = 20) -> List[SessionEntry]:
+        """Most recent entries first."""
+        sql = f"SELECT {COLUMNS} FROM entries"
+        params = []
+        if kind:
+            sql += " WHERE kind = ?"
+            params.append(kind)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -3,16 +3,22 @@ from src.config import load_config
 from tavily import TavilyClient
 
 class TavilyService:
-    def __init__(self):
-        self.config = load_config()
-        self.client = TavilyClient(api_key=self.config.tavily_api_key)
+    def __init__(self, config=None, session=None, cache=None):
+        self.config = config or load_config()
+        self.client = TavilyClient(api_key=self.config.tavily_api_key, session=session)
+        self.cache = cache
 
     def perform_search(self, query: str) -> SearchResult:
-        context = self.client.get_search_context(
-            query=query,
-            search_depth=self.config.tavily_search_depth,
-            max_tokens=self.config.tavily_max_tokens
-        )
+        depth, max_tokens = self.config.tavily_search_depth, self.config.tavily_max_tokens
+        context = self.cache.get(query, depth, max_tokens) if self.cache else None
+        if context is None:
+            context = self.client.get_search_context(
+                query=query,
+                search_depth=depth,
+                max_tokens=max_tokens
+            )
+            if self.cache:
+                self.cache.put(query, depth, max_tokens, context)
         return SearchResult(query=query, context=context, summary="")  # Summary can be filled later if needed
 
 # You can add more Tavily-related functions here as needed^
\ No newline at end of file
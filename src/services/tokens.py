@@ -0,0 +1,59 @@
+# src/services/tokens.py
+
+import math
+from functools import lru_cache
+from typing import Iterable
+from src.models.models import ChatMessage, TokenUsage
+
+# Per-message overhead of the chat format (role markers and separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+MESSAGE_CACHE_SIZE = 4096
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """Load a tiktoken encoding once; None when tiktoken or its BPE file is unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in `text`, approximating at ~4 characters per token without tiktoken."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+@lru_cache(maxsize=MESSAGE_CACHE_SIZE)
+def count_chat_message(message: ChatMessage) -> int:
+    """Token count of one message; cached on the (frozen, hashable) message itself."""
+    return count_tokens(message.role) + count_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_message_tokens(role: str, content: str) -> int:
+    return count_chat_message(ChatMessage(role=role, content=content))
+
+
+def count_messages(messages: Iterable[ChatMessage]) -> int:
+    return sum(count_chat_message(message) for message in messages)
+
+
+def measure_prompt(system_prompt: str = "", cheat_sheet_context: str = "", history: Iterable[ChatMessage] = ()) -> TokenUsage:
+    """Break a request's input tokens down into system prompt, cheat sheet context and history."""
+    return TokenUsage(
+        system_prompt=count_message_tokens("system", system_prompt) if system_prompt else 0,
+        cheat_sheet=count_tokens(cheat_sheet_context),
+        history=count_messages(history)
+    )
@@ -0,0 +1,1048 @@
+# test_services.py
+
+import asyncio
+import json
+import os
+import sys
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from src.models.models import ChatMessage
+from src.services.groq_api import GroqService
+from src.config import Config
+
+@pytest.fixture
+def mock_groq_service():
+    with patch('src.services.groq_api.load_config', return_value=Config()):
+        with patch('src.services.groq_api.Groq') as mock_groq:
+            mock_client = MagicMock()
+            mock_groq.return_value = mock_client
+            yield GroqService()
+
+def make_chunk(content, usage=None):
+    chunk = MagicMock()
+    chunk.choices[0].delta.content = content
+    chunk.x_groq = MagicMock(usage=usage) if usage else None
+    return chunk
+
+def test_groq_service_stream_response(mock_groq_service):
+    mock_messages = [ChatMessage(role="user", content="Hello")]
+    mock_groq_service.client.chat.completions.create.return_value = iter([
+        make_chunk("Hel"), make_chunk("lo"), make_chunk(None, usage=MagicMock(completion_tokens=7))
+    ])
+
+    deltas = list(mock_groq_service.stream_response(mock_messages))
+
+    assert deltas == ["Hel", "lo"]
+    assert mock_groq_service.client.chat.completions.create.call_args.kwargs['stream'] is True
+    metrics = mock_groq_service.last_metrics
+    assert metrics.ttft is not None
+    assert metrics.completion_tokens == 7
+    assert metrics.tokens_per_second > 0
+
+def test_groq_service_stream_response_counts_deltas_without_usage(mock_groq_service):
+    mock_messages = [ChatMessage(role="user", content="Hello")]
+    mock_groq_service.client.chat.completions.create.return_value = iter([
+        make_chunk("a"), make_chunk("b"), make_chunk("c")
+    ])
+
+    assert "".join(mock_groq_service.stream_response(mock_messages)) == "abc"
+    assert mock_groq_service.last_metrics.completion_tokens == 3
+
+# Tests for ClientRegistry
+def test_client_registry_shares_one_pool():
+    from src.services.clients import ClientRegistry
+    config = Config()
+    config.groq_api_key = "test_groq_key"
+    config.tavily_api_key = "test_tavily_key"
+    registry = ClientRegistry(config)
+    try:
+        assert registry.groq_service is registry.groq_service
+        assert registry.tavily_service is registry.tavily_service
+        assert registry.groq_service.client._client is registry.http_client
+        assert registry.tavily_service.client.session is registry.requests_session
+        assert registry.rest_client._transport is registry.http_client._transport
+    finally:
+        registry.close()
+
+# Tests for AsyncSearchEngine
+class FakeAsyncClients:
+    def __init__(self, delay=0.2, subquery_delay=0):
+        self.delay = delay
+        self.subquery_delay = subquery_delay
+        self.fetched = []
+        self.search_cache = None
+        self.llm_backend = MagicMock()
+        self.llm_backend.acomplete = self.complete
+        self.model_router = MagicMock()
+        self.model_router.route.side_effect = lambda task, request: request
+        self.async_tavily_client = MagicMock()
+        self.async_tavily_client.get_search_context = self.get_search_context
+
+    def run_async(self, coro, timeout=None):
+        return asyncio.run(coro)
+
+    async def complete(self, messages, response_format=None, **kwargs):
+        if response_format:
+            await asyncio.sleep(self.subquery_delay)
+            self.fetched_before_subqueries = list(self.fetched)
+            return json.dumps({"queries": ["sub one", "sub two"]})
+        await asyncio.sleep(self.delay)
+        return f"summary of {messages[0]['content'][-10:]}"
+
+    async def get_search_context(self, query, **kwargs):
+        self.fetched.append(query)
+        await asyncio.sleep(self.delay)
+        return f"context {query}"
+
+def test_async_search_engine_fans_out_concurrently():
+    from src.services.search_engine import AsyncSearchEngine
+    config = Config()
+    config.search_subqueries = 2
+    config.search_concurrency = 4
+    engine = AsyncSearchEngine(config, FakeAsyncClients(delay=0.2))
+
+    start = time.perf_counter()
+    result = engine.search("main query")
+    elapsed = time.perf_counter() - start
+
+    assert "### main query" in result
+    assert "### sub one" in result
+    assert "### sub two" in result
+    assert elapsed < 0.8  # three sequential fetch+summarize pairs would take 1.2s
+
+def test_async_search_engine_fetches_main_query_while_generating_subqueries():
+    from src.services.search_engine import AsyncSearchEngine
+    config = Config()
+    config.search_subqueries = 2
+    clients = FakeAsyncClients(delay=0.2, subquery_delay=0.2)
+
+    result = AsyncSearchEngine(config, clients).search("main query")
+
+    assert clients.fetched_before_subqueries == ["main query"]
+    assert "### sub two" in result
+
+def test_async_search_engine_subqueries_are_opt_in():
+    from src.services.search_engine import AsyncSearchEngine
+    clients = FakeAsyncClients(delay=0)
+    result = AsyncSearchEngine(Config(), clients).search("main query")
+    assert clients.fetched == ["main query"]
+    assert "###" not in result
+
+def test_async_search_engine_skips_failed_queries():
+    from src.services.search_engine import AsyncSearchEngine
+    config = Config()
+    config.search_subqueries = 0
+    clients = FakeAsyncClients(delay=0)
+
+    async def failing_search(query, **kwargs):
+        raise RuntimeError("quota exceeded")
+    clients.async_tavily_client.get_search_context = failing_search
+
+    result = AsyncSearchEngine(config, clients).search("main query")
+    assert result == "An error occurred during the search: quota exceeded"
+
+def test_async_search_engine_caches_merged_summary_under_user_query(tmp_path):
+    from src.services.search_cache import SearchCache
+    from src.services.search_engine import AsyncSearchEngine
+    config = Config()
+    config.search_subqueries = 2
+    clients = FakeAsyncClients(delay=0)
+    clients.search_cache = SearchCache(tmp_path / "cache.db")
+    engine = AsyncSearchEngine(config, clients)
+
+    first = engine.search("main query")
+    clients.llm_backend.acomplete = MagicMock(side_effect=AssertionError("LLM called on a cache hit"))
+    clients.async_tavily_client.get_search_context = MagicMock(side_effect=AssertionError("Tavily called"))
+    assert engine.search("Main  query") == first
+    assert "### sub one" in first
+
+# Tests for SearchCache
+def test_search_cache_hit_after_put(tmp_path):
+    from src.services.search_cache import SearchCache
+    cache = SearchCache(tmp_path / "cache.db")
+    assert cache.get("What is Groq?", "advanced", 1500) is None
+    cache.put("What is Groq?", "advanced", 1500, "context")
+
+    assert cache.get("  what IS groq? ", "advanced", 1500) == "context"
+    assert cache.get("what is groq?", "basic", 1500) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 0, "entries": 1}
+
+def test_search_cache_expires_and_evicts_lru(tmp_path):
+    from src.services.search_cache import SearchCache
+    cache = SearchCache(tmp_path / "cache.db", ttl=60, max_entries=2)
+    with patch('src.services.cache.time.time', return_value=1000.0):
+        cache.put("a", "basic", 100, "A")
+    with patch('src.services.cache.time.time', return_value=1001.0):
+        cache.put("b", "basic", 100, "B")
+    with patch('src.services.cache.time.time', return_value=1002.0):
+        assert cache.get("a", "basic", 100) == "A"  # "b" is now least recently used
+        cache.put("c", "basic", 100, "C")
+        assert cache.get("b", "basic", 100) is None
+    assert cache.evictions == 1
+    with patch('src.services.cache.time.time', return_value=2000.0):
+        assert cache.get("c", "basic", 100) is None
+
+def test_tavily_service_uses_cache(tmp_path):
+    from src.services.search_cache import SearchCache
+    from src.services.tavily_api import TavilyService
+    with patch('src.services.tavily_api.TavilyClient') as mock_tavily:
+        mock_tavily.return_value.get_search_context.return_value = "fresh context"
+        service = TavilyService(config=Config(), cache=SearchCache(tmp_path / "cache.db"))
+        first = service.perform_search("groq latency")
+        second = service.perform_search("Groq  latency")
+
+    assert first.context == second.context == "fresh context"
+    assert mock_tavily.return_value.get_search_context.call_count == 1
+
+# Tests for CompletionCache
+def make_completion_client(content):
+    client = MagicMock()
+    client.complete.return_value = content
+    return client
+
+def test_completion_cache_reuses_low_temperature_completions(tmp_path):
+    from src.services.completion_cache import CompletionCache
+    cache = CompletionCache(tmp_path / "completions.db", max_temperature=0.2)
+    client = make_completion_client('{"command": "du -sh * | sort -h"}')
+    request = dict(messages=[{"role": "user", "content": "list big files here"}], model="m", temperature=0.1)
+
+    assert cache.complete(client, **request) == '{"command": "du -sh * | sort -h"}'
+    assert cache.complete(client, **request) == '{"command": "du -sh * | sort -h"}'
+    assert client.complete.call_count == 1
+
+    # A fresh instance still finds the answer on disk
+    assert CompletionCache(tmp_path / "completions.db").complete(client, **request) == '{"command": "du -sh * | sort -h"}'
+    assert client.complete.call_count == 1
+
+    cache.invalidate(request)
+    cache.complete(client, **request)
+    assert client.complete.call_count == 2
+
+def test_completion_cache_skips_high_temperature_and_opt_out(tmp_path):
+    from src.services.completion_cache import CompletionCache
+    client = make_completion_client("creative")
+    hot = dict(messages=[{"role": "user", "content": "a poem"}], model="m", temperature=0.7)
+    cache = CompletionCache(tmp_path / "completions.db", max_temperature=0.2)
+    cache.complete(client, **hot)
+    cache.complete(client, **hot)
+    assert client.complete.call_count == 2
+
+    cold = dict(hot, temperature=0.0)
+    disabled = CompletionCache(tmp_path / "disabled.db", enabled=False)
+    disabled.complete(client, **cold)
+    disabled.complete(client, **cold)
+    assert client.complete.call_count == 4
+
+# Tests for ContextWindow
+@pytest.fixture
+def budget_config():
+    config = Config()
+    config.groq_model = "llama3-8b-8192"
+    config.context_history_budget = 100
+    return config
+
+def test_context_window_drops_oldest_turns_over_budget(budget_config):
+    from src.services.context_window import ContextWindow
+    window = ContextWindow(budget_config)
+    for i in range(10):
+        window.add("user", f"question {i} " + "x" * 80)
+        window.add("assistant", f"answer {i} " + "y" * 80)
+
+    messages = window.messages("Be brief.", "next question")
+
+    assert window.summary_tokens + window.history_tokens <= 100
+    assert messages[0].content == "Be brief."
+    assert messages[-1].content == "next question"
+    assert messages[-2].content.startswith("answer 9")
+    assert not any(m.content.startswith("question 0") for m in messages)
+
+def test_context_window_rolls_evicted_turns_into_summary(budget_config):
+    from src.services.context_window import ContextWindow
+    summarizer = MagicMock(return_value="short summary")
+    window = ContextWindow(budget_config, summarizer=summarizer)
+    for i in range(10):
+        window.add("user", f"question {i} " + "x" * 80)
+
+    messages = window.messages("", "next question")
+
+    summarizer.assert_called_once()
+    assert summarizer.call_args.args[1][0].content.startswith("question 0")
+    assert messages[0].content == "Summary of the earlier conversation: short summary"
+    # Trimmed below the budget, so the next turn fits without another summary call
+    window.add("assistant", "ok")
+    window.messages("", "another question")
+    summarizer.assert_called_once()
+
+# Tests for token counting
+def test_count_chat_message_is_cached_per_message():
+    from src.services import tokens
+    message = ChatMessage(role="user", content="count me once")
+    tokens.count_chat_message.cache_clear()
+    with patch('src.services.tokens.count_tokens', wraps=tokens.count_tokens) as mock_count:
+        first = tokens.count_chat_message(message)
+        second = tokens.count_chat_message(ChatMessage(role="user", content="count me once"))
+    assert first == second > tokens.MESSAGE_OVERHEAD_TOKENS
+    assert mock_count.call_count == 2  # role + content, computed only for the first lookup
+
+def test_measure_prompt_breaks_down_totals():
+    from src.services.tokens import measure_prompt, count_message_tokens, count_tokens
+    history = [ChatMessage(role="user", content="hi"), ChatMessage(role="assistant", content="hello there")]
+    usage = measure_prompt("You are helpful.", '{"os": "linux"}', history)
+    assert usage.system_prompt == count_message_tokens("system", "You are helpful.")
+    assert usage.cheat_sheet == count_tokens('{"os": "linux"}')
+    assert usage.history == count_message_tokens("user", "hi") + count_message_tokens("assistant", "hello there")
+    assert usage.total == usage.system_prompt + usage.cheat_sheet + usage.history
+
+# Tests for the streaming command runner
+def test_run_command_streams_lines_as_they_arrive():
+    from src.services.command_runner import run_command
+    seen = []
+    stdout, stderr, exit_code = run_command(
+        "echo one; echo oops >&2; echo two; exit 3", on_line=lambda stream, line: seen.append((stream, line))
+    )
+    assert (stdout, stderr, exit_code) == ("one\ntwo", "oops", 3)
+    assert ("stdout", "one") in seen and ("stderr", "oops") in seen
+
+def test_run_command_timeout_kills_the_whole_command():
+    from src.services.command_runner import run_command, TIMEOUT_EXIT_CODE
+    start = time.perf_counter()
+    stdout, stderr, exit_code = run_command("echo started; sleep 5 | cat", on_line=None, timeout=0.3)
+    assert time.perf_counter() - start < 2
+    assert stdout == "started"
+    assert exit_code == TIMEOUT_EXIT_CODE
+    assert "timed out" in stderr
+
+def test_run_command_keeps_terminal_session_unless_timed():
+    from src.services.command_runner import run_command
+    session_command = f"{sys.executable} -c 'import os; print(os.getsid(0))'"
+    assert run_command(session_command, on_line=None)[0] == str(os.getsid(0))
+    assert run_command(session_command, on_line=None, timeout=5)[0] != str(os.getsid(0))
+
+def test_run_command_caps_captured_output():
+    from src.services.command_runner import run_command
+    stdout, _, exit_code = run_command("yes line | head -n 100000", on_line=None, max_output_bytes=1000)
+    assert exit_code == 0
+    assert stdout.startswith("... (")
+    assert len(stdout) < 1100
+
+# Tests for the command history ring buffer
+def test_command_history_evicts_oldest_and_unindexes_it():
+    from src.services.command_history import CommandHistory
+    history = CommandHistory(maxlen=2)
+    history.add("list files", "ls -l", True)
+    history.add("show disk usage", "df -h", True)
+    history.add("list processes", "ps aux", False, error="boom")
+    assert [h.command for h in history] == ["df -h", "ps aux"]
+    assert [h.command for h in history.search_prompts("LIST")] == ["ps aux"]
+    assert [h.command for h in history.recent(5)] == ["df -h", "ps aux"]
+    assert history.recent(1)[0]['error'] == "boom"
+
+def test_command_history_substring_and_prefix_lookups():
+    from src.services.command_history import CommandHistory
+    history = CommandHistory(maxlen=10)
+    history.add("find python files", "find . -name '*.py'", True)
+    history.add("count lines", "wc -l *.py", True)
+    history.add("find big files", "find . -size +10M", True)
+    assert [h.command for h in history.search_prompts("find")] == ["find . -name '*.py'", "find . -size +10M"]
+    assert [h.command for h in history.search_prompts("s")] == [h.command for h in history]
+    assert history.search_prompts("missing") == []
+    assert [h.command for h in history.commands_with_prefix("find . -s")] == ["find . -size +10M"]
+    assert [h.command for h in history.search_commands(".py")] == ["find . -name '*.py'", "wc -l *.py"]
+    history.resize(1)
+    assert len(history) == 1 and history.search_commands(".py") == []
+
+# Tests for the persistent command history file
+def test_command_history_file_tail_and_search_read_from_the_end(tmp_path):
+    from src.services.file_service import CommandHistoryFile, HISTORY_BLOCK_SIZE
+    history_file = CommandHistoryFile(tmp_path / "history.txt", flush_every=1000)
+    total = HISTORY_BLOCK_SIZE // 20 * 3  # spans several read blocks
+    for i in range(total):
+        history_file.append(f"echo {i}", "ok\nmultiline")
+    assert history_file.tail(2)[1].endswith(f"Command: echo {total - 1} | Result: ok\\nmultiline")
+    assert len(history_file.tail(total + 10)) == total
+    assert [line.split(" | ")[1] for line in history_file.search("ECHO 12", limit=2)] == ["Command: echo 1299", "Command: echo 1298"]
+    history_file.close()
+    assert (tmp_path / "history.txt").read_text().count("\n") == total
+
+def test_command_history_file_time_range_query(tmp_path):
+    from datetime import datetime, timedelta
+    from src.services.file_service import CommandHistoryFile
+    history_file = CommandHistoryFile(tmp_path / "history.txt")
+    start = datetime(2024, 1, 1)
+    for minute in range(500):
+        history_file.append(f"cmd {minute}", "Success", timestamp=start + timedelta(minutes=minute))
+    entries = history_file.between(start + timedelta(minutes=100), start + timedelta(minutes=102))
+    assert [entry.split(" | ")[1] for entry in entries] == ["Command: cmd 100", "Command: cmd 101", "Command: cmd 102"]
+    assert history_file.between(start + timedelta(days=1), start + timedelta(days=2)) == []
+    assert len(history_file.between(start - timedelta(days=1), start)) == 1
+
+# Tests for the session store
+def test_session_store_full_text_search_across_kinds(tmp_path):
+    from src.services.session_store import SessionStore
+    store = SessionStore(tmp_path / "sessions.db", session="one")
+    store.add_command("list docker containers", "docker ps -a", True, output="CONTAINER ID")
+    store.add_command("list docker images", "docker imgs", False, error="unknown command")
+    store.add_chat_turn("how do I prune docker volumes?", "Run `docker volume prune`.")
+    store.add_search("kubernetes release notes", "### kubernetes release notes\n1.30 is out")
+    store.close()
+
+    store = SessionStore(tmp_path / "sessions.db", session="two")
+    assert {entry.kind for entry in store.search("docker")} == {"command", "chat"}
+    assert {entry.body for entry in store.search("dock", kind="command")} == {"docker ps -a", "docker imgs"}
+    hit = store.search("kubernetes release")[0]
+    assert hit.kind == "search" and hit.session == "one" and "\x02kubernetes\x03" in hit.snippet
+    assert store.search('"; DROP TABLE entries; --') == []
+    assert store.similar_commands("show my docker containers") == ["docker ps -a"]
+    assert [entry.kind for entry in store.recent(limit=2)] == ["search", "chat"]
+    store.close()
+
+def test_print_session_entries_escapes_markup_and_styles_matches(tmp_path):
+    from rich.console import Console
+    from src.assistant.history import print_session_entries
+    from src.services.session_store import SessionStore
+    store = SessionStore(tmp_path / "sessions.db")
+    store.add_chat_turn("why does [/INST] show up?", "The [bold] template leaked [/INST] tokens")
+    console = Console(record=True, width=200)
+    print_session_entries(console, store.search("template"))
+    store.close()
+
+    output = console.export_text()
+    assert "[/INST] show up?" in output and "The [bold] template leaked" in output
+    assert "\x02" not in output and "\x03" not in output
+
+def test_highlight_matches_styles_marked_terms():
+    from src.assistant.history import highlight_matches
+    text = highlight_matches("...the \x02template\x03 leaked [/INST]")
+    assert text.plain == "...the template leaked [/INST]"
+    assert [(span.start, span.end, span.style) for span in text.spans] == [(7, 15, "bold yellow")]
+
+def test_client_registry_session_store_can_be_disabled(tmp_path):
+    from src.services.clients import ClientRegistry
+    config = Config()
+    config.session_store_path = tmp_path / "sessions.db"
+    registry = ClientRegistry(config)
+    assert registry.session_store is registry.session_store
+    registry.close()
+    config.session_store_enabled = False
+    assert ClientRegistry(config).session_store is None
+
+# Tests for write-behind cheat sheet persistence
+def test_cheat_sheet_coalesces_saves_into_one_atomic_write(tmp_path):
+    from src.services.file_service import CheatSheet
+    path = tmp_path / "cheatsheet.json"
+    cheat_sheet = CheatSheet(path, flush_delay=60)
+    for i in range(100):
+        cheat_sheet.data["shortcuts"][f"s{i}"] = str(i)
+        cheat_sheet.save()
+    assert not path.exists()
+    with patch("src.services.file_service.os.replace", wraps=os.replace) as replace:
+        assert cheat_sheet.flush() is True
+    replace.assert_called_once()
+    assert json.loads(path.read_text())["shortcuts"]["s99"] == "99"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cheatsheet.json", "cheatsheet.json.lock"]
+
+def test_cheat_sheet_skips_unchanged_content_and_flushes_on_timer(tmp_path):
+    from src.services.file_service import CheatSheet
+    path = tmp_path / "cheatsheet.json"
+    path.write_text(json.dumps({"os": "linux"}, indent=2))
+    cheat_sheet = CheatSheet(path, flush_delay=0.05)
+    cheat_sheet.save()
+    assert cheat_sheet.flush() is False  # same bytes as on disk
+    cheat_sheet.data["os"] = "darwin"
+    cheat_sheet.save()
+    deadline = time.time() + 2
+    while json.loads(path.read_text())["os"] != "darwin" and time.time() < deadline:
+        time.sleep(0.01)
+    assert json.loads(path.read_text())["os"] == "darwin"
+
+def test_cheat_sheet_save_creates_missing_file_with_defaults(tmp_path):
+    from src.services.file_service import CheatSheet
+    path = tmp_path / "cheatsheet.json"
+    cheat_sheet = CheatSheet(path)
+    cheat_sheet.save()
+    assert cheat_sheet.flush() is True  # first run: the defaults equal the base, but there is no file yet
+    assert json.loads(path.read_text()) == cheat_sheet.data and "shortcuts" in cheat_sheet.data
+    cheat_sheet.save()
+    assert cheat_sheet.flush() is False
+
+# Tests for the cheat sheet retrieval index
+def test_cheat_sheet_flush_keeps_changes_when_the_write_fails(tmp_path):
+    import gc
+    import weakref
+    from src.services.file_service import CheatSheet, SharedJsonFile, _open_cheat_sheets
+    path = tmp_path / "cheatsheet.json"
+    cheat_sheet = CheatSheet(path, flush_delay=60)
+    cheat_sheet.update({"os": "darwin"})
+    with patch.object(SharedJsonFile, "save", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            cheat_sheet.flush()
+    cheat_sheet.update({"shell": "zsh"})
+    assert cheat_sheet.flush() is True
+    assert json.loads(path.read_text())["os"] == "darwin"
+    # Exit flushes are tracked weakly instead of one atexit hook per instance
+    assert cheat_sheet in _open_cheat_sheets
+    ref = weakref.ref(cheat_sheet)
+    del cheat_sheet
+    gc.collect()
+    assert ref() is None
+
+def test_cheat_sheet_index_selects_relevant_entries_under_budget(tmp_path):
+    from src.services.file_service import CheatSheet
+    from src.services.cheat_sheet_index import CheatSheetIndex
+    from src.services.tokens import count_tokens
+    cheat_sheet = CheatSheet(tmp_path / "cheatsheet.json", flush_delay=60)
+    cheat_sheet.data.update({"os": "darwin", "shell": "zsh"})
+    cheat_sheet.data["installed_apps"]["brew"] = [f"package{i}" for i in range(2000)] + ["ffmpeg", "imagemagick"]
+    cheat_sheet.data["custom_aliases"]["gs"] = "git status"
+    index = CheatSheetIndex(cheat_sheet, top_k=5, max_tokens=60)
+
+    context = index.context("convert this video with ffmpeg")
+    assert context.splitlines()[:3] == ["- os: darwin", "- shell: zsh", "- installed_apps.brew: ffmpeg"]
+    assert "package1" not in context
+    assert count_tokens(context) <= 60
+    assert "- custom_aliases.gs: git status" in index.context("show git status")
+
+    cheat_sheet.data["custom_aliases"]["ll"] = "ls -la"
+    cheat_sheet.save()
+    assert "ls -la" in index.context("list files with ll")
+    assert cheat_sheet.update({"python": "3.11.4"}, "installed_apps") is True
+    index.context("list files with ll")
+    version = cheat_sheet.version
+    assert cheat_sheet.update({"python": "3.11.4"}, "installed_apps") is False
+    with patch("src.services.cheat_sheet_index.flatten") as flatten:
+        index.context("list files with ll")
+    assert cheat_sheet.version == version and not flatten.called
+    index.max_tokens = 0
+    assert json.loads(index.context("anything"))["shell"] == "zsh"
+
+# Tests for the CLI Assistant system prompt template
+def test_system_prompt_template_keeps_a_stable_prefix():
+    from src.assistant.cli_assistant import SystemPromptTemplate
+    from src.services.command_history import CommandHistory
+    history = CommandHistory(10)
+    template = SystemPromptTemplate("zsh", "darwin")
+    assert "Open Command: open" in template.prefix
+    assert template.render() == template.prefix
+
+    history.add("list", "ls", True)
+    first = template.render(history.recent(3))
+    assert first.startswith(template.prefix) and "Previous Command: ls, Success: True" in first
+    assert template.render(history.recent(3)) is first
+    history.add("oops", "lss", False, error="not found")
+    second = template.render(history.recent(3))
+    assert second.startswith(template.prefix) and second.endswith("Error: not found\n")
+
+def test_cli_assistant_repeated_query_hits_completion_cache(tmp_path):
+    from src.assistant import cli_assistant
+    from src.services.command_history import CommandHistory
+    from src.services.completion_cache import CompletionCache
+    config = Config()
+    config.groq_api_key = "key"
+    config.cli_command_candidates = 1
+    clients = MagicMock()
+    clients.llm_backend.complete.return_value = '{"command": "echo hi"}'
+    clients.completion_cache = CompletionCache(tmp_path / "completions.db")
+    router = MagicMock()
+    router.config.groq_model = "configured-model"
+    # The routed model and the cheat sheet context differ between the two queries
+    models = iter(["model-a", "model-b"])
+    router.route.side_effect = lambda task, request: dict(request, model=next(models))
+    index = MagicMock()
+    index.context.side_effect = ["{}", '{"shell": "zsh"}']
+
+    with patch.object(cli_assistant, "init_cli_assistant"), \
+            patch.object(cli_assistant, "get_client_registry", return_value=clients), \
+            patch.object(cli_assistant, "system_info", MagicMock()), \
+            patch.object(cli_assistant, "model_router", router), \
+            patch.object(cli_assistant, "command_history", CommandHistory(10)), \
+            patch.object(cli_assistant, "CheatSheetIndex", return_value=index), \
+            patch.object(cli_assistant, "execute_command", return_value=("hi", "", 0)), \
+            patch.object(cli_assistant, "history_file", None), patch.object(cli_assistant, "session_store", None), \
+            patch("builtins.input", side_effect=["say hi", "say hi", "exit"]):
+        cli_assistant.cli_assistant_mode(config, MagicMock())
+
+    # The second request carries a history tail the first did not, yet is served from the cache
+    assert clients.llm_backend.complete.call_count == 1
+    assert router.route.call_count == 2
+
+# Tests for parallel candidate validation
+def test_validate_commands_flags_syntax_errors_and_missing_programs():
+    from src.services.command_validator import programs_in, validate_commands, order_candidates
+    assert programs_in("sudo apt install x; cd /tmp && FOO=1 git status | xargs -0 rm") == ["apt", "git", "rm"]
+    assert programs_in("for f in *.py; do wc -l \"$f\"; done") == ["wc"]
+    candidates = validate_commands(["if then fi", "croqli-no-such-tool --help", "ls | wc -l"])
+    assert candidates[0].syntax_error and not candidates[0].valid
+    assert candidates[1].missing_programs == ["croqli-no-such-tool"]
+    assert [c.command for c in order_candidates(candidates)] == ["ls | wc -l", "if then fi", "croqli-no-such-tool --help"]
+
+def test_run_candidates_runs_only_the_best_valid_command():
+    from src.assistant import cli_assistant
+    results = {"ls missing": ("", "ls: missing: No such file or directory", 2), "cat notes.txt": ("notes", "", 0)}
+    with patch.object(cli_assistant, "execute_command", side_effect=lambda c: results[c]) as execute, \
+            patch.object(cli_assistant, "update_command_history") as update:
+        commands = cli_assistant.parse_commands('{"commands": ["if then", "ls missing", "cat notes.txt", "cat notes.txt"]}')
+        success, command, tips = cli_assistant.run_candidates("show notes", commands)
+    assert commands == ["if then", "ls missing", "cat notes.txt"]
+    # The invalid first choice is skipped; the failing runnable one is not followed by another
+    assert (success, command) == (False, "ls missing") and "does not exist" in tips
+    assert [call.args[0] for call in execute.call_args_list] == ["ls missing"]
+    assert update.call_count == 1
+
+def test_commands_are_validated_and_run_with_the_same_shell():
+    from src.assistant import cli_assistant
+    from src.services.command_runner import run_command
+    from src.services.command_validator import validate_commands
+    cli_assistant.command_shell.cache_clear()
+    try:
+        with patch.dict(os.environ, {"SHELL": "/bin/sh"}):
+            shell = cli_assistant.command_shell()
+    finally:
+        cli_assistant.command_shell.cache_clear()
+    assert shell == "/bin/sh"
+    bashism = "[[ -n x ]] && echo yes"
+    assert validate_commands([bashism], shell=shell)[0].valid == (run_command(bashism, on_line=None, shell=shell)[2] == 0)
+    assert run_command("echo $0", on_line=None, shell="/bin/sh")[0] == "/bin/sh"
+
+# Tests for the PATH index
+def test_path_index_lookups_and_mtime_invalidation(tmp_path):
+    from src.services import path_index
+    from src.services.path_index import PathIndex
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    for directory, name in [(first, "croqli-tool"), (second, "croqli-tool"), (second, "croqli-other")]:
+        (directory / name).write_text("#!/bin/sh\n")
+        (directory / name).chmod(0o755)
+    (first / "croqli-data").write_text("not executable")
+    index = PathIndex(path=os.pathsep.join([str(first), str(second)]), recheck_interval=0)
+
+    assert index.which("croqli-tool") == str(first / "croqli-tool")
+    assert not index.is_installed("croqli-data")
+    assert index.complete("croqli-") == ["croqli-other", "croqli-tool"]
+    with patch.object(path_index, "_scan_directory", wraps=path_index._scan_directory) as scan:
+        assert index.is_installed("croqli-other")
+        scan.assert_not_called()  # mtimes unchanged, nothing rescanned
+        (first / "croqli-new").write_text("#!/bin/sh\n")
+        (first / "croqli-new").chmod(0o755)
+        os.utime(first, (time.time() + 5, time.time() + 5))
+        assert index.is_installed("croqli-new")
+        assert scan.call_count == 1
+
+# Tests for the background inventory collector
+def test_inventory_collector_diffs_sources_and_respects_ttls(tmp_path):
+    import sys
+    from src.services import inventory
+    from src.services.file_service import CheatSheet
+    packages_file = tmp_path / "packages.txt"
+    packages_file.write_text("git\njq\n")
+    fake_sources = {"fake": (None, [sys.executable, "-c", f"print(open({str(packages_file)!r}).read())"], inventory._lines)}
+    cheat_sheet = CheatSheet(tmp_path / "cheatsheet.json", flush_delay=60)
+    with patch.dict(inventory.PACKAGE_SOURCES, fake_sources, clear=True):
+        collector = inventory.InventoryCollector(cheat_sheet, ttls={"fake": 3600})
+        diffs = {diff.source: diff for diff in collector.collect()}
+        assert diffs["fake"].added == ["git", "jq"]
+        assert cheat_sheet.data["installed_apps"]["fake"] == ["git", "jq"]
+        assert "system" in diffs and cheat_sheet.data["shell"]
+
+        packages_file.write_text("git\nripgrep\n")
+        assert collector.collect() == []  # within TTL, nothing re-run
+        [diff] = collector.collect(force=True)
+        assert (diff.source, diff.added, diff.removed) == ("fake", ["ripgrep"], ["jq"])
+
+def test_inventory_collector_runs_in_the_background(tmp_path):
+    import sys
+    import threading
+    from src.services import inventory
+    from src.services.file_service import CheatSheet
+    changed = threading.Event()
+    fake_sources = {"fake": (None, [sys.executable, "-c", "print('htop')"], inventory._lines)}
+    cheat_sheet = CheatSheet(tmp_path / "cheatsheet.json", flush_delay=60)
+    with patch.dict(inventory.PACKAGE_SOURCES, fake_sources, clear=True):
+        collector = inventory.InventoryCollector(cheat_sheet, on_change=lambda diffs: changed.set())
+        collector.start()
+        try:
+            assert changed.wait(10)
+        finally:
+            collector.stop(timeout=10)
+    assert cheat_sheet.data["installed_apps"]["fake"] == ["htop"]
+
+def test_inventory_runs_package_tools_found_on_path_and_hands_out_snapshots(tmp_path):
+    from src.services import inventory
+    from src.services.file_service import CheatSheet
+    from src.services.path_index import PathIndex
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    tool = bin_dir / "croqli-python3"
+    tool.write_text("#!/bin/sh\necho requests==2.0\necho rich==13.0\n")
+    tool.chmod(0o755)
+    fake_sources = {"pip": ("croqli-python3", ["croqli-python3", "-m", "pip", "list"], inventory._pip_names)}
+    cheat_sheet = CheatSheet(tmp_path / "cheatsheet.json", flush_delay=60)
+    with patch.dict(inventory.PACKAGE_SOURCES, fake_sources, clear=True), \
+            patch.object(inventory, "get_path_index", return_value=PathIndex(path=str(bin_dir), recheck_interval=0)):
+        collector = inventory.InventoryCollector(cheat_sheet)
+        assert collector.available_sources() == ["system", "pip"]
+        collector.collect()
+    context = cheat_sheet.get_context()
+    assert context["installed_apps"]["pip"] == ["requests", "rich"]
+    cheat_sheet.update({"brew": ["git"]}, "installed_apps")
+    assert "brew" not in context["installed_apps"]
+
+# Tests for Markdown rendering
+MARKDOWN_SAMPLE = (
+    "# Title\n\nPara one\nline two\n\n1. a\n2. b\n\n3. c\n\n```python\nx = 1\n\ny = 2\n```\n\n"
+    "- x\n  - nested\n\n  more\n- y\n\n> quote\n\n---\n\n| a | b |\n|---|---|\n| 1 | 2 |\n\nend"
+)
+
+def test_markdown_block_splitter_handles_fences_and_loose_lists():
+    from src.ui.display import MarkdownBlockSplitter, split_markdown_blocks
+    blocks = split_markdown_blocks(MARKDOWN_SAMPLE)
+    assert blocks[2] == "1. a\n2. b\n\n3. c"
+    assert blocks[3] == "```python\nx = 1\n\ny = 2\n```"
+    splitter = MarkdownBlockSplitter()
+    streamed = []
+    for i in range(0, len(MARKDOWN_SAMPLE), 7):
+        streamed += splitter.feed(MARKDOWN_SAMPLE[i:i + 7])
+        assert "\n".join(streamed + [splitter.tail]).replace("\n", "") == MARKDOWN_SAMPLE[:i + 7].replace("\n", "")
+    assert streamed + splitter.close() == blocks
+
+def test_render_markdown_matches_whole_document_render_on_cached_console():
+    import io
+    from rich.console import Console
+    from rich.markdown import Markdown
+    from src.ui.display import get_console, render_markdown
+    expected = io.StringIO()
+    Console(file=expected, width=60).print(Markdown(MARKDOWN_SAMPLE))
+    config = Config()
+    console = get_console(config)
+    assert get_console(config) is console
+    console.width = 60
+    try:
+        console.file = io.StringIO()
+        render_markdown(MARKDOWN_SAMPLE, config=config)
+        assert console.file.getvalue() == expected.getvalue()
+        console.file = io.StringIO()
+        render_markdown(MARKDOWN_SAMPLE * 40, config=config)
+        assert console.file.getvalue().count("Title") == 40
+    finally:
+        console.file = None
+        console.width = None
+
+def test_streaming_markdown_prints_each_finished_block_once():
+    import io
+    from rich.console import Console
+    from src.ui.display import StreamingMarkdown, render_markdown, split_markdown_blocks
+    console = Console(file=io.StringIO(), width=60)
+    printed = []
+    with patch.object(StreamingMarkdown, "_print_block", lambda self, block: printed.append(block)):
+        with StreamingMarkdown(console, auto_refresh=False) as view:
+            for i in range(0, len(MARKDOWN_SAMPLE), 5):
+                view.update(MARKDOWN_SAMPLE[i:i + 5], refresh=True)
+    assert view.text == MARKDOWN_SAMPLE
+    assert printed == split_markdown_blocks(MARKDOWN_SAMPLE)
+    answer = "Run:\n\n```bash\nls -la\n```\n\ndone"
+    console.file = io.StringIO()
+    with StreamingMarkdown(console) as view:
+        view.update(answer)
+    output = console.file.getvalue()
+    assert "ls -la" in output and "```" not in output and "done" in output
+    # Streamed and non-streamed answers look the same
+    console.file = io.StringIO()
+    render_markdown(answer, console=console)
+    assert console.file.getvalue() == output
+
+def test_streaming_markdown_parses_the_open_block_only_on_refresh():
+    import io
+    from rich.console import Console
+    from src.ui import display
+    console = Console(file=io.StringIO(), width=60, force_terminal=True)
+    with patch.object(display, "_block_renderable", wraps=display._block_renderable) as parse, \
+            patch.object(display, "get_lexer_by_name", wraps=display.get_lexer_by_name) as lexer:
+        with display.StreamingMarkdown(console, auto_refresh=False) as view:
+            for delta in ("```", "b", "a", "sh", "\nls", " -la"):
+                view.update(delta)
+            assert parse.call_count == 0
+            view.update("\n", refresh=True)
+            view.update("", refresh=True)  # unchanged tail: the last parse is reused
+            assert parse.call_count == 1
+    # The partial language names "b" and "ba" were never looked up
+    assert all(call.args[0] not in ("b", "ba") for call in lexer.call_args_list)
+
+def test_fenced_code_drops_closing_and_partial_fences():
+    from src.ui.display import _fenced_code
+    assert _fenced_code("```bash\nls -la\n```") == ("bash", "ls -la")
+    assert _fenced_code("```bash\nls -la\n``") == ("bash", "ls -la")
+    assert _fenced_code("```\necho hi") == ("text", "echo hi")
+
+# Tests for the config snapshot cache
+def test_config_refresh_rereads_files_only_when_they_change(tmp_path, monkeypatch):
+    import src.config as config_module
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("GROQ_MODEL", raising=False)
+    for name in ("_env_mtime", "_env_values", "_env_version"):
+        monkeypatch.setattr(config_module, name, getattr(config_module, name))
+    (tmp_path / ".env").write_text("GROQ_MODEL=llama3-8b-8192\n")
+    (tmp_path / "system_prompts.json").write_text(json.dumps([{"title": "A", "prompt": "a"}]))
+    config = Config()
+    assert config.groq_model == "llama3-8b-8192"
+    assert config.SYSTEM_PROMPTS[0]["title"] == "A"
+
+    with patch("src.config.dotenv_values") as dotenv_values, patch("src.config.open") as mock_open:
+        assert config.refresh() is False
+    dotenv_values.assert_not_called()
+    mock_open.assert_not_called()
+
+    (tmp_path / ".env").write_text("GROQ_MODEL=gemma-7b-it\n")
+    os.utime(tmp_path / ".env", ns=(1, 1))
+    (tmp_path / "system_prompts.json").write_text(json.dumps([{"title": "B", "prompt": "b"}]))
+    os.utime(tmp_path / "system_prompts.json", ns=(1, 1))
+    assert config.refresh() is True
+    assert config.groq_model == "gemma-7b-it"
+    assert config.SYSTEM_PROMPTS[0]["title"] == "B"
+
+    # A second instance sees the reload without reading the file again
+    other = Config()
+    with patch("src.config.dotenv_values") as dotenv_values:
+        assert other.refresh() is False
+    dotenv_values.assert_not_called()
+    assert other.groq_model == "gemma-7b-it"
+
+def test_update_env_file_rewrites_once_and_serializes_concurrent_writers(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from dotenv import dotenv_values
+    import src.config as config_module
+    from src.config import update_env_file
+    env_path = tmp_path / ".env"
+    env_path.write_text("# keys\nGROQ_API_KEY=abc\nexport TOP_P=1.0")
+    with patch("src.config.atomic_write", wraps=config_module.atomic_write) as atomic_write:
+        update_env_file(env_path, {"TOP_P": "0.5", "TEMPERATURE": "it's", "GROQ_MODEL": "gemma-7b-it"})
+    atomic_write.assert_called_once()
+    assert env_path.read_text().startswith("# keys\nGROQ_API_KEY=abc\nTOP_P='0.5'\n")
+    assert dotenv_values(env_path) == {
+        "GROQ_API_KEY": "abc", "TOP_P": "0.5", "TEMPERATURE": "it's", "GROQ_MODEL": "gemma-7b-it"
+    }
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: update_env_file(env_path, {f"KEY_{i}": str(i)}), range(32)))
+    values = dotenv_values(env_path)
+    assert all(values[f"KEY_{i}"] == str(i) for i in range(32))
+
+# Tests for multi-process shared state
+def test_merge_values_keeps_changes_from_both_sides():
+    from src.services.file_service import merge_values
+    base = {"os": "linux", "shortcuts": {"a": "1", "b": "2"}, "apps": ["git", "jq"]}
+    ours = {"os": "linux", "shortcuts": {"a": "10", "b": "2", "c": "3"}, "apps": ["git", "jq", "fd"]}
+    theirs = {"os": "darwin", "shortcuts": {"a": "1"}, "apps": ["jq", "rg"]}
+    assert merge_values(base, ours, theirs) == {
+        "os": "darwin", "shortcuts": {"a": "10", "c": "3"}, "apps": ["jq", "fd", "rg"]
+    }
+    assert merge_values(base, {**base, "os": "bsd"}, theirs)["os"] == "bsd"  # both changed: ours wins
+
+def _add_shortcuts(path, worker, count):
+    from src.services.file_service import CheatSheet
+    cheat_sheet = CheatSheet(path, flush_delay=60)
+    for i in range(count):
+        cheat_sheet.update({f"w{worker}-{i}": str(i)}, category="shortcuts")
+        cheat_sheet.flush()
+
+def test_cheat_sheet_sessions_in_separate_processes_do_not_lose_updates(tmp_path):
+    import multiprocessing
+    from src.services.file_service import CheatSheet
+    path = tmp_path / "cheatsheet.json"
+    workers = [multiprocessing.Process(target=_add_shortcuts, args=(path, w, 20)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+    shortcuts = CheatSheet(path, flush_delay=60).data["shortcuts"]
+    assert len(shortcuts) == 80
+
+def test_cheat_sheet_merges_and_refreshes_other_sessions_changes(tmp_path):
+    from src.services.file_service import CheatSheet
+    path = tmp_path / "cheatsheet.json"
+    first, second = CheatSheet(path, flush_delay=60), CheatSheet(path, flush_delay=60)
+    first.update({"os": "linux"})
+    first.flush()
+    second.data["shortcuts"]["ll"] = "ls -la"
+    second.save()
+    assert second.refresh() is False  # pending local changes are merged on flush instead
+    version = second.version
+    assert second.flush() is True
+    assert second.data["os"] == "linux" and second.version > version
+    assert first.refresh() is True
+    assert first.data["shortcuts"] == {"ll": "ls -la"}
+    assert first.refresh() is False
+
+def test_system_prompt_edits_from_two_sessions_are_merged(tmp_path, monkeypatch):
+    import src.config as config_module
+    monkeypatch.chdir(tmp_path)
+    for name in ("_env_mtime", "_env_values", "_env_version"):
+        monkeypatch.setattr(config_module, name, getattr(config_module, name))
+    (tmp_path / "system_prompts.json").write_text(json.dumps([{"title": "A", "prompt": "a"}]))
+    first, second = Config(), Config()
+    first.SYSTEM_PROMPTS.append({"title": "B", "prompt": "b"})
+    first.save_system_prompts()
+    second.SYSTEM_PROMPTS.append({"title": "C", "prompt": "c"})
+    second.save_system_prompts()
+    titles = [p["title"] for p in json.loads((tmp_path / "system_prompts.json").read_text())]
+    assert titles == ["A", "C", "B"]
+    assert first.refresh() is True
+    assert [p["title"] for p in first.SYSTEM_PROMPTS] == titles
+
+# Tests for LLM backends
+def test_openai_compatible_backend_against_fake_server():
+    from src.models.models import StreamMetrics
+    from src.services.fake_llm_server import FakeLLMServer
+    from src.services.llm_backend import OpenAICompatibleBackend
+    messages = [{"role": "user", "content": "list big files"}]
+    with FakeLLMServer(reply=lambda request: "du -sh * | sort -h") as server:
+        backend = OpenAICompatibleBackend(server.url, api_key="test", name="fake")
+        try:
+            assert backend.complete(messages=messages, model="m", temperature=0.1) == "du -sh * | sort -h"
+            metrics = StreamMetrics(model_name="m")
+            assert list(backend.stream(metrics, messages=messages, model="m")) == ["du ", "-sh ", "* ", "| ", "sort ", "-h"]
+        except BaseException:
+            backend.close()
+            raise
+
+        async def complete_and_close():
+            try:
+                return await backend.acomplete(messages=messages, model="m")
+            finally:
+                await backend.aclose()
+        assert asyncio.run(complete_and_close()) == "du -sh * | sort -h"
+    assert backend.client.is_closed and backend.async_client.is_closed
+    assert metrics.ttft is not None and metrics.completion_tokens == 6
+    assert server.requests[0] == {"messages": messages, "model": "m", "temperature": 0.1}
+    assert server.requests[1]["stream"] is True
+
+def test_llm_backend_subclasses_must_implement_every_method():
+    from src.services.llm_backend import LLMBackend
+    class CompleteOnly(LLMBackend):
+        def complete(self, **request):
+            return ""
+    with pytest.raises(TypeError):
+        CompleteOnly()
+
+def test_registry_routes_every_mode_through_the_configured_backend():
+    from src.services.clients import ClientRegistry
+    config = Config()
+    config.llm_provider = "fake"
+    registry = ClientRegistry(config)
+    try:
+        backend = registry.llm_backend
+        assert backend.name == "fake" and registry.groq_service.backend is backend
+        reply = registry.groq_service.generate_response([ChatMessage(role="user", content="hi")])
+        assert reply == "Echo: hi"
+        assert "".join(registry.groq_service.stream_response([ChatMessage(role="user", content="a b")])) == "Echo: a b"
+        assert registry.groq_service.last_metrics.completion_tokens == 3
+        assert registry.run_async(backend.acomplete(messages=[{"role": "user", "content": "x"}], model="m")) == "Echo: x"
+    finally:
+        registry.close()
+
+# Tests for the model router
+def make_router_config():
+    config = Config()
+    config.groq_model = "llama3-70b-8192"
+    config.router_latency_budgets = {"command": 1.0, "chat": 2.0, "summarize": 4.0}
+    return config
+
+def command_request_for(content):
+    return dict(messages=[{"role": "user", "content": content}], model="llama3-70b-8192", max_tokens=32768)
+
+def test_model_router_picks_by_task_and_prompt_size():
+    from src.services.model_router import ModelRouter
+    router = ModelRouter(make_router_config())
+    routed = router.route("command", command_request_for("list big files"))
+    assert routed["model"] == "llama3-8b-8192"
+    assert routed["max_tokens"] < 8192  # clamped to the room the small model has left
+    assert router.route("chat", command_request_for("hi"))["model"] == "llama3-70b-8192"
+    long_prompt = "word " * 12000
+    assert router.route("command", command_request_for(long_prompt))["model"] == "mixtral-8x7b-32768"
+    # Chat stays on GROQ_MODEL unless routing is switched on for it too
+    assert router.route("chat", command_request_for(long_prompt))["model"] == "llama3-70b-8192"
+    router.config.model_routing_chat = True
+    assert router.route("chat", command_request_for(long_prompt))["model"] == "mixtral-8x7b-32768"
+    pinned = ModelRouter(make_router_config(), enabled=False).route("command", command_request_for("ls"))
+    assert pinned["model"] == "llama3-70b-8192" and pinned["max_tokens"] < 8192
+
+def test_model_router_routes_around_slow_models_and_retries_them_later():
+    from src.services.model_router import LatencyTracker, ModelRouter
+    tracker = LatencyTracker(max_age=60)
+    router = ModelRouter(make_router_config(), tracker)
+    with patch("src.services.model_router.time.monotonic", return_value=1000.0):
+        for _ in range(5):
+            tracker.record("summarize", "llama3-8b-8192", 4.0)  # long summaries don't count against commands
+        assert router.route("command", command_request_for("ls"))["model"] == "llama3-8b-8192"
+        for _ in range(5):
+            tracker.record("command", "llama3-8b-8192", 3.0)
+            tracker.record("command", "gemma-7b-it", 0.4)
+        assert router.route("command", command_request_for("ls"))["model"] == "gemma-7b-it"
+        for model, seconds in (("gemma-7b-it", 2.0), ("llama3-70b-8192", 1.5), ("mixtral-8x7b-32768", 5.0)):
+            for _ in range(20):
+                tracker.record("command", model, seconds)
+        # Everything is over budget: lowest p50 wins
+        assert router.route("command", command_request_for("ls"))["model"] == "llama3-70b-8192"
+    with patch("src.services.model_router.time.monotonic", return_value=1100.0):
+        assert router.route("command", command_request_for("ls"))["model"] == "llama3-8b-8192"
+
+def test_model_router_fallback_uses_one_stats_snapshot():
+    from src.services.model_router import LatencyTracker, ModelRouter
+    tracker = LatencyTracker()
+    for model in ("llama3-8b-8192", "gemma-7b-it", "llama3-70b-8192", "mixtral-8x7b-32768"):
+        for _ in range(5):
+            tracker.record("command", model, 3.0 if model != "gemma-7b-it" else 2.0)
+    router = ModelRouter(make_router_config(), tracker)
+    calls = []
+    real = tracker.percentiles
+    def percentiles(task, model, *qs):
+        calls.append(model)
+        # Samples expire after the first snapshot; a second lookup would see None
+        return real(task, model, *qs) if calls.count(model) == 1 else None
+    with patch.object(tracker, "percentiles", side_effect=percentiles):
+        assert router.choose("command", 10) == "gemma-7b-it"
+    assert len(calls) == 4
+
+def test_chat_banner_says_when_chat_is_routed():
+    import io
+    from rich.console import Console
+    from src.assistant.chat import display_banner
+    config = Config()
+    config.model_routing, config.model_routing_chat = True, False
+    console = Console(file=io.StringIO(), width=200)
+    display_banner(console, config)
+    assert config.groq_model in console.file.getvalue() and "auto-routed" not in console.file.getvalue()
+    config.model_routing_chat = True
+    display_banner(console, config)
+    assert "auto-routed" in console.file.getvalue()
+
+def test_latency_tracking_backend_records_per_task_and_model():
+    from src.services.fake_llm_server import FakeLLMServer
+    from src.services.llm_backend import OpenAICompatibleBackend
+    from src.services.model_router import LatencyTracker, LatencyTrackingBackend, ModelRouter
+    tracker = LatencyTracker()
+    router = ModelRouter(make_router_config(), tracker, enabled=False)
+    request = dict(messages=[{"role": "user", "content": "x"}], model="llama3-8b-8192")
+    with FakeLLMServer(latency=0.02) as server:
+        backend = LatencyTrackingBackend(OpenAICompatibleBackend(server.url, name="fake"), tracker)
+        try:
+            for _ in range(3):
+                backend.complete(**router.route("summarize", request))
+                list(backend.stream(**router.route("chat", request)))
+        finally:
+            backend.close()
+    assert tracker.p50("summarize", "llama3-8b-8192") >= 0.02
+    assert tracker.p50("chat", "llama3-8b-8192") >= 0.02
+    assert tracker.p50("command", "llama3-8b-8192") is None
+
+def test_streamed_chat_reply_is_titled_with_the_routed_model():
+    import io
+    from rich.console import Console
+    from src.assistant.chat import stream_groq_response
+    groq_service = MagicMock()
+    groq_service.stream_response.return_value = iter(["hi"])
+    groq_service.last_metrics.model_name = "llama3-8b-8192"
+    console = Console(file=io.StringIO(), width=60)
+    config = MagicMock(groq_model="mixtral-8x7b-32768")
+    assert stream_groq_response(groq_service, "hello", MagicMock(), config, console) == "hi"
+    assert "llama3-8b-8192" in console.file.getvalue() and "mixtral" not in console.file.getvalue()
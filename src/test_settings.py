@@ -8,6 +8,7 @@ from src.main import (
     delete_prompt, use_prompt, add_new_prompt, switch_active_prompt
 )
 from src.config import Config
+from pathlib import Path
 import json
 from src.config import load_config
 from src.services.groq_api import GroqService
@@ -23,6 +24,10 @@ def mock_config():
     config.max_tokens = 8192
     config.temperature = 0.7
     config.top_p = 1.0
+    config.system_prompt = "This is prompt 1"
+    defaults = Config()
+    config.model_max_tokens = defaults.model_max_tokens
+    config.DEFAULT_SETTINGS = defaults.DEFAULT_SETTINGS
     return config
 
 def test_settings_menu_options(mock_config):
@@ -58,14 +63,25 @@ def test_model_settings_menu(mock_config):
             {'setting': 'Back'}
         ]
         
-        with patch('src.main.set_key') as mock_set_key:
-            model_settings_menu(mock_config)
+        model_settings_menu(mock_config)
         
-        assert mock_config.groq_model == 'llama3-8b-8192'
+        mock_config.update_model_settings.assert_any_call(model='llama3-8b-8192')
         mock_config.update_model_settings.assert_any_call(max_tokens=4096)
         mock_config.update_model_settings.assert_any_call(temperature=0.7)
         mock_config.update_model_settings.assert_any_call(top_p=0.9)
-        assert mock_set_key.call_count == 4
+
+def test_model_settings_menu_max_tokens_range_follows_config(mock_config):
+    mock_config.model_max_tokens = {"mixtral-8x7b-32768": 100}
+    with patch('inquirer.prompt') as mock_prompt:
+        mock_prompt.side_effect = [
+            {'setting': 'Max Tokens'},
+            {'max_tokens': '4096'},  # Over the configured context limit
+            {'max_tokens': '50'},
+            {'setting': 'Back'}
+        ]
+        model_settings_menu(mock_config)
+
+    mock_config.update_model_settings.assert_called_once_with(max_tokens=50)
 
 def test_api_keys_menu(mock_config):
     with patch('inquirer.prompt') as mock_prompt:
@@ -74,11 +90,9 @@ def test_api_keys_menu(mock_config):
             {'tavily_key': 'new_tavily_key'}
         ]
         
-        with patch('src.main.set_key') as mock_set_key:
-            api_keys_menu(mock_config)
+        api_keys_menu(mock_config)
         
-        mock_set_key.assert_any_call('.env', 'GROQ_API_KEY', 'new_groq_key')
-        mock_set_key.assert_any_call('.env', 'TAVILY_API_KEY', 'new_tavily_key')
+        mock_config.update_api_keys.assert_called_once_with(groq_key='new_groq_key', tavily_key='new_tavily_key')
 
 def test_system_prompts_menu(mock_config):
     with patch('inquirer.prompt') as mock_prompt:
@@ -160,13 +174,15 @@ def test_delete_prompt(mock_config):
 
 
 def test_use_prompt(mock_config):
-    with patch('src.main.set_key') as mock_set_key:
-        result = use_prompt(mock_config, 1)
+    def set_active_prompt(index):
+        mock_config.active_prompt_index = index
+        mock_config.system_prompt = mock_config.SYSTEM_PROMPTS[index]['prompt']
+    mock_config.set_active_prompt.side_effect = set_active_prompt
+    result = use_prompt(mock_config, 1)
     
     assert mock_config.active_prompt_index == 1
     assert mock_config.system_prompt == "This is prompt 2"
-    mock_set_key.assert_any_call('.env', 'SYSTEM_PROMPT', "This is prompt 2")
-    mock_set_key.assert_any_call('.env', 'SYSTEM_PROMPT_TITLE', "Prompt 2")
+    mock_config.save_env.assert_called_once_with({'SYSTEM_PROMPT': "This is prompt 2", 'SYSTEM_PROMPT_TITLE': "Prompt 2"})
     assert result == 'main_menu'
     mock_config.system_prompt = "This is prompt 2"
     
@@ -229,7 +245,7 @@ def test_groq_service_generate_response_error(mock_groq_service):
 
 # Tests for Config
 def test_config_init():
-    with patch('src.config.load_dotenv'):
+    with patch('src.config.load_env_file'):
         with patch('src.config.os.getenv') as mock_getenv:
             mock_getenv.side_effect = lambda key, default=None: default
             config = Config()
@@ -240,22 +256,16 @@ def test_config_init():
     assert config.top_p == 1.0
     assert len(config.SYSTEM_PROMPTS) == 5
 
-def test_config_save_and_load_system_prompts(tmp_path):
+def test_config_save_and_load_system_prompts(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
     config = Config()
     config.SYSTEM_PROMPTS = [{"title": "Test Prompt", "prompt": "This is a test"}]
-    
-    with patch('src.config.open') as mock_open:
-        mock_open.return_value.__enter__.return_value = MagicMock()
-        config.save_system_prompts()
-        mock_open.assert_called_once_with('system_prompts.json', 'w')
-        mock_open.return_value.__enter__.return_value.write.assert_called_once()
-
-    with patch('src.config.open') as mock_open:
-        mock_open.return_value.__enter__.return_value = MagicMock()
-        mock_open.return_value.__enter__.return_value.read.return_value = json.dumps(config.SYSTEM_PROMPTS)
-        config.load_system_prompts()
-        mock_open.assert_called_once_with('system_prompts.json', 'r')
-        assert config.SYSTEM_PROMPTS == [{"title": "Test Prompt", "prompt": "This is a test"}]
+    config.save_system_prompts()
+    assert json.loads((tmp_path / 'system_prompts.json').read_text()) == config.SYSTEM_PROMPTS
+
+    config.SYSTEM_PROMPTS = []
+    assert config.load_system_prompts(force=True) is True
+    assert config.SYSTEM_PROMPTS == [{"title": "Test Prompt", "prompt": "This is a test"}]
 
 def test_config_set_active_prompt():
     config = Config()
@@ -272,23 +282,25 @@ def test_config_set_active_prompt():
 
 def test_config_update_model_settings():
     config = Config()
-    with patch('src.config.set_key') as mock_set_key:
+    with patch('src.config.update_env_file') as mock_update_env_file:
         config.update_model_settings(model="new-model", max_tokens=1000, temperature=0.5, top_p=0.9)
     
     assert config.groq_model == "new-model"
     assert config.max_tokens == 1000
     assert config.temperature == 0.5
     assert config.top_p == 0.9
-    assert mock_set_key.call_count == 4
+    mock_update_env_file.assert_called_once_with(
+        Path('.env'), {'GROQ_MODEL': 'new-model', 'MAX_TOKENS': '1000', 'TEMPERATURE': '0.5', 'TOP_P': '0.9'}
+    )
 
 def test_config_update_api_keys():
     config = Config()
-    with patch('src.config.set_key') as mock_set_key:
+    with patch('src.config.update_env_file') as mock_update_env_file:
         config.update_api_keys(groq_key="new_groq_key", tavily_key="new_tavily_key")
     
-    assert mock_set_key.call_count == 2
-    mock_set_key.assert_any_call('.env', 'GROQ_API_KEY', "new_groq_key")
-    mock_set_key.assert_any_call('.env', 'TAVILY_API_KEY', "new_tavily_key")
+    mock_update_env_file.assert_called_once_with(
+        Path('.env'), {'GROQ_API_KEY': "new_groq_key", 'TAVILY_API_KEY': "new_tavily_key"}
+    )
 
 
 def test_config_to_dict():
@@ -337,7 +349,7 @@ def test_load_config():
         with patch('src.config.inquirer.prompt') as mock_prompt:
             with patch('src.config.Path.touch') as mock_touch:
                 with patch('src.config.set_key') as mock_set_key:
-                    with patch('src.config.load_dotenv') as mock_load_dotenv:
+                    with patch('src.config.load_env_file') as mock_load_env_file, patch('src.config._config', None):
                         mock_exists.return_value = False
                         mock_prompt.side_effect = [
                             {'groq_key': 'test_groq_key'},
@@ -350,7 +362,7 @@ def test_load_config():
                         assert mock_prompt.call_count == 2
                         assert mock_touch.called
                         assert mock_set_key.call_count == 2
-                        assert mock_load_dotenv.called
+                        assert mock_load_env_file.called
                         assert isinstance(config, Config)
 
 # Test for model_settings_menu with invalid inputs
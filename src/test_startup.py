@@ -0,0 +1,25 @@
+# test_startup.py
+
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+def test_main_import_defers_heavy_modules():
+    code = (
+        "import sys, src.main; "
+        "print('LOADED:' + ','.join(m for m in ('groq', 'tavily', 'rich', 'pydantic', 'httpx', 'src.assistant.cli_assistant') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "LOADED:"
+
+def test_cli_assistant_import_has_no_side_effects(tmp_path):
+    code = "import src.assistant.cli_assistant as cli; print(cli.system_info)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True,
+                            env={"HOME": str(tmp_path), "PATH": ""})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "None"
+    assert not (tmp_path / ".croqli_cheatsheet.json").exists()
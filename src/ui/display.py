@@ -1,7 +1,13 @@
 # croqli/src/ui/display.py
 
+import re
+from functools import lru_cache
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
+from rich.segment import Segment
 from rich.table import Table
 from rich.syntax import Syntax
 from rich.text import Text
@@ -11,8 +17,8 @@ from rich.theme import Theme
 from .theme import *
 from rich.markdown import Markdown
 
-
-# Define console at the module level
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+LIST_ITEM_RE = re.compile(r"^ {0,3}([-*+]|\d+[.)])\s")
 
 
 def create_custom_theme(config):
@@ -24,18 +30,270 @@ def create_custom_theme(config):
     })
 
 
-def render_markdown(text: str, console: Console, config):
-    custom_theme = create_custom_theme(config)
-    styled_console = Console(theme=custom_theme)
-    md = Markdown(text)
-    styled_console.print(md)
+# Define console at the module level
+console = Console()
+# Themed consoles keyed by brand palette, built once and reused by every render
+_themed_consoles = {}
 
-    # Debug: Print using explicit colors
-    print(f"[{config.brand_primary}]This should be in the primary color (orange)[/{config.brand_primary}]")
-    print(f"[{config.brand_secondary}]This should be in the secondary color (light gray)[/{config.brand_secondary}]")
+
+def get_console(config=None) -> Console:
+    """The shared Console, themed with the config's brand colors when a config is given."""
+    if config is None:
+        return console
+    key = (config.brand_primary, config.brand_secondary)
+    if key not in _themed_consoles:
+        _themed_consoles[key] = Console(theme=create_custom_theme(config))
+    return _themed_consoles[key]
+
+
+class MarkdownBlockSplitter:
+    """Splits Markdown into top-level blocks as text arrives.
+
+    Only complete lines are examined, each exactly once, so feeding a long
+    response costs time proportional to its length. A block is finished when a
+    blank line is followed by something that does not continue it, or when a
+    fenced code block closes; what is left is the open `tail`.
+    """
+
+    def __init__(self):
+        self.blocks: List[str] = []
+        self._lines: List[str] = []
+        self._partial = ""
+        self._fence = None
+        self._blank_pending = False
+        self._is_list = False
+
+    def _finish_block(self) -> None:
+        if self._lines:
+            self.blocks.append("\n".join(self._lines))
+        self._lines = []
+        self._blank_pending = False
+        self._is_list = False
+
+    def _add_line(self, line: str) -> None:
+        if self._fence:
+            self._lines.append(line)
+            stripped = line.strip()
+            if stripped.startswith(self._fence) and set(stripped) == {self._fence[0]}:
+                self._fence = None
+                self._finish_block()
+            return
+        if not line.strip():
+            self._blank_pending = bool(self._lines)
+            return
+        indented = line.startswith((" ", "\t"))
+        if self._blank_pending:
+            if self._is_list and (LIST_ITEM_RE.match(line) or indented):
+                self._lines.append("")  # a loose list continues past the blank line
+                self._blank_pending = False
+            else:
+                self._finish_block()
+        fence = FENCE_RE.match(line)
+        if fence and not (self._is_list and indented):
+            self._finish_block()
+            self._fence = fence.group(1)
+        elif not self._lines:
+            self._is_list = bool(LIST_ITEM_RE.match(line))
+        self._lines.append(line)
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text; returns the blocks it finished."""
+        finished = len(self.blocks)
+        *lines, self._partial = (self._partial + text).split("\n")
+        for line in lines:
+            self._add_line(line)
+        return self.blocks[finished:]
+
+    @property
+    def tail(self) -> str:
+        """The open block, including any incomplete last line."""
+        lines = self._lines + [self._partial] if self._partial else self._lines
+        return "\n".join(lines)
+
+    def close(self) -> List[str]:
+        """Finish the stream; returns the remaining blocks."""
+        finished = len(self.blocks)
+        if self._partial:
+            self._add_line(self._partial)
+            self._partial = ""
+        self._finish_block()
+        return self.blocks[finished:]
+
+
+def split_markdown_blocks(text: str) -> List[str]:
+    splitter = MarkdownBlockSplitter()
+    splitter.feed(text)
+    splitter.close()
+    return splitter.blocks
+
+
+class MarkdownBlock:
+    """Renders one Markdown block without the blank lines Rich puts around it.
+
+    Blocks rendered one at a time are separated by exactly one blank line,
+    so printing them separately looks like rendering the whole document.
+    """
+
+    def __init__(self, text: str):
+        self.markdown = Markdown(text)
+
+    def __rich_console__(self, console, options):
+        # Hold back line breaks until more content follows, dropping leading and trailing blank lines
+        pending, last = [], None
+        for segment in console.render(self.markdown, options):
+            if segment.text == "\n" and not segment.control:
+                if last is not None:
+                    pending.append(segment)
+                continue
+            if pending:
+                yield from pending
+                pending = []
+            last = segment
+            yield segment
+        if last is not None and not last.text.endswith("\n"):
+            yield Segment.line()
+
+
+def _fenced_code(block: str):
+    """(language, code) when `block` is a fenced code block (closed or still open), else None."""
+    lines = block.split("\n")
+    fence = FENCE_RE.match(lines[0])
+    if not fence:
+        return None
+    language = lines[0].strip()[len(fence.group(1)):].strip().split(" ")[0] or "text"
+    body = lines[1:]
+    # Drop the closing fence, or the start of one still streaming in
+    if body and body[-1].strip() and set(body[-1].strip()) == {fence.group(1)[0]}:
+        body = body[:-1]
+    return language, "\n".join(body)
+
+
+@lru_cache(maxsize=None)
+def _has_lexer(language: str) -> bool:
+    """Whether Pygments knows `language`; cached, as each miss scans the installed plugins."""
+    try:
+        get_lexer_by_name(language)
+    except ClassNotFound:
+        return False
+    return True
+
+
+def _block_renderable(block: str):
+    """The block as `render_markdown` shows it; a fence still streaming in is closed first."""
+    code = _fenced_code(block)
+    if code:
+        opening = block.split("\n", 1)[0]
+        fence = FENCE_RE.match(opening).group(1)
+        # Until the language name is complete and known, highlight as plain text rather
+        # than have Rich look up every partial name ("b", "ba", ...) on each refresh
+        if "\n" not in block or not _has_lexer(code[0]):
+            opening = opening[:opening.index(fence) + len(fence)]
+        block = "\n".join(line for line in (opening, code[1], fence) if line)
+    return MarkdownBlock(block)
+
+
+class _OpenBlock:
+    """Live renderable for the trailing open block, parsed only when Live draws it.
+
+    `update` just swaps in the new tail text, so deltas that arrive between two
+    refreshes cost no Markdown parsing, and a refresh with an unchanged tail
+    reuses the last parse.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._parsed = None
+        self._renderable = Text("")
+
+    def __rich_console__(self, console, options):
+        text = self.text
+        if text != self._parsed:
+            self._renderable = _block_renderable(text) if text.strip() else Text("")
+            self._parsed = text
+        yield self._renderable
+
+
+class StreamingMarkdown:
+    """Live Markdown view for a streamed response.
+
+    Finished blocks are rendered once and printed above the live region, exactly
+    as `render_markdown` renders them; only the trailing open block is re-rendered,
+    and only when Live refreshes, so each refresh costs the size of that block
+    rather than the whole response and deltas in between cost nothing.
+
+        with StreamingMarkdown(console, header) as view:
+            for delta in deltas:
+                view.update(delta)
+    """
+
+    def __init__(self, console: Console, header=None, refresh_per_second: float = 12, auto_refresh: bool = True):
+        self.console = console
+        self.header = header
+        self.text = ""
+        self._splitter = MarkdownBlockSplitter()
+        self._tail = _OpenBlock()
+        self._printed = 0
+        self._live = Live(
+            self._tail, console=console, refresh_per_second=refresh_per_second,
+            auto_refresh=auto_refresh, vertical_overflow="visible", transient=True
+        )
+
+    def __enter__(self):
+        if self.header is not None:
+            self.console.print(self.header)
+        self._live.start()
+        return self
+
+    def _print_block(self, block: str) -> None:
+        if self._printed:
+            self.console.print()
+        self.console.print(_block_renderable(block))
+        self._printed += 1
+
+    def update(self, delta: str, refresh: bool = False) -> None:
+        self.text += delta
+        for block in self._splitter.feed(delta):
+            self._print_block(block)
+        # A plain string swap, so Live's refresh thread always sees a whole tail
+        self._tail.text = self._splitter.tail
+        if refresh:
+            self._live.refresh()
+
+    def __exit__(self, *exc_info):
+        self._tail.text = ""
+        self._live.refresh()
+        self._live.stop()
+        for block in self._splitter.close():
+            self._print_block(block)
+        return False
+
+
+def _chunk_blocks(blocks: List[str], first_chunk: int = 1024, max_chunk: int = 32 * 1024):
+    """Group blocks into chunks that double in size, so output starts early without per-block overhead."""
+    chunk, size, limit = [], 0, first_chunk
+    for block in blocks:
+        chunk.append(block)
+        size += len(block)
+        if size >= limit:
+            yield "\n\n".join(chunk)
+            chunk, size, limit = [], 0, min(limit * 2, max_chunk)
+    if chunk:
+        yield "\n\n".join(chunk)
+
+
+def render_markdown(text: str, console: Console = None, config=None):
+    """Render Markdown on the shared themed console, in chunks of whole blocks.
+
+    Long responses start appearing after the first chunk is parsed instead of
+    after the whole document, and no Console or Theme is built per call.
+    """
+    target = get_console(config) if config is not None else (console or get_console())
+    for index, chunk in enumerate(_chunk_blocks(split_markdown_blocks(text))):
+        if index:
+            target.print()
+        target.print(MarkdownBlock(chunk))
 
 
-console = Console()
 def print_welcome_message():
     """Display a welcome message to the user."""
     welcome_text = Text("Welcome to the Groq CLI Assistant!", style=TITLE_STYLE)
@@ -4,7 +4,7 @@ import inquirer
 from typing import List, Dict, Any
 from .theme import PRIMARY_COLOR, SECONDARY_COLOR
 from pathlib import Path
-from src.services.file_service import update_cheat_sheet
+from src.services.file_service import CheatSheet
 from src.config import Config
 
 def save_system_prompts(config: Config):
@@ -77,7 +77,9 @@ def handle_add_command(user_input: str, cheat_sheet_path: Path):
     if user_input.startswith("/add"):
         question_to_add = user_input.replace("/add ", "").strip()
         if question_to_add:
-            update_cheat_sheet(cheat_sheet_path, "useful_questions", [question_to_add])
+            cheat_sheet = CheatSheet(cheat_sheet_path)
+            questions = cheat_sheet.data.get("useful_questions", [])
+            cheat_sheet.update({"useful_questions": questions + [question_to_add]})
             print("Added to your cheat sheet!")
         else:
             print("Please specify the question to add.")